@@ -12,15 +12,16 @@ import sys
 import json
 import time
 import uuid
-import tempfile
+import hashlib
 import shutil
 import threading
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 # Import local modules with error handling
 try:
-    from s3_operations import S3Operations, S3OperationError
+    from s3_operations import S3Operations, S3OperationError, S3ObjectTooLargeError
+    from queue_backends import create_queue_backend
     from utils.logging_config import setup_logging, create_session_logger, log_performance_metrics
     from utils.error_handlers import (
         ProcessingError, ConfigurationError, NetworkError, StorageError, 
@@ -30,6 +31,17 @@ try:
     )
     from utils.audio_utils import AudioProcessor, create_processing_config
     from utils.input_validation import InputValidator
+    from utils.message_routing import MessageRouter, MessageDisposition, parse_job_message, get_defer_count
+    from utils.prefetch import JobPrefetcher
+    from utils.idempotency import IdempotencyStore, compute_job_fingerprint, normalize_processing_params
+    from utils.result_cache import ResultCache, compute_content_hash
+    from utils.upload_manifest import UploadManifest, compute_file_checksum
+    from utils.stream_decode import decode_source_stream
+    from utils.workspace import Workspace, choose_workspace_root, estimate_footprint
+    from utils.admission import (
+        AdmissionController, AdmissionDecision, HEADER_PROBE_BYTES,
+        probe_audio_header, estimate_resources
+    )
     # Import PyDub components for audio processing
     from pydub import AudioSegment
     from pydub.silence import split_on_silence
@@ -41,6 +53,9 @@ except ImportError as e:
 # Global logger will be configured in main()
 logger = None
 
+# Largest source file accepted for processing
+MAX_SOURCE_FILE_BYTES = 100 * 1024 * 1024  # 100MB limit
+
 class AudioProcessingService:
     """
     Main service class for ECS-based audio processing.
@@ -52,6 +67,15 @@ class AudioProcessingService:
         self.temp_files = []
         self.s3_ops = None
         self.audio_processor = None
+        self.idempotency_store = None
+        self.job_fingerprint = None
+        self.source_etag = None
+        self.result_cache = None
+        self.content_hash = None
+        self.upload_manifest = None
+        self.source_digest = None
+        self.source_size = None
+        self.workspace = None
         self._cleanup_done = False
         self._cleanup_lock = threading.Lock()
         
@@ -62,12 +86,15 @@ class AudioProcessingService:
             ErrorRecovery.validate_environment()
             
             # Check disk space
-            if not ErrorRecovery.check_disk_space(100):
+            if not ErrorRecovery.check_disk_space(100, os.environ.get('WORKSPACE_ROOT', '/tmp')):
                 raise ResourceError("Insufficient disk space for processing")
             
             # Initialize S3 operations
             region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-            self.s3_ops = S3Operations(region_name=region)
+            self.s3_ops = S3Operations(
+                region_name=region,
+                verify_uploads=os.environ.get('UPLOAD_VERIFY_HEAD', 'false').lower() == 'true'
+            )
             
             # Initialize audio processor with configuration
             config = create_processing_config(dict(os.environ))
@@ -85,52 +112,305 @@ class AudioProcessingService:
     def download_source_file(self, bucket: str, key: str) -> str:
         """Download source audio file from S3 with retry logic."""
         try:
-            # Create secure temporary file
-            temp_dir = tempfile.mkdtemp(prefix='audio_processing_')
-            filename = os.path.basename(key)
-            local_path = os.path.join(temp_dir, filename)
-            
-            # Track temporary file for cleanup
-            self.temp_files.append(local_path)
-            self.temp_files.append(temp_dir)
+            workspace = self.get_workspace()
+            if self.source_size:
+                workspace.ensure_capacity(self.source_size)
+            local_path = os.path.join(workspace.subdir('source'), os.path.basename(key))
             
             logger.info(f"Downloading source file: s3://{bucket}/{key}", 
                        extra={'session_id': self.session_id, 's3_key': key})
             
-            # Download with validation
-            success = self.s3_ops.download_file(bucket, key, local_path)
+            # Single GET, pinned to the fingerprinted ETag and size-capped before the body is read
+            self.s3_ops.download_file(
+                bucket, key, local_path, 
+                if_match=self.source_etag, max_bytes=MAX_SOURCE_FILE_BYTES
+            )
             
-            if not success:
-                raise StorageError(f"Failed to download file: s3://{bucket}/{key}")
+            self.validate_source_file(local_path)
+            workspace.account(local_path)
             
-            # Validate file size
-            file_size = os.path.getsize(local_path)
-            if file_size == 0:
+            return local_path
+            
+        except S3ObjectTooLargeError as e:
+            raise ValidationError(f"File too large: {str(e)}")
+        except Exception as e:
+            if isinstance(e, ProcessingError):
+                raise
+            else:
+                raise StorageError(f"Download failed: {str(e)}")
+    
+    def get_workspace(self) -> Workspace:
+        """
+        Get the job's workspace, creating it on first use.
+        
+        Small jobs are placed on WORKSPACE_RAM_ROOT (e.g. /dev/shm) when set;
+        everything the job writes is accounted against WORKSPACE_QUOTA_MB.
+        """
+        if self.workspace is None:
+            ram_max_mb = int(os.environ.get('WORKSPACE_RAM_MAX_MB', '64'))
+            root = choose_workspace_root(
+                estimate_footprint(self.source_size),
+                disk_root=os.environ.get('WORKSPACE_ROOT'),
+                ram_root=os.environ.get('WORKSPACE_RAM_ROOT'),
+                ram_max_bytes=ram_max_mb * 1024 * 1024
+            )
+            quota_mb = int(os.environ.get('WORKSPACE_QUOTA_MB', '2048'))
+            self.workspace = Workspace(
+                self.session_id, root=root, 
+                quota_bytes=quota_mb * 1024 * 1024 if quota_mb > 0 else None
+            )
+        return self.workspace
+    
+    @retry_with_exponential_backoff(max_retries=3, base_delay=1.0)
+    def stream_source_audio(self, bucket: str, key: str) -> Tuple[Optional[AudioSegment], Optional[str]]:
+        """
+        Decode the source straight from the S3 GET body without a temp file.
+        
+        Decoding overlaps the download and the bytes are hashed as they pass
+        for the result cache. Sources that need seeking (MP4/M4A with the moov
+        index at the end) are spilled to disk instead.
+        
+        Returns:
+            Tuple of (decoded audio, None) when streamed, or (None, local_path)
+            when the source was written to disk for the file-based path
+        """
+        try:
+            stream = self.s3_ops.open_object_stream(
+                bucket, key, if_match=self.source_etag, max_bytes=MAX_SOURCE_FILE_BYTES
+            )
+            content_length = stream['content_length']
+            if content_length == 0:
                 raise ValidationError("Downloaded file is empty")
             
-            if file_size > 100 * 1024 * 1024:  # 100MB limit
-                raise ValidationError(f"File too large: {file_size} bytes")
+            digest = hashlib.sha256()
             
-            logger.info(f"File downloaded successfully: {file_size} bytes", 
-                       extra={'session_id': self.session_id, 'file_size': file_size})
+            def hashed_chunks():
+                received = 0
+                for chunk in stream['body'].iter_chunks(1024 * 1024):
+                    digest.update(chunk)
+                    received += len(chunk)
+                    yield chunk
+                if received != content_length:
+                    raise IOError(f"Incomplete download: received {received} of {content_length} bytes")
             
-            return local_path
+            spill_path = os.path.join(self.get_workspace().subdir('source'), os.path.basename(key))
+            
+            logger.info(f"Streaming source file: s3://{bucket}/{key} ({content_length} bytes)", 
+                       extra={'session_id': self.session_id, 's3_key': key})
+            
+            audio = decode_source_stream(hashed_chunks(), spill_path)
+            if audio is None:
+                self.validate_source_file(spill_path)
+                self.workspace.account(spill_path)
+                return None, spill_path
+            
+            self.source_digest = digest
+            self.source_size = content_length
+            return audio, None
             
+        except S3ObjectTooLargeError as e:
+            raise ValidationError(f"File too large: {str(e)}")
         except Exception as e:
             if isinstance(e, ProcessingError):
                 raise
             else:
-                raise StorageError(f"Download failed: {str(e)}")
+                raise StorageError(f"Streaming download failed: {str(e)}")
+    
+    def find_completed_job(self, bucket: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Fingerprint the job and look up its completion marker.
+        
+        The fingerprint covers the source bucket, key and ETag plus the normalized
+        processing parameters, so redelivered messages and duplicate S3 events
+        resolve to the same marker.
+        
+        Returns:
+            Completion marker if this exact job already completed, else None
+        """
+        if os.environ.get('IDEMPOTENCY_ENABLED', 'true').lower() != 'true':
+            return None
+        
+        try:
+            metadata = self.s3_ops.get_file_metadata(bucket, key)
+            self.source_etag = metadata['etag']
+            self.source_size = metadata.get('content_length')
+        except Exception as e:
+            logger.warning(f"Could not fingerprint job, skipping duplicate check: {str(e)}")
+            return None
+        
+        params = normalize_processing_params(os.environ.get('PROCESSING_PARAMS'))
+        # Container-level overrides change the outputs too
+        for env_name, param_name in (('PRESERVE_ORIGINAL', 'preserveOriginal'), 
+                                     ('OUTPUT_FORMAT', 'outputFormat')):
+            if os.environ.get(env_name):
+                params[param_name] = os.environ[env_name].lower()
+        
+        self.job_fingerprint = compute_job_fingerprint(bucket, key, self.source_etag, params)
+        self.idempotency_store = IdempotencyStore(
+            self.s3_ops, bucket, 
+            prefix=os.environ.get('IDEMPOTENCY_PREFIX', 'processing-manifests/jobs')
+        )
+        return self.idempotency_store.get_completed(self.job_fingerprint)
     
-    def process_audio(self, input_path: str, user_id: str, 
-                     original_filename: str) -> List[Dict[str, Any]]:
-        """Process audio file and create one-shots."""
+    def check_admission(self, bucket: str, key: str, source_path: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Decide from the source's size and header whether this worker should take the job.
+        
+        Only the first HEADER_PROBE_BYTES are read (from S3, or from the
+        prefetched file), plus a few box headers and the moov box for MP4s
+        that store it after the media data. Probe failures admit the job.
+        
+        Args:
+            bucket: S3 bucket name
+            key: Source object key
+            source_path: Optional prefetched source file
+            
+        Returns:
+            None to admit the job, or an admission dict (decision, delaySeconds,
+            reason, estimate) when it should be deferred or rerouted
+            
+        Raises:
+            ResourceError: If the job can never fit this worker and there is
+                nowhere to reroute it
+        """
+        if os.environ.get('ADMISSION_ENABLED', 'true').lower() != 'true':
+            return None
+        
+        def read_range(start: int, end: int) -> bytes:
+            if source_path:
+                with open(source_path, 'rb') as f:
+                    f.seek(start)
+                    return f.read(end - start + 1)
+            return self.s3_ops.get_object_range(bucket, key, start, end)['data']
+        
+        try:
+            if source_path:
+                source_bytes = os.path.getsize(source_path)
+                head = read_range(0, HEADER_PROBE_BYTES - 1)
+            else:
+                header = self.s3_ops.get_object_range(bucket, key, 0, HEADER_PROBE_BYTES - 1)
+                head, source_bytes = header['data'], header['total_size']
+                self.source_size = source_bytes
+            
+            # Further small range reads only for MP4s with the moov box at the end
+            probe = probe_audio_header(head, source_bytes, read_range=read_range)
+            estimate = estimate_resources(
+                probe, source_bytes,
+                memory_factor=float(os.environ.get('ADMISSION_MEMORY_FACTOR', '4')),
+                preserve_original=self.audio_processor.config.preserve_original
+            )
+        except Exception as e:
+            logger.warning(f"Admission probe failed, admitting job: {str(e)}")
+            return None
+        
+        # Keep room for the interpreter, libraries and the prefetcher
+        reserved_mb = int(os.environ.get('ADMISSION_RESERVED_MEMORY_MB', '256'))
+        memory_limit_mb = ErrorRecovery.get_memory_limit_mb()
+        available_memory_mb = ErrorRecovery.get_available_memory_mb()
+        quota_mb = int(os.environ.get('WORKSPACE_QUOTA_MB', '2048'))
+        
+        try:
+            available_disk = shutil.disk_usage(os.environ.get('WORKSPACE_ROOT', '/tmp')).free
+        except OSError:
+            available_disk = None
+        
+        controller = AdmissionController(
+            memory_capacity_mb=memory_limit_mb - reserved_mb if memory_limit_mb else None,
+            disk_capacity_bytes=quota_mb * 1024 * 1024 if quota_mb > 0 else None,
+            defer_delay_seconds=int(os.environ.get('ADMISSION_DEFER_SECONDS', '60')),
+            max_deferrals=int(os.environ.get('ADMISSION_MAX_DEFERRALS', '5')),
+            reroute_available=bool(os.environ.get('ADMISSION_REROUTE_QUEUE_URL'))
+        )
+        decision, reason = controller.decide(
+            estimate,
+            available_memory_mb - reserved_mb if available_memory_mb is not None else None,
+            available_disk,
+            defer_count=int(os.environ.get('ADMISSION_DEFER_COUNT', '0'))
+        )
+        
+        logger.info(f"Admission {decision.value} for {probe['format']} source "
+                    f"(~{probe['duration_seconds']:.0f}s): {reason}", extra={
+            'session_id': self.session_id,
+            'source_bytes': source_bytes,
+            **estimate
+        })
+        
+        if decision == AdmissionDecision.ADMIT:
+            return None
+        if decision == AdmissionDecision.REJECT:
+            raise ResourceError(f"Job exceeds worker capacity: {reason}", details=estimate)
+        return {
+            'decision': decision.value,
+            'delaySeconds': controller.defer_delay_seconds if decision == AdmissionDecision.DEFER else 0,
+            'reason': reason,
+            'estimate': estimate
+        }
+    
+    def reuse_cached_results(self, local_path: str, bucket: str, user_id: str, 
+                             base_filename: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Materialize a previously produced one-shot set for identical audio.
+        
+        The source bytes are hashed together with the effective processing
+        configuration; on a hit the outputs are copied server-side into the
+        user's processed prefix with no decode, encode or upload.
+        
+        Returns:
+            Upload results on a cache hit, None on a miss
+        """
+        if os.environ.get('RESULT_CACHE_ENABLED', 'true').lower() != 'true':
+            return None
+        
+        self.content_hash = compute_content_hash(
+            local_path, self.audio_processor.config.to_dict(), source_digest=self.source_digest
+        )
+        self.result_cache = ResultCache(
+            self.s3_ops, bucket, 
+            prefix=os.environ.get('RESULT_CACHE_PREFIX', 'processing-cache/results')
+        )
+        
+        entry = self.result_cache.lookup(user_id, self.content_hash)
+        if not entry:
+            return None
+        
+        try:
+            results = self.result_cache.materialize(entry, user_id, base_filename, {
+                'session-id': self.session_id,
+                'user-id': user_id,
+                'processing-version': '2.0',
+                'content-hash': self.content_hash
+            })
+        except Exception as e:
+            logger.warning(f"Cached outputs could not be copied, processing normally: {str(e)}", 
+                          extra={'session_id': self.session_id})
+            return None
+        
+        logger.info(f"Result cache hit: copied {len(results)} cached outputs", 
+                   extra={'session_id': self.session_id, 'content_hash': self.content_hash})
+        return results
+    
+    def validate_source_file(self, local_path: str) -> int:
+        """Validate a downloaded source file and return its size in bytes."""
+        file_size = os.path.getsize(local_path)
+        if file_size == 0:
+            raise ValidationError("Downloaded file is empty")
+        
+        if file_size > MAX_SOURCE_FILE_BYTES:
+            raise ValidationError(f"File too large: {file_size} bytes")
+        
+        logger.info(f"File downloaded successfully: {file_size} bytes", 
+                   extra={'session_id': self.session_id, 'file_size': file_size})
+        
+        return file_size
+    
+    def process_audio(self, input_path: Optional[str], user_id: str, 
+                     original_filename: str, audio: Optional[AudioSegment] = None) -> List[Dict[str, Any]]:
+        """Process audio file (or already decoded streamed audio) and create one-shots."""
         try:
             start_time = time.time()
             
             # Create output directory
-            output_dir = tempfile.mkdtemp(prefix='audio_output_')
-            self.temp_files.append(output_dir)
+            output_dir = self.get_workspace().subdir('output')
             
             # Extract base filename without extension
             base_filename = os.path.splitext(original_filename)[0]
@@ -139,12 +419,22 @@ class AudioProcessingService:
                        extra={'session_id': self.session_id, 'user_id': user_id})
             
             # Process audio using audio utilities
-            processing_results = self.audio_processor.process_audio_file(
-                input_path, output_dir, base_filename
-            )
+            if audio is not None:
+                processing_results = self.audio_processor.process_audio_segment(
+                    audio, output_dir, base_filename
+                )
+                file_size = self.source_size
+            else:
+                processing_results = self.audio_processor.process_audio_file(
+                    input_path, output_dir, base_filename
+                )
+                file_size = os.path.getsize(input_path)
+            
+            # Account the outputs against the job's workspace quota
+            for result in processing_results:
+                self.workspace.account(result['path'])
             
             processing_time = time.time() - start_time
-            file_size = os.path.getsize(input_path)
             
             # Log performance metrics
             log_performance_metrics(
@@ -167,60 +457,116 @@ class AudioProcessingService:
     @retry_with_exponential_backoff(max_retries=3, base_delay=1.0)
     def upload_processed_files(self, processing_results: List[Dict[str, Any]], 
                               bucket: str, user_id: str) -> List[Dict[str, Any]]:
-        """Upload processed audio files to S3."""
+        """
+        Upload processed audio files to S3.
+        
+        Completed chunks are recorded in a per-job upload manifest, so retries of
+        this method and redeliveries of the same job only upload chunks that are
+        missing or whose size/checksum no longer match.
+        """
         try:
-            upload_results = []
-            
-            for result in processing_results:
-                try:
-                    local_path = result['path']
-                    filename = result['filename']
-                    
-                    # Construct S3 key for processed files
-                    s3_key = f"public/processed/{user_id}/{filename}"
-                    
-                    # Create metadata for the file
-                    metadata = {
-                        'session-id': self.session_id,
-                        'user-id': user_id,
-                        'processing-version': '2.0',
-                        'chunk-index': str(result.get('chunk_index', -1)),
-                        'duration-seconds': str(result.get('duration_seconds', 0)),
-                        'format': result.get('format', 'unknown')
-                    }
-                    
-                    logger.info(f"Uploading processed file: {filename}", 
-                               extra={'session_id': self.session_id, 's3_key': s3_key})
-                    
-                    # Upload file with metadata
-                    success = self.s3_ops.upload_file(local_path, bucket, s3_key, metadata)
-                    
-                    if success:
-                        upload_result = {
+            upload_results = [None] * len(processing_results)
+            manifest = self.get_upload_manifest(bucket)
+            pending = []
+            
+            try:
+                for index, result in enumerate(processing_results):
+                    try:
+                        local_path = result['path']
+                        filename = result['filename']
+                        
+                        # Construct S3 key for processed files
+                        s3_key = f"public/processed/{user_id}/{filename}"
+                        
+                        file_size = os.path.getsize(local_path)
+                        checksum = result.get('sha256') or compute_file_checksum(local_path)
+                        
+                        if manifest.is_uploaded(s3_key, file_size, checksum):
+                            logger.info(f"Skipping already uploaded file: {filename}", 
+                                       extra={'session_id': self.session_id, 's3_key': s3_key})
+                            upload_results[index] = {
+                                **result,
+                                's3_key': s3_key,
+                                's3_bucket': bucket,
+                                'sha256': checksum,
+                                'upload_success': True
+                            }
+                            continue
+                        
+                        # Create metadata for the file
+                        metadata = {
+                            'session-id': self.session_id,
+                            'user-id': user_id,
+                            'processing-version': '2.0',
+                            'chunk-index': str(result.get('chunk_index', -1)),
+                            'duration-seconds': str(result.get('duration_seconds', 0)),
+                            'format': result.get('format', 'unknown')
+                        }
+                        
+                        pending.append((index, s3_key, file_size, checksum, {
+                            'local_path': local_path,
+                            'bucket': bucket,
+                            'key': s3_key,
+                            'metadata': metadata,
+                            'checksum_sha256': checksum
+                        }))
+                            
+                    except Exception as e:
+                        logger.error(f"Failed to upload file {result.get('filename', 'unknown')}: {str(e)}")
+                        # Continue with other files
+                        upload_results[index] = {
+                            **result,
+                            'upload_success': False,
+                            'upload_error': str(e)
+                        }
+                
+                logger.info(f"Uploading {len(pending)} processed files", 
+                           extra={'session_id': self.session_id})
+                
+                def persist_completed(position: int, outcome: Dict[str, Any]) -> None:
+                    # Save as each chunk lands so a killed task still leaves a manifest
+                    if outcome['success']:
+                        _, s3_key, file_size, checksum, _ = pending[position]
+                        manifest.record(s3_key, file_size, checksum)
+                        manifest.save()
+                
+                # All chunk uploads share one connection pool and run concurrently
+                outcomes = self.s3_ops.upload_many([request for *_, request in pending],
+                                                   on_complete=persist_completed)
+                
+                for (index, s3_key, file_size, checksum, _), outcome in zip(pending, outcomes):
+                    result = processing_results[index]
+                    if outcome['success']:
+                        upload_results[index] = {
                             **result,
                             's3_key': s3_key,
                             's3_bucket': bucket,
+                            'sha256': checksum,
                             'upload_success': True
                         }
-                        upload_results.append(upload_result)
-                        
                         logger.info(f"File uploaded successfully: s3://{bucket}/{s3_key}")
                     else:
-                        raise StorageError(f"Failed to upload file: {filename}")
-                        
-                except Exception as e:
-                    logger.error(f"Failed to upload file {result.get('filename', 'unknown')}: {str(e)}")
-                    # Continue with other files
-                    upload_result = {
-                        **result,
-                        'upload_success': False,
-                        'upload_error': str(e)
-                    }
-                    upload_results.append(upload_result)
+                        logger.error(f"Failed to upload file {result['filename']}: {outcome['error']}")
+                        upload_results[index] = {
+                            **result,
+                            'upload_success': False,
+                            'upload_error': outcome['error']
+                        }
+            finally:
+                manifest.save()
             
             successful_uploads = sum(1 for r in upload_results if r.get('upload_success', False))
             logger.info(f"Upload completed: {successful_uploads}/{len(upload_results)} files successful")
             
+            # Let the retry decorator (and then redelivery) resume the missing chunks
+            if successful_uploads < len(upload_results):
+                raise StorageError(
+                    f"Failed to upload {len(upload_results) - successful_uploads} of "
+                    f"{len(upload_results)} files",
+                    details={'failed_files': [r['filename'] for r in upload_results 
+                                              if not r.get('upload_success', False)]}
+                )
+            
             return upload_results
             
         except Exception as e:
@@ -229,6 +575,17 @@ class AudioProcessingService:
             else:
                 raise StorageError(f"Upload process failed: {str(e)}")
     
+    def get_upload_manifest(self, bucket: str) -> UploadManifest:
+        """Get the job's upload manifest, loading a previous attempt's on first use."""
+        if self.upload_manifest is None:
+            # Stable across redeliveries when the job is fingerprinted
+            job_id = self.job_fingerprint or self.content_hash or self.session_id
+            self.upload_manifest = UploadManifest(
+                self.s3_ops, bucket, job_id,
+                prefix=os.environ.get('UPLOAD_MANIFEST_PREFIX', 'processing-manifests/uploads')
+            ).load()
+        return self.upload_manifest
+    
     def cleanup(self) -> None:
         """Clean up temporary files and resources with race condition protection."""
         with self._cleanup_lock:
@@ -241,11 +598,24 @@ class AudioProcessingService:
                 ErrorRecovery.cleanup_temp_files(self.temp_files)
                 self.temp_files.clear()
             
+            if self.workspace:
+                self.workspace.cleanup()
+            
+            if self.s3_ops:
+                self.s3_ops.close()
+            
             self._cleanup_done = True
             logger.debug("Cleanup completed successfully")
     
-    def process_request(self) -> Dict[str, Any]:
-        """Main processing workflow for a single request."""
+    def process_request(self, source_path: str = None, source_etag: str = None) -> Dict[str, Any]:
+        """
+        Main processing workflow for a single request.
+        
+        Args:
+            source_path: Optional already-downloaded (prefetched) source file; the
+                source is downloaded from S3 when not provided
+            source_etag: ETag the prefetched file was downloaded against
+        """
         start_time = time.time()
         
         try:
@@ -269,19 +639,88 @@ class AudioProcessingService:
             # Initialize service
             self.initialize()
             
-            # Download source file
-            local_path = self.download_source_file(bucket, source_key)
+            # Finish duplicates immediately with the previously produced results
+            completed_job = self.find_completed_job(bucket, source_key)
+            if completed_job:
+                results = completed_job.get('results', [])
+                logger.info(f"Duplicate job, returning results from session "
+                           f"{completed_job.get('session_id')}", extra={
+                    'session_id': self.session_id,
+                    'job_fingerprint': self.job_fingerprint
+                })
+                return {
+                    'statusCode': 200,
+                    'message': 'Duplicate job - returning previously produced results',
+                    'sessionId': self.session_id,
+                    'processingTime': round(time.time() - start_time, 3),
+                    'filesCreated': len(results),
+                    'filesUploaded': sum(1 for r in results if r.get('upload_success', False)),
+                    'results': results,
+                    'jobFingerprint': self.job_fingerprint,
+                    'duplicateOf': completed_job.get('session_id')
+                }
+            
+            # A prefetched copy is only used if it is the version that was fingerprinted
+            if source_path and source_etag:
+                if self.source_etag is None:
+                    self.source_etag = source_etag
+                elif self.source_etag != source_etag:
+                    logger.warning(f"Prefetched source is stale (ETag {source_etag}, "
+                                   f"now {self.source_etag}), downloading again",
+                                   extra={'session_id': self.session_id})
+                    source_path = None
+            
+            # Defer or reroute jobs this worker has no headroom for, before downloading
+            admission = self.check_admission(bucket, source_key, source_path)
+            if admission:
+                return {
+                    'statusCode': 202,
+                    'message': f"Job {admission['decision']}: {admission['reason']}",
+                    'sessionId': self.session_id,
+                    'processingTime': round(time.time() - start_time, 3),
+                    'admission': admission
+                }
+            
+            # Download source file unless it was prefetched
+            source_audio = None
+            if source_path:
+                self.validate_source_file(source_path)
+                local_path = source_path
+            elif os.environ.get('STREAM_DECODE_ENABLED', 'false').lower() == 'true':
+                source_audio, local_path = self.stream_source_audio(bucket, source_key)
+            else:
+                local_path = self.download_source_file(bucket, source_key)
             
-            # Process audio
-            processing_results = self.process_audio(local_path, user_id, original_filename)
+            # Reuse outputs for identical audio and configuration
+            base_filename = os.path.splitext(original_filename)[0]
+            upload_results = self.reuse_cached_results(local_path, bucket, user_id, base_filename)
             
-            # Upload processed files
-            upload_results = self.upload_processed_files(processing_results, bucket, user_id)
+            if upload_results is None:
+                # Process audio
+                processing_results = self.process_audio(
+                    local_path, user_id, original_filename, audio=source_audio
+                )
+                
+                # Upload processed files
+                upload_results = self.upload_processed_files(processing_results, bucket, user_id)
+                
+                if self.result_cache and all(r.get('upload_success', False) for r in upload_results):
+                    self.result_cache.store(user_id, self.content_hash, base_filename, upload_results)
             
             # Calculate metrics
             total_time = time.time() - start_time
             successful_files = sum(1 for r in upload_results if r.get('upload_success', False))
             
+            # Record completion so redeliveries of this job become no-ops
+            if self.idempotency_store and successful_files == len(upload_results):
+                self.idempotency_store.mark_completed(self.job_fingerprint, {
+                    'bucket': bucket,
+                    'key': source_key,
+                    'etag': self.source_etag,
+                    'user_id': user_id,
+                    'session_id': self.session_id
+                }, upload_results)
+            
             # Create success response
             response = {
                 'statusCode': 200,
@@ -290,7 +729,9 @@ class AudioProcessingService:
                 'processingTime': round(total_time, 3),
                 'filesCreated': len(upload_results),
                 'filesUploaded': successful_files,
-                'results': upload_results
+                'results': upload_results,
+                'jobFingerprint': self.job_fingerprint,
+                'cacheHit': any(r.get('cached', False) for r in upload_results)
             }
             
             logger.info(f"Processing request completed successfully", extra={
@@ -317,43 +758,132 @@ class AudioProcessingService:
             # Always clean up resources
             self.cleanup()
 
-def run_sqs_polling_loop():
+def handle_job_message(message: Dict[str, Any], router: MessageRouter, 
+                       source_path: str = None, source_etag: str = None) -> None:
+    """
+    Process a single SQS job message and route it according to the result.
+    
+    Args:
+        message: SQS message as returned by receive_message
+        router: MessageRouter used to delete, requeue or dead-letter the message
+        source_path: Optional prefetched source file for the job
+        source_etag: ETag the prefetched file was downloaded against
+    """
+    try:
+        logger.info(f"Processing message: {message['MessageId']}")
+        
+        # Parse and validate message body
+        body = parse_job_message(message)
+        
+        # Set environment variables from message
+        os.environ['S3_BUCKET'] = body['bucket']
+        os.environ['S3_KEY'] = body['key']
+        os.environ['USER_ID'] = body['userId']
+        os.environ['SAMPLE_ID'] = body['recordId']
+        os.environ['PROCESSING_PARAMS'] = json.dumps(body.get('processingParams', {}))
+        os.environ['ADMISSION_DEFER_COUNT'] = str(get_defer_count(message))
+        
+        # Create and run processing service
+        service = AudioProcessingService()
+        result = service.process_request(source_path=source_path, source_etag=source_etag)
+        
+        # Delete on success, fast-fail non-recoverable errors
+        disposition = router.route(message, result)
+        if disposition == MessageDisposition.COMPLETED:
+            logger.info(f"Successfully processed and deleted message: {message['MessageId']}")
+        elif disposition in (MessageDisposition.DEFERRED, MessageDisposition.REROUTED):
+            logger.info(f"Message {message['MessageId']} {disposition.value} by admission control")
+        else:
+            logger.error(f"Failed to process message: {message['MessageId']} "
+                         f"({disposition.value})")
+            
+    except ValidationError as e:
+        # Malformed messages will never succeed - dead-letter them right away
+        log_error_metrics(e, logger, operation='parse_message')
+        router.route(message, create_error_response(e))
+        
+    except Exception as e:
+        logger.error(f"Error processing message: {str(e)}", exc_info=True)
+        # Message will be retried after visibility timeout
+
+def run_sqs_polling_loop(sqs=None, shutdown_flag: Optional[threading.Event] = None):
     """
     Run continuous SQS polling loop for service mode.
+    
+    Args:
+        sqs: Optional queue client; created from QUEUE_BACKEND when not provided
+        shutdown_flag: Optional event that stops the loop; SIGTERM/SIGINT
+            handlers are installed when not provided
     """
     global logger
     
-    import boto3
     import signal
     import sys
     
-    # Set up signal handlers for graceful shutdown
-    shutdown_flag = threading.Event()
-    
-    def signal_handler(signum, frame):
-        logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-        shutdown_flag.set()
-    
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
+    if shutdown_flag is None:
+        # Set up signal handlers for graceful shutdown
+        shutdown_flag = threading.Event()
+        
+        def signal_handler(signum, frame):
+            logger.info(f"Received signal {signum}, initiating graceful shutdown...")
+            shutdown_flag.set()
+        
+        signal.signal(signal.SIGTERM, signal_handler)
+        signal.signal(signal.SIGINT, signal_handler)
     
-    # Initialize SQS client
-    sqs = boto3.client('sqs', region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-west-2'))
+    # Initialize SQS client (or the local queue backend, per QUEUE_BACKEND)
+    if sqs is None:
+        sqs = create_queue_backend(region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-west-2'))
     queue_url = os.environ.get('SQS_QUEUE_URL')
     
     if not queue_url:
         raise ConfigurationError("SQS_QUEUE_URL environment variable not set")
     
+    # Route finished messages: delete, requeue with backoff, or dead-letter
+    router = MessageRouter(
+        sqs, queue_url,
+        dead_letter_queue_url=os.environ.get('SQS_DLQ_URL'),
+        max_attempts=int(os.environ.get('SQS_MAX_ATTEMPTS', '3')),
+        reroute_queue_url=os.environ.get('ADMISSION_REROUTE_QUEUE_URL')
+    )
+    
+    # Prefetch the next job's source while the current one is processing
+    prefetcher = None
+    prefetch_depth = int(os.environ.get('PREFETCH_DEPTH', '1'))
+    if prefetch_depth > 0:
+        prefetcher = JobPrefetcher(
+            sqs, queue_url,
+            S3Operations(region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')),
+            max_depth=prefetch_depth,
+            disk_budget_mb=int(os.environ.get('PREFETCH_DISK_BUDGET_MB', '500')),
+            min_free_memory_mb=int(os.environ.get('PREFETCH_MIN_FREE_MEMORY_MB', '512')),
+            max_source_bytes=MAX_SOURCE_FILE_BYTES
+        )
+        prefetcher.start()
+    
     logger.info(f"Starting SQS polling loop on queue: {queue_url}")
     
     while not shutdown_flag.is_set():
         try:
+            if prefetcher:
+                job = prefetcher.get(timeout=20)
+                if job is None:
+                    continue
+                
+                try:
+                    handle_job_message(job.message, router, source_path=job.local_path,
+                                       source_etag=job.etag)
+                finally:
+                    prefetcher.release(job)
+                continue
+            
             # Receive messages from SQS with long polling
             response = sqs.receive_message(
                 QueueUrl=queue_url,
                 MaxNumberOfMessages=1,
                 WaitTimeSeconds=20,  # Long polling
                 VisibilityTimeout=900,  # 15 minutes
+                AttributeNames=['ApproximateReceiveCount'],
                 MessageAttributeNames=['All']
             )
             
@@ -362,45 +892,14 @@ def run_sqs_polling_loop():
                 continue
                 
             for message in messages:
-                try:
-                    # Parse message body
-                    body = json.loads(message['Body'])
-                    logger.info(f"Processing message: {message['MessageId']}")
-                    
-                    # Validate required fields
-                    required_fields = ['bucket', 'key', 'userId', 'recordId']
-                    missing_fields = [field for field in required_fields if field not in body]
-                    if missing_fields:
-                        raise ValueError(f"Missing required fields in SQS message: {missing_fields}")
-                    
-                    # Set environment variables from message
-                    os.environ['S3_BUCKET'] = body['bucket']
-                    os.environ['S3_KEY'] = body['key']
-                    os.environ['USER_ID'] = body['userId']
-                    os.environ['SAMPLE_ID'] = body['recordId']
-                    os.environ['PROCESSING_PARAMS'] = json.dumps(body.get('processingParams', {}))
-                    
-                    # Create and run processing service
-                    service = AudioProcessingService()
-                    result = service.process_request()
-                    
-                    # Delete message if processing succeeded
-                    if result.get('statusCode') == 200:
-                        sqs.delete_message(
-                            QueueUrl=queue_url,
-                            ReceiptHandle=message['ReceiptHandle']
-                        )
-                        logger.info(f"Successfully processed and deleted message: {message['MessageId']}")
-                    else:
-                        logger.error(f"Failed to process message: {message['MessageId']}, will retry")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing message: {str(e)}", exc_info=True)
-                    # Message will be retried after visibility timeout
+                handle_job_message(message, router)
                     
         except Exception as e:
             logger.error(f"Error in polling loop: {str(e)}", exc_info=True)
             time.sleep(5)  # Brief pause before retrying
+    
+    if prefetcher:
+        prefetcher.stop()
             
     logger.info("Shutdown complete")
 
@@ -427,6 +926,9 @@ def main() -> Dict[str, Any]:
         else:
             logger.info("Starting in TASK mode for single execution")
             
+            # There is no queue to defer to; admit constrained jobs right away
+            os.environ['ADMISSION_MAX_DEFERRALS'] = '0'
+            
             # Create and run processing service
             service = AudioProcessingService()
             result = service.process_request()
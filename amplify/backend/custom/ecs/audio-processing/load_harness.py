@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Load Harness for Little Bit Audio Processing Service
+Drives the service-mode polling loop end to end against the local storage
+and queue backends: synthetic recordings arrive at a configurable rate and
+size distribution, and sustained throughput, queue-to-done latency and peak
+memory are reported. Used to size Fargate tasks and compare worker models
+(prefetch depth, streaming decode, RAM workspaces) on a single machine.
+
+Example:
+    python load_harness.py --jobs 200 --rate 30 --durations lognormal:45,0.6 \\
+        --env PREFETCH_DEPTH=2 --env STREAM_DECODE_ENABLED=true
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import wave
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from queue_backends import LocalQueueBackend
+
+LOCAL_QUEUE_NAME = 'audio-jobs'
+DEFAULT_BUCKET = 'load-test-bucket'
+
+# Synthetic recordings: noise bursts separated by silences longer than the
+# default 750ms minSilenceDuration, so every job splits into one-shots
+BURST_SECONDS = (0.5, 4.0)
+GAP_SECONDS = (1.0, 2.0)
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a recording-duration distribution.
+
+    Args:
+        spec: 'fixed:S', 'uniform:MIN,MAX', 'lognormal:MEDIAN,SIGMA' or
+            'choice:S1,S2,...' (seconds)
+
+    Returns:
+        Function drawing a duration in seconds from a random generator
+    """
+    kind, _, args = spec.partition(':')
+    try:
+        values = [float(v) for v in args.split(',')] if args else []
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid distribution parameters: {spec}")
+
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == 'choice' and values:
+        return lambda rng: rng.choice(values)
+    raise argparse.ArgumentTypeError(f"Unsupported distribution: {spec}")
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+def synthesize_recording(path: str, seconds: float, rng: random.Random,
+                         sample_rate: int = 44100, channels: int = 2) -> float:
+    """
+    Write a unique 16-bit PCM WAV of noise bursts separated by silence.
+
+    Every recording has different content, so the result cache never
+    short-circuits processing.
+
+    Returns:
+        Actual duration in seconds
+    """
+    frame_width = 2 * channels
+    total_frames = max(int(seconds * sample_rate), sample_rate)
+    written = 0
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        while written < total_frames:
+            burst = min(int(rng.uniform(*BURST_SECONDS) * sample_rate), total_frames - written)
+            w.writeframes(os.urandom(burst * frame_width))
+            written += burst
+            gap = min(int(rng.uniform(*GAP_SECONDS) * sample_rate), total_frames - written)
+            w.writeframes(b'\0' * (gap * frame_width))
+            written += gap
+    return written / sample_rate
+
+class InstrumentedQueue(LocalQueueBackend):
+    """
+    Local queue that records when each job is finished.
+
+    A job is done when no message for its recordId remains on the job queue:
+    requeues, deferrals and reroutes send a new message before deleting the
+    old one, so only the final delete completes the job. Sends to the
+    dead-letter queue mark the job failed.
+    """
+
+    def __init__(self, queue_url: str, dead_letter_queue_url: str, clock: Callable[[], float] = time.monotonic,
+                 **kwargs):
+        super().__init__(clock=clock, **kwargs)
+        self.queue_url = queue_url
+        self.dead_letter_queue_url = dead_letter_queue_url
+        self.outstanding: Dict[str, int] = {}
+        self.finished: Dict[str, float] = {}
+        self.failed: Dict[str, float] = {}
+        self._receipts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.all_finished = threading.Event()
+        self.expected: Optional[int] = None
+
+    @staticmethod
+    def _record_id(body: str) -> Optional[str]:
+        try:
+            return json.loads(body).get('recordId')
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    def _check_all_finished(self) -> None:
+        if self.expected is not None and len(self.finished) >= self.expected:
+            self.all_finished.set()
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **kwargs) -> Dict[str, Any]:
+        record_id = self._record_id(MessageBody)
+        with self._lock:
+            if record_id and QueueUrl == self.queue_url:
+                self.outstanding[record_id] = self.outstanding.get(record_id, 0) + 1
+            elif record_id and QueueUrl == self.dead_letter_queue_url:
+                self.failed[record_id] = self.clock()
+        return super().send_message(QueueUrl=QueueUrl, MessageBody=MessageBody, **kwargs)
+
+    def receive_message(self, QueueUrl: str, **kwargs) -> Dict[str, Any]:
+        response = super().receive_message(QueueUrl=QueueUrl, **kwargs)
+        if QueueUrl == self.queue_url:
+            with self._lock:
+                for message in response.get('Messages', []):
+                    self._receipts[message['ReceiptHandle']] = self._record_id(message['Body'])
+        return response
+
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str, **kwargs) -> Dict[str, Any]:
+        response = super().delete_message(QueueUrl=QueueUrl, ReceiptHandle=ReceiptHandle, **kwargs)
+        if QueueUrl == self.queue_url:
+            with self._lock:
+                record_id = self._receipts.pop(ReceiptHandle, None)
+                if record_id in self.outstanding:
+                    self.outstanding[record_id] -= 1
+                    if self.outstanding[record_id] == 0:
+                        del self.outstanding[record_id]
+                        self.finished[record_id] = self.clock()
+                        self._check_all_finished()
+        return response
+
+class MemorySampler(threading.Thread):
+    """Samples process RSS to find the peak during the measured run."""
+
+    def __init__(self, interval: float = 0.25):
+        super().__init__(name='memory-sampler', daemon=True)
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def current_rss_bytes() -> int:
+        try:
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        return 0
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.peak_rss_bytes = max(self.peak_rss_bytes, self.current_rss_bytes())
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+class LoadGenerator(threading.Thread):
+    """Uploads synthetic recordings and enqueues their jobs with Poisson arrivals."""
+
+    def __init__(self, s3_ops, queue: InstrumentedQueue, bucket: str, jobs: int, rate_per_minute: float,
+                 duration: Callable[[random.Random], float], processing_params: Dict[str, Any],
+                 scratch_dir: str, users: int = 10, seed: int = 0):
+        super().__init__(name='load-generator', daemon=True)
+        self.s3_ops = s3_ops
+        self.queue = queue
+        self.bucket = bucket
+        self.jobs = jobs
+        self.rate_per_minute = rate_per_minute
+        self.duration = duration
+        self.processing_params = processing_params
+        self.scratch_dir = scratch_dir
+        self.users = users
+        self.rng = random.Random(seed)
+        self.enqueued: Dict[str, float] = {}
+        self.audio_seconds: Dict[str, float] = {}
+        self.source_bytes = 0
+        self.error: Optional[Exception] = None
+
+    def run(self) -> None:
+        next_arrival = time.monotonic()
+        try:
+            for index in range(self.jobs):
+                # Exponential inter-arrival times give a Poisson arrival process
+                if self.rate_per_minute > 0:
+                    next_arrival += self.rng.expovariate(self.rate_per_minute / 60.0)
+                    delay = next_arrival - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                self._enqueue(index)
+        except Exception as e:
+            self.error = e
+
+    def _enqueue(self, index: int) -> None:
+        record_id = f'load-{index:06d}'
+        user_id = f'load-user-{index % self.users}'
+        key = f'public/unprocessed/{user_id}/{record_id}.wav'
+
+        local_path = os.path.join(self.scratch_dir, f'{record_id}.wav')
+        self.audio_seconds[record_id] = synthesize_recording(local_path, self.duration(self.rng), self.rng)
+        self.source_bytes += os.path.getsize(local_path)
+        try:
+            self.s3_ops.upload_file(local_path, self.bucket, key)
+        finally:
+            os.remove(local_path)
+
+        self.enqueued[record_id] = self.queue.clock()
+        self.queue.send_message(
+            QueueUrl=self.queue.queue_url,
+            MessageBody=json.dumps({
+                'bucket': self.bucket,
+                'key': key,
+                'userId': user_id,
+                'recordId': record_id,
+                'processingParams': self.processing_params
+            })
+        )
+
+def summarize(generator: LoadGenerator, queue: InstrumentedQueue, peak_rss_bytes: int,
+              settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute throughput, latency and memory figures for a run."""
+    finished = {r: t for r, t in queue.finished.items() if r in generator.enqueued and r not in queue.failed}
+    latencies = [finished[r] - generator.enqueued[r] for r in finished]
+    start = min(generator.enqueued.values()) if generator.enqueued else 0.0
+    end = max(finished.values()) if finished else start
+    wall_seconds = max(end - start, 1e-9)
+    audio_seconds = sum(generator.audio_seconds[r] for r in finished)
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        'settings': settings,
+        'jobs_enqueued': len(generator.enqueued),
+        'jobs_completed': len(finished),
+        'jobs_failed': len(queue.failed),
+        'jobs_unfinished': len(generator.enqueued) - len(finished) - len(queue.failed),
+        'wall_seconds': rounded(wall_seconds),
+        'jobs_per_minute': rounded(len(finished) / wall_seconds * 60),
+        'audio_hours_per_hour': rounded(audio_seconds / wall_seconds),
+        'source_megabytes': rounded(generator.source_bytes / (1024 * 1024)),
+        'latency_seconds': {
+            'p50': rounded(percentile(latencies, 50)),
+            'p95': rounded(percentile(latencies, 95)),
+            'p99': rounded(percentile(latencies, 99)),
+            'max': rounded(max(latencies) if latencies else None)
+        },
+        'peak_rss_megabytes': rounded(peak_rss_bytes / (1024 * 1024)),
+        # Includes startup and the generator's buffers
+        'max_rss_megabytes': rounded(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=50, help='Number of recordings to enqueue')
+    parser.add_argument('--rate', type=float, default=30.0,
+                        help='Mean arrival rate in jobs/minute (0 enqueues everything at once)')
+    parser.add_argument('--durations', type=parse_distribution, default='lognormal:30,0.5',
+                        help="Recording length distribution in seconds: fixed:S, uniform:MIN,MAX, "
+                             "lognormal:MEDIAN,SIGMA or choice:S1,S2,...")
+    parser.add_argument('--processing-params', type=json.loads, default={},
+                        help='processingParams JSON sent with every job')
+    parser.add_argument('--users', type=int, default=10, help='Distinct user IDs to spread jobs over')
+    parser.add_argument('--timeout', type=float, default=3600.0,
+                        help='Seconds to wait for all jobs after the last arrival')
+    parser.add_argument('--work-dir', help='Directory for the local store and workspaces (default: temporary)')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='Service environment setting for this run (repeatable), e.g. PREFETCH_DEPTH=0')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for arrivals and content')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the load test and print the report."""
+    args = parse_args(argv)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='audio_load_')
+    created_work_dir = args.work_dir is None
+    queue_url = f'local://{LOCAL_QUEUE_NAME}'
+
+    overrides = dict(setting.split('=', 1) for setting in args.env)
+    os.environ.update({
+        'STORAGE_BACKEND': 'local',
+        'STORAGE_LOCAL_ROOT': os.path.join(work_dir, 'store'),
+        'QUEUE_BACKEND': 'local',
+        'SQS_QUEUE_URL': queue_url,
+        'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'),
+        'WORKSPACE_ROOT': os.path.join(work_dir, 'workspaces'),
+        'PREFETCH_DISK_BUDGET_MB': os.environ.get('PREFETCH_DISK_BUDGET_MB', '2000'),
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING'),
+        **overrides
+    })
+    os.makedirs(os.environ['WORKSPACE_ROOT'], exist_ok=True)
+    scratch_dir = os.path.join(work_dir, 'uploads')
+    os.makedirs(scratch_dir, exist_ok=True)
+
+    # Imported after the environment is configured
+    import audio_processor
+    from s3_operations import S3Operations
+    from utils.logging_config import setup_logging
+
+    audio_processor.logger = setup_logging(os.environ['LOG_LEVEL'], 'audio-processing')
+
+    queue = InstrumentedQueue(queue_url, f'{queue_url}-dlq')
+    generator = LoadGenerator(
+        S3Operations(), queue, DEFAULT_BUCKET, args.jobs, args.rate, args.durations,
+        args.processing_params, scratch_dir, users=args.users, seed=args.seed
+    )
+    queue.expected = args.jobs
+
+    shutdown_flag = threading.Event()
+    worker = threading.Thread(target=audio_processor.run_sqs_polling_loop,
+                              kwargs={'sqs': queue, 'shutdown_flag': shutdown_flag},
+                              name='service-worker', daemon=True)
+    sampler = MemorySampler()
+
+    sampler.start()
+    worker.start()
+    generator.start()
+    try:
+        generator.join()
+        if generator.error:
+            raise generator.error
+        # Failed jobs never finish; stop waiting once every job is accounted for
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline and not queue.all_finished.is_set():
+            if len(queue.finished) + len(queue.failed) >= args.jobs:
+                break
+            queue.all_finished.wait(1.0)
+    finally:
+        shutdown_flag.set()
+        sampler.stop()
+
+    report = summarize(generator, queue, sampler.peak_rss_bytes, {
+        'jobs': args.jobs,
+        'rate_per_minute': args.rate,
+        'env': overrides
+    })
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    # The worker may be in a long poll; it is a daemon thread and exits with the process
+    worker.join(timeout=25)
+    if created_work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Queue Backends for Little Bit Audio Processing Service
+Job queue used by the polling loop, prefetcher and message router: Amazon
+SQS, or an in-process queue with SQS visibility semantics for running the
+service locally (load and soak tests) without AWS.
+"""
+
+import os
+import json
+import heapq
+import uuid
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# Backends selectable through QUEUE_BACKEND
+SQS_BACKEND = 'sqs'
+LOCAL_BACKEND = 'local'
+
+LOCAL_QUEUE_URL_PREFIX = 'local://'
+LOCAL_QUEUE_ARN_PREFIX = 'arn:local:sqs:'
+
+# SQS defaults and limits
+DEFAULT_VISIBILITY_TIMEOUT = 30
+MAX_VISIBILITY_TIMEOUT = 12 * 60 * 60
+MAX_RECEIVE_BATCH = 10
+
+class QueueBackend(ABC):
+    """
+    Job queue operations the service depends on.
+
+    Methods take the same keyword arguments and return the same response
+    shapes as the boto3 SQS client, and report failures as botocore
+    ClientError with SQS error codes, so MessageRouter and JobPrefetcher
+    work unchanged on every backend. The SQS backend is the boto3 client
+    itself.
+    """
+
+    @abstractmethod
+    def send_message(self, QueueUrl: str, MessageBody: str, DelaySeconds: int = 0,
+                     MessageAttributes: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        """Enqueue a message, optionally delayed."""
+
+    @abstractmethod
+    def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int = 1, WaitTimeSeconds: int = 0,
+                        VisibilityTimeout: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+        """Receive a batch of visible messages, hiding them for the visibility timeout."""
+
+    @abstractmethod
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str, **kwargs) -> Dict[str, Any]:
+        """Delete a received message."""
+
+    @abstractmethod
+    def change_message_visibility(self, QueueUrl: str, ReceiptHandle: str,
+                                  VisibilityTimeout: int, **kwargs) -> Dict[str, Any]:
+        """Extend (or end) the visibility timeout of a received message."""
+
+    @abstractmethod
+    def get_queue_attributes(self, QueueUrl: str, AttributeNames: Optional[List[str]] = None,
+                             **kwargs) -> Dict[str, Any]:
+        """Read queue attributes, including the dead-letter RedrivePolicy."""
+
+    @abstractmethod
+    def get_queue_url(self, QueueName: str, **kwargs) -> Dict[str, Any]:
+        """Resolve a queue name to its URL."""
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    """Build a ClientError shaped like an SQS service error."""
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+class _LocalMessage:
+    """A message stored in a local queue."""
+
+    def __init__(self, body: str, attributes: Dict[str, Any], visible_at: float):
+        self.message_id = str(uuid.uuid4())
+        self.body = body
+        self.attributes = attributes
+        self.sent_timestamp = int(time.time() * 1000)
+        self.visible_at = visible_at
+        self.receive_count = 0
+        self.receipt_handle = None
+
+    def to_response(self, attribute_names: List[str], message_attribute_names: List[str]) -> Dict[str, Any]:
+        """Render the message as receive_message returns it."""
+        message = {
+            'MessageId': self.message_id,
+            'ReceiptHandle': self.receipt_handle,
+            'MD5OfBody': hashlib.md5(self.body.encode('utf-8')).hexdigest(),
+            'Body': self.body
+        }
+        if attribute_names:
+            attributes = {
+                'ApproximateReceiveCount': str(self.receive_count),
+                'SentTimestamp': str(self.sent_timestamp)
+            }
+            if 'All' not in attribute_names:
+                attributes = {k: v for k, v in attributes.items() if k in attribute_names}
+            message['Attributes'] = attributes
+        if message_attribute_names and self.attributes:
+            message['MessageAttributes'] = {
+                name: dict(value) for name, value in self.attributes.items()
+                if 'All' in message_attribute_names or '.*' in message_attribute_names
+                or name in message_attribute_names
+            }
+        return message
+
+class _LocalQueue:
+    """One local queue: messages ordered by when they become visible."""
+
+    def __init__(self, name: str, visibility_timeout: int, dead_letter_queue: Optional[str],
+                 max_receive_count: int):
+        self.name = name
+        self.visibility_timeout = visibility_timeout
+        self.dead_letter_queue = dead_letter_queue
+        self.max_receive_count = max_receive_count
+        self.messages: Dict[str, _LocalMessage] = {}
+        self.receipts: Dict[str, str] = {}
+        # (visible_at, sequence, message_id); stale entries are skipped on pop
+        self.schedule: List[tuple] = []
+        self.sequence = 0
+
+    def schedule_message(self, message: _LocalMessage) -> None:
+        self.sequence += 1
+        heapq.heappush(self.schedule, (message.visible_at, self.sequence, message.message_id))
+
+    def next_visible(self, now: float) -> Optional[_LocalMessage]:
+        """Pop the next message that is visible now."""
+        while self.schedule and self.schedule[0][0] <= now:
+            visible_at, _, message_id = heapq.heappop(self.schedule)
+            message = self.messages.get(message_id)
+            if message is not None and message.visible_at == visible_at:
+                return message
+        return None
+
+    def next_visible_at(self) -> Optional[float]:
+        """When the earliest scheduled message becomes visible."""
+        return self.schedule[0][0] if self.schedule else None
+
+class LocalQueueBackend(QueueBackend):
+    """
+    In-process job queues with SQS semantics.
+
+    Received messages stay hidden for their visibility timeout and reappear
+    with a new receipt handle unless deleted or extended. Messages received
+    more than max_receive_count times move to the queue's dead-letter queue,
+    as an SQS redrive policy would do. Queues are addressed as local://<name>
+    and created on first use; receive long-polls up to WaitTimeSeconds.
+    """
+
+    def __init__(self, visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT, max_receive_count: int = 3,
+                 dead_letter_suffix: Optional[str] = '-dlq', clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the backend.
+
+        Args:
+            visibility_timeout: Default visibility timeout for new queues
+            max_receive_count: Receives before a message moves to the dead-letter queue
+            dead_letter_suffix: New queues dead-letter to <name><suffix>; None disables
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.visibility_timeout = visibility_timeout
+        self.max_receive_count = max_receive_count
+        self.dead_letter_suffix = dead_letter_suffix
+        self.clock = clock
+        self._queues: Dict[str, _LocalQueue] = {}
+        self._condition = threading.Condition()
+
+    def create_queue(self, QueueName: str, Attributes: Optional[Dict[str, str]] = None,
+                     **kwargs) -> Dict[str, Any]:
+        """Create a queue (or return an existing one) with optional VisibilityTimeout and RedrivePolicy."""
+        attributes = Attributes or {}
+        with self._condition:
+            if QueueName not in self._queues:
+                dead_letter_queue = None
+                max_receive_count = self.max_receive_count
+                if 'RedrivePolicy' in attributes:
+                    policy = json.loads(attributes['RedrivePolicy'])
+                    dead_letter_queue = policy['deadLetterTargetArn'].split(':')[-1]
+                    max_receive_count = int(policy.get('maxReceiveCount', max_receive_count))
+                elif self.dead_letter_suffix and not QueueName.endswith(self.dead_letter_suffix):
+                    dead_letter_queue = QueueName + self.dead_letter_suffix
+
+                self._queues[QueueName] = _LocalQueue(
+                    QueueName,
+                    int(attributes.get('VisibilityTimeout', self.visibility_timeout)),
+                    dead_letter_queue, max_receive_count
+                )
+        return {'QueueUrl': LOCAL_QUEUE_URL_PREFIX + QueueName}
+
+    def _queue(self, queue_url: str, operation: str) -> _LocalQueue:
+        """Resolve (creating on first use) the queue for a URL. Caller holds the lock."""
+        if not queue_url or not queue_url.startswith(LOCAL_QUEUE_URL_PREFIX):
+            raise _client_error('AWS.SimpleQueueService.NonExistentQueue',
+                                f"Not a local queue URL: {queue_url}", operation)
+        name = queue_url[len(LOCAL_QUEUE_URL_PREFIX):]
+        if name not in self._queues:
+            self.create_queue(name)
+        return self._queues[name]
+
+    def send_message(self, QueueUrl: str, MessageBody: str, DelaySeconds: int = 0,
+                     MessageAttributes: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        with self._condition:
+            queue = self._queue(QueueUrl, 'SendMessage')
+            message = _LocalMessage(MessageBody, dict(MessageAttributes or {}), self.clock() + DelaySeconds)
+            queue.messages[message.message_id] = message
+            queue.schedule_message(message)
+            self._condition.notify_all()
+        return {'MessageId': message.message_id,
+                'MD5OfMessageBody': hashlib.md5(MessageBody.encode('utf-8')).hexdigest()}
+
+    def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int = 1, WaitTimeSeconds: int = 0,
+                        VisibilityTimeout: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+        if not 1 <= MaxNumberOfMessages <= MAX_RECEIVE_BATCH:
+            raise _client_error('InvalidParameterValue',
+                                f"MaxNumberOfMessages must be 1-{MAX_RECEIVE_BATCH}", 'ReceiveMessage')
+        attribute_names = kwargs.get('AttributeNames') or []
+        message_attribute_names = kwargs.get('MessageAttributeNames') or []
+        deadline = self.clock() + WaitTimeSeconds
+
+        with self._condition:
+            queue = self._queue(QueueUrl, 'ReceiveMessage')
+            timeout = queue.visibility_timeout if VisibilityTimeout is None else VisibilityTimeout
+            received = []
+
+            while True:
+                now = self.clock()
+                while len(received) < MaxNumberOfMessages:
+                    message = queue.next_visible(now)
+                    if message is None:
+                        break
+                    if any(m['MessageId'] == message.message_id for m in received):
+                        # Received with a zero visibility timeout; leave it for the next call
+                        queue.schedule_message(message)
+                        break
+                    if self._redrive(queue, message):
+                        continue
+
+                    message.receive_count += 1
+                    if message.receipt_handle:
+                        queue.receipts.pop(message.receipt_handle, None)
+                    message.receipt_handle = f'{message.message_id}:{uuid.uuid4().hex}'
+                    queue.receipts[message.receipt_handle] = message.message_id
+                    message.visible_at = now + timeout
+                    queue.schedule_message(message)
+                    received.append(message.to_response(attribute_names, message_attribute_names))
+
+                remaining = deadline - now
+                if received or remaining <= 0:
+                    break
+                # Sleep until a send, or until a hidden/delayed message becomes visible
+                next_visible = queue.next_visible_at()
+                wait = remaining if next_visible is None else min(remaining, max(next_visible - now, 0.001))
+                self._condition.wait(wait)
+
+        return {'Messages': received} if received else {}
+
+    def _redrive(self, queue: _LocalQueue, message: _LocalMessage) -> bool:
+        """Move a message past its receive limit to the dead-letter queue. Caller holds the lock."""
+        if not queue.dead_letter_queue or message.receive_count < queue.max_receive_count:
+            return False
+
+        self._remove(queue, message)
+        target = self._queue(LOCAL_QUEUE_URL_PREFIX + queue.dead_letter_queue, 'ReceiveMessage')
+        message.visible_at = self.clock()
+        message.receipt_handle = None
+        target.messages[message.message_id] = message
+        target.schedule_message(message)
+        logger.info(f"Moved message {message.message_id} from {queue.name} to {target.name} "
+                    f"after {message.receive_count} receives")
+        return True
+
+    @staticmethod
+    def _remove(queue: _LocalQueue, message: _LocalMessage) -> None:
+        queue.messages.pop(message.message_id, None)
+        if message.receipt_handle:
+            queue.receipts.pop(message.receipt_handle, None)
+
+    def _received_message(self, queue: _LocalQueue, receipt_handle: str, operation: str) -> _LocalMessage:
+        """Resolve a receipt handle to the message it was issued for. Caller holds the lock."""
+        message_id = queue.receipts.get(receipt_handle)
+        message = queue.messages.get(message_id) if message_id else None
+        if message is None:
+            raise _client_error('ReceiptHandleIsInvalid',
+                                f"The receipt handle is not valid: {receipt_handle}", operation)
+        return message
+
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str, **kwargs) -> Dict[str, Any]:
+        with self._condition:
+            queue = self._queue(QueueUrl, 'DeleteMessage')
+            self._remove(queue, self._received_message(queue, ReceiptHandle, 'DeleteMessage'))
+        return {}
+
+    def change_message_visibility(self, QueueUrl: str, ReceiptHandle: str,
+                                  VisibilityTimeout: int, **kwargs) -> Dict[str, Any]:
+        if not 0 <= VisibilityTimeout <= MAX_VISIBILITY_TIMEOUT:
+            raise _client_error('InvalidParameterValue', f"VisibilityTimeout out of range: {VisibilityTimeout}",
+                                'ChangeMessageVisibility')
+        with self._condition:
+            queue = self._queue(QueueUrl, 'ChangeMessageVisibility')
+            message = self._received_message(queue, ReceiptHandle, 'ChangeMessageVisibility')
+            now = self.clock()
+            if message.visible_at <= now:
+                raise _client_error('MessageNotInflight', "The message is not in flight",
+                                    'ChangeMessageVisibility')
+            message.visible_at = now + VisibilityTimeout
+            queue.schedule_message(message)
+            self._condition.notify_all()
+        return {}
+
+    def get_queue_attributes(self, QueueUrl: str, AttributeNames: Optional[List[str]] = None,
+                             **kwargs) -> Dict[str, Any]:
+        with self._condition:
+            queue = self._queue(QueueUrl, 'GetQueueAttributes')
+            now = self.clock()
+            visible = sum(1 for m in queue.messages.values() if m.visible_at <= now)
+            in_flight = sum(1 for m in queue.messages.values() if m.visible_at > now and m.receive_count)
+            attributes = {
+                'ApproximateNumberOfMessages': str(visible),
+                'ApproximateNumberOfMessagesNotVisible': str(in_flight),
+                'ApproximateNumberOfMessagesDelayed': str(len(queue.messages) - visible - in_flight),
+                'VisibilityTimeout': str(queue.visibility_timeout)
+            }
+            if queue.dead_letter_queue:
+                attributes['RedrivePolicy'] = json.dumps({
+                    'deadLetterTargetArn': LOCAL_QUEUE_ARN_PREFIX + queue.dead_letter_queue,
+                    'maxReceiveCount': queue.max_receive_count
+                })
+
+        names = AttributeNames or ['All']
+        if 'All' not in names:
+            attributes = {k: v for k, v in attributes.items() if k in names}
+        return {'Attributes': attributes}
+
+    def get_queue_url(self, QueueName: str, **kwargs) -> Dict[str, Any]:
+        return {'QueueUrl': LOCAL_QUEUE_URL_PREFIX + QueueName}
+
+# Local queues are shared by every producer and consumer in the process
+_local_backend = None
+_local_backend_lock = threading.Lock()
+
+def create_queue_backend(backend: Optional[str] = None, region_name: Optional[str] = None):
+    """
+    Create the queue backend selected by configuration.
+
+    Args:
+        backend: 'sqs' or 'local' (defaults to QUEUE_BACKEND, then 'sqs')
+        region_name: AWS region for the SQS backend
+
+    Returns:
+        A boto3 SQS client, or the process-wide LocalQueueBackend (configured
+        from LOCAL_QUEUE_VISIBILITY_TIMEOUT and LOCAL_QUEUE_MAX_RECEIVE_COUNT)
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    global _local_backend
+    backend = (backend or os.environ.get('QUEUE_BACKEND', SQS_BACKEND)).lower()
+
+    if backend == SQS_BACKEND:
+        return boto3.client('sqs', region_name=region_name)
+
+    if backend == LOCAL_BACKEND:
+        with _local_backend_lock:
+            if _local_backend is None:
+                _local_backend = LocalQueueBackend(
+                    visibility_timeout=int(os.environ.get('LOCAL_QUEUE_VISIBILITY_TIMEOUT',
+                                                          DEFAULT_VISIBILITY_TIMEOUT)),
+                    max_receive_count=int(os.environ.get('LOCAL_QUEUE_MAX_RECEIVE_COUNT', '3'))
+                )
+                logger.info("Using in-process local queue backend")
+            return _local_backend
+
+    raise ValueError(f"Unknown queue backend: {backend}")
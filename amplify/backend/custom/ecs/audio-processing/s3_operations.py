@@ -2,33 +2,105 @@
 """
 S3 Operations Module for Little Bit Audio Processing Service
 Handles secure S3 download/upload operations with retry logic and error handling.
+The object store itself is pluggable (see storage_backends).
 """
 
 import os
 import time
+import base64
+import hashlib
 import logging
 import random
-import boto3
+import threading
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
 from botocore.exceptions import ClientError, NoCredentialsError
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+
+from storage_backends import StorageBackend, create_storage_backend
+from utils.upload_manifest import compute_file_checksum
 
 logger = logging.getLogger(__name__)
 
+# Default transfer tuning, overridable through the environment
+DEFAULT_MULTIPART_THRESHOLD_MB = 8
+DEFAULT_MULTIPART_CHUNKSIZE_MB = 8
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_RANGED_DOWNLOAD_THRESHOLD_MB = 16
+
+# Chunk size used when streaming GET bodies to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 class S3OperationError(Exception):
     """Custom exception for S3 operation failures"""
     pass
 
+class S3ObjectTooLargeError(S3OperationError):
+    """Raised when an object's Content-Length exceeds the caller's size cap"""
+    pass
+
 class S3Operations:
     """
     Handles S3 operations for audio processing with robust error handling and retry logic.
     """
     
-    def __init__(self, region_name: Optional[str] = None):
-        """Initialize S3 client with optional region configuration."""
+    def __init__(self, region_name: Optional[str] = None, verify_uploads: bool = False,
+                 multipart_threshold_mb: Optional[int] = None, multipart_chunksize_mb: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, max_pool_connections: Optional[int] = None,
+                 ranged_download_threshold_mb: Optional[int] = None, storage_backend: Optional[str] = None):
+        """
+        Initialize S3 client with optional region and transfer configuration.
+        
+        One client, connection pool and transfer manager are shared by every
+        transfer made through this instance, including batch transfers.
+        
+        Args:
+            region_name: AWS region name
+            verify_uploads: Confirm every upload with an extra head_object request
+            multipart_threshold_mb: Files above this size use multipart upload
+            multipart_chunksize_mb: Multipart part size
+            max_concurrency: Maximum concurrent transfers (and parts per multipart upload)
+            max_pool_connections: HTTP connection pool size for the S3 client
+            ranged_download_threshold_mb: Objects above this size are downloaded
+                as parallel byte ranges of multipart_chunksize
+            storage_backend: 's3' or 'local' (defaults to STORAGE_BACKEND); the
+                local backend stores objects under STORAGE_LOCAL_ROOT
+        """
         try:
+            self.verify_uploads = verify_uploads
             self.region_name = region_name or os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
-            self.s3_client = boto3.client('s3', region_name=self.region_name)
-            logger.info(f"S3 client initialized for region: {self.region_name}")
+            
+            self.multipart_threshold = int(multipart_threshold_mb or os.environ.get(
+                'S3_MULTIPART_THRESHOLD_MB', DEFAULT_MULTIPART_THRESHOLD_MB)) * 1024 * 1024
+            self.multipart_chunksize = int(multipart_chunksize_mb or os.environ.get(
+                'S3_MULTIPART_CHUNKSIZE_MB', DEFAULT_MULTIPART_CHUNKSIZE_MB)) * 1024 * 1024
+            self.max_concurrency = int(max_concurrency or os.environ.get(
+                'S3_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+            # Batch transfers and multipart parts draw from the same pool
+            self.max_pool_connections = int(max_pool_connections or os.environ.get(
+                'S3_MAX_POOL_CONNECTIONS', 2 * self.max_concurrency))
+            self.ranged_download_threshold = int(ranged_download_threshold_mb or os.environ.get(
+                'S3_RANGED_DOWNLOAD_THRESHOLD_MB', DEFAULT_RANGED_DOWNLOAD_THRESHOLD_MB)) * 1024 * 1024
+            
+            self.transfer_config = TransferConfig(
+                multipart_threshold=self.multipart_threshold,
+                multipart_chunksize=self.multipart_chunksize,
+                max_concurrency=self.max_concurrency,
+                use_threads=True
+            )
+            self._transfer_manager = None
+            self._transfer_lock = threading.Lock()
+            
+            self.s3_client = create_storage_backend(
+                storage_backend, region_name=self.region_name,
+                max_pool_connections=self.max_pool_connections
+            )
+            # Backends that move whole files themselves bypass multipart and ranged transfers
+            self.file_transfers = (isinstance(self.s3_client, StorageBackend) and
+                                   self.s3_client.supports_file_transfers)
+            logger.info(f"S3 client initialized for region: {self.region_name} "
+                        f"(concurrency {self.max_concurrency}, pool {self.max_pool_connections}"
+                        f"{', local storage' if self.file_transfers else ''})")
         except NoCredentialsError as e:
             logger.error("AWS credentials not found")
             raise S3OperationError("AWS credentials configuration error") from e
@@ -36,38 +108,50 @@ class S3Operations:
             logger.error(f"Failed to initialize S3 client: {str(e)}")
             raise S3OperationError("S3 client initialization failed") from e
     
-    def download_file(self, bucket: str, key: str, local_path: str, max_retries: int = 3) -> bool:
+    @staticmethod
+    def _sanitize_metadata(metadata: Dict[str, str]) -> Dict[str, str]:
+        """Sanitize metadata keys and values with strict validation."""
+        sanitized_metadata = {}
+        for k, v in metadata.items():
+            if isinstance(k, str) and isinstance(v, str) and len(k) <= 100 and len(v) <= 1000:
+                # Strict sanitization for metadata keys (alphanumeric, hyphens, underscores only)
+                clean_key = ''.join(c for c in k if c.isalnum() or c in '-_').lower()
+                # Strict sanitization for metadata values (remove control characters and special chars)
+                clean_value = ''.join(c for c in v if c.isprintable() and c not in '<>"&\\').strip()[:1000]
+                if clean_key and clean_value and len(clean_key) <= 50:
+                    sanitized_metadata[clean_key] = clean_value
+        return sanitized_metadata
+    
+    def download_file(self, bucket: str, key: str, local_path: str, max_retries: int = 3,
+                      if_match: Optional[str] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
         """
         Download file from S3 with exponential backoff retry logic.
         
+        The first GET asks for the first ranged_download_threshold bytes, which
+        is the whole object for typical sources. Its Content-Range gives the
+        object size and ETag, and the size cap is enforced before any of the
+        body is read. Larger objects are completed with parallel ranged GETs
+        into a preallocated file, each pinned to the same ETag.
+        
         Args:
             bucket: S3 bucket name
             key: S3 object key
             local_path: Local file path for download
             max_retries: Maximum number of retry attempts
+            if_match: Only download if the object still has this ETag
+            max_bytes: Reject objects larger than this many bytes
             
         Returns:
-            bool: True if download successful, False otherwise
+            Dict with the downloaded object's content_length and etag
             
         Raises:
+            S3ObjectTooLargeError: If the object exceeds max_bytes
             S3OperationError: If download fails after all retries
         """
         if not bucket or not key or not local_path:
             raise S3OperationError("Missing required parameters for S3 download")
         
-        # Validate and sanitize the S3 key to prevent path traversal
-        normalized_key = os.path.normpath(key).replace('\\', '/')
-        if (
-            '..' in normalized_key or 
-            normalized_key.startswith('/') or 
-            normalized_key.startswith('../') or
-            '/..' in normalized_key or
-            '%2e%2e' in key.lower() or
-            '%2f' in key.lower() or
-            key != normalized_key or
-            len(key) > 1024  # Reasonable key length limit
-        ):
-            raise S3OperationError(f"Invalid S3 key: path traversal or invalid characters detected: {key[:100]}...")
+        self._validate_key(key)
         
         logger.info(f"Starting download: s3://{bucket}/{key} -> {local_path}")
         
@@ -76,29 +160,14 @@ class S3Operations:
         
         for attempt in range(max_retries + 1):
             try:
-                # Check if file exists in S3 first
-                self.s3_client.head_object(Bucket=bucket, Key=key)
+                info = self._download_to_path(bucket, key, local_path, if_match, max_bytes)
+                logger.info(f"Successfully downloaded file: {local_path} ({info['content_length']} bytes"
+                            f"{', ' + str(info['ranges']) + ' ranges' if info['ranges'] > 1 else ''})")
+                return info
                 
-                # Download the file
-                self.s3_client.download_file(bucket, key, local_path)
-                
-                # Verify the download by checking file size
-                if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
-                    logger.info(f"Successfully downloaded file: {local_path} ({os.path.getsize(local_path)} bytes)")
-                    return True
-                else:
-                    raise S3OperationError("Downloaded file is empty or missing")
-                    
-            except ClientError as e:
-                error_code = e.response['Error']['Code']
-                if error_code == 'NoSuchKey':
-                    raise S3OperationError(f"S3 object not found: s3://{bucket}/{key}")
-                elif error_code == 'NoSuchBucket':
-                    raise S3OperationError(f"S3 bucket not found: {bucket}")
-                elif error_code == 'AccessDenied':
-                    raise S3OperationError(f"Access denied to S3 object: s3://{bucket}/{key}")
-                else:
-                    logger.warning(f"Download attempt {attempt + 1} failed: {str(e)}")
+            except S3OperationError:
+                # Missing objects, access errors, ETag and size rejections are not retried
+                raise
                     
             except Exception as e:
                 logger.warning(f"Download attempt {attempt + 1} failed: {str(e)}")
@@ -114,32 +183,74 @@ class S3Operations:
         
         raise S3OperationError(f"Failed to download after {max_retries + 1} attempts")
     
-    def upload_file(self, local_path: str, bucket: str, key: str, metadata: Optional[Dict[str, str]] = None) -> bool:
+    def open_object_stream(self, bucket: str, key: str, if_match: Optional[str] = None,
+                           max_bytes: Optional[int] = None) -> Dict[str, Any]:
         """
-        Upload file to S3 with metadata and validation.
+        Open a single GET for consumers that process the body as it arrives.
         
         Args:
-            local_path: Local file path to upload
             bucket: S3 bucket name
             key: S3 object key
-            metadata: Optional metadata dictionary
+            if_match: Only open the object if it still has this ETag
+            max_bytes: Reject objects larger than this many bytes
             
         Returns:
-            bool: True if upload successful, False otherwise
+            Dict with the streaming 'body', 'content_length' and 'etag'
             
         Raises:
-            S3OperationError: If upload fails
+            S3ObjectTooLargeError: If the object exceeds max_bytes
+            S3OperationError: If the object cannot be opened
         """
-        if not local_path or not bucket or not key:
-            raise S3OperationError("Missing required parameters for S3 upload")
+        if not bucket or not key:
+            raise S3OperationError("Missing required parameters for S3 download")
         
-        if not os.path.exists(local_path):
-            raise S3OperationError(f"Local file not found: {local_path}")
+        self._validate_key(key)
         
-        if os.path.getsize(local_path) == 0:
-            raise S3OperationError("Cannot upload empty file")
+        try:
+            response = self._get_object(bucket, key, if_match=if_match, max_bytes=max_bytes)
+        except ClientError as e:
+            raise S3OperationError(f"Failed to open s3://{bucket}/{key}: {str(e)}")
         
-        # Validate and sanitize the S3 key
+        return {
+            'body': response['Body'],
+            'content_length': response['ContentLength'],
+            'etag': response.get('ETag', '').strip('"')
+        }
+
+    def get_object_range(self, bucket: str, key: str, start: int, end: int) -> Dict[str, Any]:
+        """
+        Read a byte range of an object, e.g. its header, without fetching the rest.
+
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            start: First byte offset
+            end: Last byte offset (inclusive); clamped to the object size by S3
+
+        Returns:
+            Dict with the range 'data', the object's 'total_size' and 'etag'
+
+        Raises:
+            S3OperationError: If the range cannot be read
+        """
+        self._validate_key(key)
+
+        try:
+            response = self._get_object(bucket, key, byte_range=(start, end))
+            data = response['Body'].read()
+        except ClientError as e:
+            raise S3OperationError(f"Failed to read range of s3://{bucket}/{key}: {str(e)}")
+
+        return {
+            'data': data,
+            'total_size': self._object_size(response),
+            'etag': response.get('ETag', '').strip('"')
+        }
+
+    @staticmethod
+    def _validate_key(key: str) -> None:
+        """Reject S3 keys with path traversal or invalid characters."""
+        # Validate and sanitize the S3 key to prevent path traversal
         normalized_key = os.path.normpath(key).replace('\\', '/')
         if (
             '..' in normalized_key or 
@@ -152,31 +263,246 @@ class S3Operations:
             len(key) > 1024  # Reasonable key length limit
         ):
             raise S3OperationError(f"Invalid S3 key: path traversal or invalid characters detected: {key[:100]}...")
+    
+    def _download_to_path(self, bucket: str, key: str, local_path: str,
+                          if_match: Optional[str], max_bytes: Optional[int]) -> Dict[str, Any]:
+        """
+        Make one download attempt, switching to parallel ranges for large objects.
+        
+        Returns:
+            Dict with content_length, etag and the number of ranges fetched
+        """
+        if self.file_transfers:
+            return self._download_whole_file(bucket, key, local_path, if_match, max_bytes)
+        
+        response = self._get_object(bucket, key, if_match=if_match, max_bytes=max_bytes,
+                                    byte_range=(0, self.ranged_download_threshold - 1))
+        total = self._object_size(response)
+        etag = response.get('ETag', '')
+        first_length = response['ContentLength']
+        
+        # Single-part S3-managed ETags are the MD5 of the object
+        digest = hashlib.md5() if self._etag_is_md5(response) else None
+        ranges = [(start, min(start + self.multipart_chunksize, total) - 1)
+                  for start in range(first_length, total, self.multipart_chunksize)]
+        
+        fd = os.open(local_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            if ranges:
+                # Preallocate so ranges can be written at their offsets in any order
+                if hasattr(os, 'posix_fallocate'):
+                    os.posix_fallocate(fd, 0, total)
+                else:
+                    os.ftruncate(fd, total)
+            
+            written = self._write_body(fd, response['Body'], 0, None if ranges else digest)
+            if written != first_length:
+                # Truncated stream; retried like any other transient failure
+                raise IOError(f"Incomplete download: received {written} of {first_length} bytes")
+            
+            if ranges:
+                with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(ranges))) as executor:
+                    list(executor.map(lambda r: self._download_range(bucket, key, etag, fd, r), ranges))
+        finally:
+            os.close(fd)
+        
+        if digest is not None:
+            if ranges:
+                with open(local_path, 'rb') as f:
+                    for block in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                        digest.update(block)
+            if digest.hexdigest() != etag.strip('"'):
+                raise IOError(f"Downloaded bytes do not match ETag for s3://{bucket}/{key}")
+        
+        return {'content_length': total, 'etag': etag.strip('"'), 'ranges': 1 + len(ranges)}
+    
+    def _download_whole_file(self, bucket: str, key: str, local_path: str,
+                             if_match: Optional[str], max_bytes: Optional[int]) -> Dict[str, Any]:
+        """Download through the backend's own file transfer, pinned to the ETag seen by HEAD."""
+        try:
+            head = self.s3_client.head_object(Bucket=bucket, Key=key)
+            total = head.get('ContentLength', 0)
+            etag = head.get('ETag', '')
+            if if_match and if_match.strip('"') != etag.strip('"'):
+                raise ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'HeadObject')
+            if max_bytes is not None and total > max_bytes:
+                raise S3ObjectTooLargeError(
+                    f"S3 object too large: s3://{bucket}/{key} is {total} bytes (limit {max_bytes})"
+                )
+            if total == 0:
+                raise ClientError({'Error': {'Code': 'InvalidRange'}}, 'HeadObject')
+            self.s3_client.download_file(bucket, key, local_path, ExtraArgs={'IfMatch': etag})
+        except ClientError as e:
+            raise self._map_client_error(e, bucket, key)
+        
+        return {'content_length': total, 'etag': etag.strip('"'), 'ranges': 1}
+    
+    def _download_range(self, bucket: str, key: str, etag: str, fd: int, byte_range: tuple) -> None:
+        """Fetch one byte range, pinned to the object's ETag, and write it at its offset."""
+        start, end = byte_range
+        response = self._get_object(bucket, key, if_match=etag, byte_range=byte_range)
+        written = self._write_body(fd, response['Body'], start)
+        if written != end - start + 1:
+            raise IOError(f"Incomplete range {start}-{end}: received {written} bytes")
+    
+    @staticmethod
+    def _write_body(fd: int, body, offset: int, digest=None) -> int:
+        """Stream a GET body into a file descriptor at the given offset."""
+        written = 0
+        for chunk in body.iter_chunks(DOWNLOAD_CHUNK_SIZE):
+            os.pwrite(fd, chunk, offset + written)
+            written += len(chunk)
+            if digest is not None:
+                digest.update(chunk)
+        return written
+    
+    @staticmethod
+    def _object_size(response: Dict[str, Any]) -> int:
+        """Total object size from a (possibly ranged) GET response."""
+        content_range = response.get('ContentRange')
+        if content_range and '/' in content_range:
+            return int(content_range.rsplit('/', 1)[1])
+        return response.get('ContentLength', 0)
+    
+    @staticmethod
+    def _etag_is_md5(response: Dict[str, Any]) -> bool:
+        """Check whether the response ETag is a plain MD5 of the object bytes."""
+        etag = response.get('ETag', '').strip('"')
+        return (
+            len(etag) == 32 and 
+            all(c in '0123456789abcdef' for c in etag.lower()) and
+            response.get('ServerSideEncryption') != 'aws:kms'
+        )
+    
+    @staticmethod
+    def _map_client_error(error: ClientError, bucket: str, key: str) -> Exception:
+        """
+        Translate read errors that retrying cannot fix into S3OperationError.
+        
+        Returns:
+            The exception to raise; other (transient) errors are returned unchanged
+        """
+        error_code = error.response['Error']['Code']
+        if error_code in ('NoSuchKey', '404'):
+            return S3OperationError(f"S3 object not found: s3://{bucket}/{key}")
+        elif error_code == 'NoSuchBucket':
+            return S3OperationError(f"S3 bucket not found: {bucket}")
+        elif error_code == 'AccessDenied':
+            return S3OperationError(f"Access denied to S3 object: s3://{bucket}/{key}")
+        elif error_code in ('PreconditionFailed', '412'):
+            return S3OperationError(f"S3 object changed since it was fingerprinted: s3://{bucket}/{key}")
+        elif error_code in ('InvalidRange', '416'):
+            # A range request against an empty object
+            return S3OperationError(f"S3 object is empty: s3://{bucket}/{key}")
+        return error
+    
+    def _get_object(self, bucket: str, key: str, if_match: Optional[str] = None,
+                    max_bytes: Optional[int] = None, byte_range: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Issue a single GET and check the object size before the body is read.
+        
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            if_match: Only return the object if it still has this ETag
+            max_bytes: Reject objects larger than this many bytes
+            byte_range: Optional inclusive (start, end) byte range
+            
+        Returns:
+            get_object response with an unread streaming Body
+            
+        Raises:
+            S3ObjectTooLargeError: If the object exceeds max_bytes
+            S3OperationError: For errors that retrying cannot fix
+            ClientError: For other (transient) S3 errors
+        """
+        request = {'Bucket': bucket, 'Key': key}
+        if if_match:
+            request['IfMatch'] = if_match if if_match.startswith('"') else f'"{if_match}"'
+        if byte_range:
+            request['Range'] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        
+        try:
+            response = self.s3_client.get_object(**request)
+        except ClientError as e:
+            raise self._map_client_error(e, bucket, key)
+        
+        content_length = self._object_size(response)
+        if max_bytes is not None and content_length > max_bytes:
+            # Drop the connection without reading the body
+            response['Body'].close()
+            raise S3ObjectTooLargeError(
+                f"S3 object too large: s3://{bucket}/{key} is {content_length} bytes (limit {max_bytes})"
+            )
+        return response
+    
+    def upload_file(self, local_path: str, bucket: str, key: str, metadata: Optional[Dict[str, str]] = None,
+                    checksum_sha256: Optional[str] = None, verify: Optional[bool] = None) -> bool:
+        """
+        Upload file to S3 with metadata and checksum validation.
+        
+        The SHA-256 checksum is sent with the PUT so S3 rejects corrupted bytes,
+        and the checksum echoed in the PUT response confirms the upload. A
+        head_object round-trip is only made when verification is requested.
+        
+        Args:
+            local_path: Local file path to upload
+            bucket: S3 bucket name
+            key: S3 object key
+            metadata: Optional metadata dictionary
+            checksum_sha256: Optional hex SHA-256 of the file, computed if omitted
+            verify: Confirm the object with head_object (defaults to verify_uploads)
+            
+        Returns:
+            bool: True if upload successful, False otherwise
+            
+        Raises:
+            S3OperationError: If upload fails
+        """
+        if not local_path or not bucket or not key:
+            raise S3OperationError("Missing required parameters for S3 upload")
+        
+        if not os.path.exists(local_path):
+            raise S3OperationError(f"Local file not found: {local_path}")
+        
+        if os.path.getsize(local_path) == 0:
+            raise S3OperationError("Cannot upload empty file")
+        
+        self._validate_key(key)
         
         logger.info(f"Starting upload: {local_path} -> s3://{bucket}/{key}")
         
         try:
             extra_args = {}
             if metadata:
-                # Sanitize metadata keys and values with strict validation
-                sanitized_metadata = {}
-                for k, v in metadata.items():
-                    if isinstance(k, str) and isinstance(v, str) and len(k) <= 100 and len(v) <= 1000:
-                        # Strict sanitization for metadata keys (alphanumeric, hyphens, underscores only)
-                        clean_key = ''.join(c for c in k if c.isalnum() or c in '-_').lower()
-                        # Strict sanitization for metadata values (remove control characters and special chars)
-                        clean_value = ''.join(c for c in v if c.isprintable() and c not in '<>"&\\').strip()[:1000]
-                        if clean_key and clean_value and len(clean_key) <= 50:
-                            sanitized_metadata[clean_key] = clean_value
-                extra_args['Metadata'] = sanitized_metadata
-            
-            # Upload the file
-            self.s3_client.upload_file(local_path, bucket, key, ExtraArgs=extra_args)
-            
-            # Verify upload by checking if object exists
-            self.s3_client.head_object(Bucket=bucket, Key=key)
+                extra_args['Metadata'] = self._sanitize_metadata(metadata)
             
             file_size = os.path.getsize(local_path)
+            checksum = self._encode_checksum(checksum_sha256 or compute_file_checksum(local_path))
+            
+            if self.file_transfers:
+                # Whole-file copy by the backend; it keeps the checksum with the object
+                extra_args['ChecksumSHA256'] = checksum
+                self.s3_client.upload_file(local_path, bucket, key, ExtraArgs=extra_args)
+            elif file_size <= self.multipart_threshold:
+                # Single PUT carrying the checksum; S3 rejects mismatched bytes
+                with open(local_path, 'rb') as body:
+                    response = self.s3_client.put_object(
+                        Bucket=bucket, Key=key, Body=body, ChecksumSHA256=checksum, **extra_args
+                    )
+                
+                echoed = response.get('ChecksumSHA256')
+                if echoed and echoed != checksum:
+                    raise S3OperationError(f"Checksum mismatch for s3://{bucket}/{key}")
+            else:
+                # Multipart upload with per-part checksums computed by the transfer manager
+                extra_args['ChecksumAlgorithm'] = 'SHA256'
+                self.transfer_manager.upload(local_path, bucket, key, extra_args=extra_args).result()
+            
+            if self.verify_uploads if verify is None else verify:
+                # Verify upload by checking if object exists
+                self.s3_client.head_object(Bucket=bucket, Key=key)
+            
             logger.info(f"Successfully uploaded file: s3://{bucket}/{key} ({file_size} bytes)")
             return True
             
@@ -186,11 +512,89 @@ class S3Operations:
                 raise S3OperationError(f"S3 bucket not found: {bucket}")
             elif error_code == 'AccessDenied':
                 raise S3OperationError(f"Access denied to S3 bucket: {bucket}")
+            elif error_code in ('BadDigest', 'InvalidDigest'):
+                raise S3OperationError(f"Checksum mismatch for s3://{bucket}/{key}")
             else:
                 raise S3OperationError(f"S3 upload failed: {str(e)}")
+        except S3OperationError:
+            raise
         except Exception as e:
             raise S3OperationError(f"Upload failed: {str(e)}")
     
+    @property
+    def transfer_manager(self):
+        """Shared transfer manager, created on first multipart transfer."""
+        with self._transfer_lock:
+            if self._transfer_manager is None:
+                self._transfer_manager = create_transfer_manager(self.s3_client, self.transfer_config)
+            return self._transfer_manager
+    
+    def upload_many(self, uploads: List[Dict[str, Any]],
+                    on_complete: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Upload a batch of files concurrently over the shared connection pool.
+        
+        Args:
+            uploads: upload_file keyword arguments per file (local_path, bucket,
+                key and optionally metadata and checksum_sha256)
+            on_complete: Called as on_complete(index, result) on the worker
+                thread as soon as each upload finishes
+            
+        Returns:
+            One result per upload, in order, with 'key', 'success' and 'error'
+        """
+        return self._run_many(self.upload_file, uploads, on_complete)
+    
+    def download_many(self, downloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Download a batch of objects concurrently over the shared connection pool.
+        
+        Args:
+            downloads: download_file keyword arguments per object (bucket, key,
+                local_path and optionally if_match and max_bytes)
+            
+        Returns:
+            One result per download, in order, with 'key', 'success', 'error'
+            and the object 'info' from download_file
+        """
+        return self._run_many(self.download_file, downloads)
+    
+    def _run_many(self, operation, requests: List[Dict[str, Any]],
+                  on_complete: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """Run an operation over a batch of requests, capturing per-request failures."""
+        def run(index: int, request: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                info = operation(**request)
+                result = {'key': request['key'], 'success': True, 'error': None, 'info': info}
+            except Exception as e:
+                logger.warning(f"Transfer of s3://{request.get('bucket')}/{request['key']} failed: {str(e)}")
+                result = {'key': request['key'], 'success': False, 'error': str(e), 'info': None}
+            
+            if on_complete is not None:
+                try:
+                    on_complete(index, result)
+                except Exception as e:
+                    logger.warning(f"Completion callback for {request['key']} failed: {str(e)}")
+            return result
+        
+        if not requests:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(requests))) as executor:
+            return list(executor.map(run, range(len(requests)), requests))
+    
+    def close(self) -> None:
+        """Shut down the shared transfer manager."""
+        with self._transfer_lock:
+            if self._transfer_manager is not None:
+                self._transfer_manager.shutdown()
+                self._transfer_manager = None
+    
+    @staticmethod
+    def _encode_checksum(hex_digest: str) -> str:
+        """Convert a hex SHA-256 digest to the base64 form S3 expects."""
+        return base64.b64encode(bytes.fromhex(hex_digest)).decode('ascii')
+    
     def get_file_metadata(self, bucket: str, key: str) -> Dict[str, Any]:
         """
         Get metadata for an S3 object.
@@ -216,11 +620,131 @@ class S3Operations:
             }
         except ClientError as e:
             error_code = e.response['Error']['Code']
-            if error_code == 'NoSuchKey':
+            if error_code in ('NoSuchKey', '404'):
                 raise S3OperationError(f"S3 object not found: s3://{bucket}/{key}")
             else:
                 raise S3OperationError(f"Failed to get metadata: {str(e)}")
     
+    def list_objects(self, bucket: str, prefix: str = '', max_keys: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        List objects under a prefix, following continuation tokens.
+        
+        Args:
+            bucket: S3 bucket name
+            prefix: Key prefix to list
+            max_keys: Stop after this many objects
+            
+        Returns:
+            List of dicts with key, size, etag and last_modified, in key order
+            
+        Raises:
+            S3OperationError: If listing fails
+        """
+        objects = []
+        request = {'Bucket': bucket, 'Prefix': prefix}
+        try:
+            while True:
+                response = self.s3_client.list_objects_v2(**request)
+                for item in response.get('Contents', []):
+                    objects.append({
+                        'key': item['Key'],
+                        'size': item.get('Size', 0),
+                        'etag': item.get('ETag', '').strip('"'),
+                        'last_modified': item.get('LastModified')
+                    })
+                    if max_keys is not None and len(objects) >= max_keys:
+                        return objects
+                if not response.get('IsTruncated'):
+                    return objects
+                request['ContinuationToken'] = response['NextContinuationToken']
+        except ClientError as e:
+            raise S3OperationError(f"Failed to list s3://{bucket}/{prefix}: {str(e)}")
+    
+    def copy_object(self, source_bucket: str, source_key: str, bucket: str, key: str, 
+                    metadata: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Copy an object server-side without transferring its bytes through the container.
+        
+        Args:
+            source_bucket: Source S3 bucket name
+            source_key: Source S3 object key
+            bucket: Destination S3 bucket name
+            key: Destination S3 object key
+            metadata: Optional replacement metadata; source metadata is kept when omitted
+            
+        Returns:
+            bool: True if the copy succeeded
+            
+        Raises:
+            S3OperationError: If the copy fails
+        """
+        extra_args = {}
+        if metadata is not None:
+            extra_args['Metadata'] = self._sanitize_metadata(metadata)
+            extra_args['MetadataDirective'] = 'REPLACE'
+        
+        try:
+            self.s3_client.copy_object(
+                CopySource={'Bucket': source_bucket, 'Key': source_key},
+                Bucket=bucket,
+                Key=key,
+                **extra_args
+            )
+            logger.info(f"Copied s3://{source_bucket}/{source_key} -> s3://{bucket}/{key}")
+            return True
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code in ('NoSuchKey', '404'):
+                raise S3OperationError(f"S3 object not found: s3://{source_bucket}/{source_key}")
+            raise S3OperationError(f"S3 copy failed: {str(e)}")
+    
+    def get_object_bytes(self, bucket: str, key: str, max_bytes: Optional[int] = None) -> Optional[bytes]:
+        """
+        Read a small S3 object fully into memory.
+        
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            max_bytes: Reject objects larger than this many bytes
+            
+        Returns:
+            Object body, or None if the object does not exist
+            
+        Raises:
+            S3ObjectTooLargeError: If the object exceeds max_bytes
+            S3OperationError: If the read fails for any other reason
+        """
+        try:
+            response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            if max_bytes is not None and response.get('ContentLength', 0) > max_bytes:
+                response['Body'].close()
+                raise S3ObjectTooLargeError(f"S3 object too large: s3://{bucket}/{key}")
+            return response['Body'].read()
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code in ('NoSuchKey', '404'):
+                return None
+            raise S3OperationError(f"Failed to read object s3://{bucket}/{key}: {str(e)}")
+    
+    def put_object_bytes(self, bucket: str, key: str, data: bytes, 
+                         content_type: str = 'application/json') -> None:
+        """
+        Write a small in-memory object to S3.
+        
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            data: Object body
+            content_type: MIME type of the body
+            
+        Raises:
+            S3OperationError: If the write fails
+        """
+        try:
+            self.s3_client.put_object(Bucket=bucket, Key=key, Body=data, ContentType=content_type)
+        except ClientError as e:
+            raise S3OperationError(f"Failed to write object s3://{bucket}/{key}: {str(e)}")
+    
     def cleanup_temp_files(self, file_paths: list) -> None:
         """
         Clean up temporary files safely.
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Storage Backends for Little Bit Audio Processing Service
+Object storage used by S3Operations: Amazon S3, or a local filesystem store
+for single-machine benchmarking and on-prem deployments.
+"""
+
+import os
+import json
+import uuid
+import errno
+import shutil
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# Backends selectable through STORAGE_BACKEND
+S3_BACKEND = 's3'
+LOCAL_BACKEND = 'local'
+
+# Directory under the local root holding per-object metadata
+LOCAL_METADATA_DIR = '.metadata'
+
+# Bytes per copy_file_range/sendfile call
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+class StorageBackend(ABC):
+    """
+    Object storage operations S3Operations depends on.
+
+    Methods take the same keyword arguments and return the same response
+    shapes as the boto3 S3 client (streaming 'Body', 'ContentRange', 'ETag'),
+    and report failures as botocore ClientError with S3 error codes, so key
+    validation, error mapping, size caps and ETag pinning in S3Operations
+    behave the same on every backend. The S3 backend is the boto3 client
+    itself.
+
+    upload_file/download_file stream through put_object/get_object by
+    default. Backends with a faster whole-file path override them and set
+    supports_file_transfers, so S3Operations uses them instead of its
+    multipart and parallel ranged transfers.
+    """
+
+    supports_file_transfers = False
+
+    @abstractmethod
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None,
+                   IfMatch: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Read an object, or a 'bytes=start-end' range of it."""
+
+    @abstractmethod
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> Dict[str, Any]:
+        """Write an object from bytes or a file object."""
+
+    @abstractmethod
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        """Read an object's size, ETag and metadata."""
+
+    @abstractmethod
+    def copy_object(self, CopySource: Dict[str, str], Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        """Copy an object within the store."""
+
+    @abstractmethod
+    def list_objects_v2(self, Bucket: str, Prefix: str = '', **kwargs) -> Dict[str, Any]:
+        """List one page of objects under a prefix."""
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str,
+                    ExtraArgs: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        """Store a local file as an object, streaming it through put_object."""
+        with open(Filename, 'rb') as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f, **(ExtraArgs or {}))
+
+    def download_file(self, Bucket: str, Key: str, Filename: str,
+                      ExtraArgs: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        """Write an object to a local file, streaming it from get_object."""
+        body = self.get_object(Bucket=Bucket, Key=Key, IfMatch=(ExtraArgs or {}).get('IfMatch'))['Body']
+        try:
+            with open(Filename, 'wb') as f:
+                shutil.copyfileobj(body, f, 1024 * 1024)
+        finally:
+            body.close()
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    """Build a ClientError shaped like an S3 service error."""
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+def _copy_fd(source_fd: int, dest_fd: int, size: int) -> None:
+    """Copy bytes between file descriptors in the kernel where supported."""
+    offset = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < size:
+                copied = os.copy_file_range(source_fd, dest_fd, min(COPY_CHUNK_SIZE, size - offset))
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError as e:
+            # Cross-filesystem copies on older kernels, or unsupported filesystems
+            if e.errno not in (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise
+
+    if offset < size:
+        os.lseek(source_fd, offset, os.SEEK_SET)
+        os.lseek(dest_fd, offset, os.SEEK_SET)
+        while offset < size:
+            block = os.read(source_fd, min(COPY_CHUNK_SIZE, size - offset))
+            if not block:
+                break
+            os.write(dest_fd, block)
+            offset += len(block)
+
+    if offset != size:
+        raise IOError(f"Short copy: {offset} of {size} bytes")
+
+class LocalObjectBody:
+    """Streaming body over a byte range of an open file, like botocore's StreamingBody."""
+
+    def __init__(self, file_obj, length: int):
+        self._file = file_obj
+        self._remaining = length
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if amt is None or amt > self._remaining:
+            amt = self._remaining
+        data = self._file.read(amt)
+        self._remaining -= len(data)
+        return data
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self) -> None:
+        self._file.close()
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Object store on a local filesystem.
+
+    Objects live at <root>/<bucket>/<key> and their metadata in a JSON file
+    under <root>/.metadata; bucket directories are created on first use. Writes go to a temporary file that is renamed
+    into place, so an object's inode never changes after it is stored: the
+    ETag is derived from the inode, copies are hardlinks, and open readers
+    keep seeing the version they opened. File uploads and downloads are
+    copied in the kernel (copy_file_range) without passing through Python.
+    """
+
+    supports_file_transfers = True
+
+    def __init__(self, root: str):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding one subdirectory per bucket
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(os.path.join(self.root, LOCAL_METADATA_DIR), exist_ok=True)
+        self._lock = threading.Lock()
+        logger.info(f"Local storage backend at {self.root}")
+
+    def _bucket_path(self, bucket: str, operation: str) -> str:
+        """Resolve a bucket directory, creating it on first use."""
+        if not bucket or '/' in bucket or bucket.startswith('.'):
+            raise _client_error('InvalidBucketName', f"Invalid bucket name: {bucket}", operation)
+        path = os.path.join(self.root, bucket)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _object_path(self, bucket: str, key: str, operation: str) -> str:
+        """Resolve an object's file, refusing keys that escape the bucket."""
+        bucket_path = self._bucket_path(bucket, operation)
+        path = os.path.normpath(os.path.join(bucket_path, key))
+        if not key or not path.startswith(bucket_path + os.sep):
+            raise _client_error('InvalidArgument', f"Invalid key: {key[:100]}", operation)
+        return path
+
+    def _metadata_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, LOCAL_METADATA_DIR, bucket, key + '.json')
+
+    def _read_metadata(self, bucket: str, key: str) -> Dict[str, Any]:
+        try:
+            with open(self._metadata_path(bucket, key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_metadata(self, bucket: str, key: str, attributes: Dict[str, Any]) -> None:
+        path = self._metadata_path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._replace(path, json.dumps(attributes).encode('utf-8'))
+
+    @staticmethod
+    def _replace(path: str, data: bytes) -> None:
+        """Atomically write a small file."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    @staticmethod
+    def _etag(stat_result: os.stat_result) -> str:
+        """ETag unique to a stored version (never an MD5, so callers skip MD5 checks)."""
+        return f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+    @staticmethod
+    def _attributes(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Metadata to keep from put/upload arguments."""
+        return {
+            name: kwargs[name] for name in ('Metadata', 'ContentType', 'ChecksumSHA256')
+            if kwargs.get(name) is not None
+        }
+
+    def _store(self, bucket: str, key: str, operation: str, write, attributes: Dict[str, Any]) -> str:
+        """Write an object through a temporary file and rename it into place."""
+        path = self._object_path(bucket, key, operation)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            write(fd)
+            os.close(fd)
+            fd = None
+            with self._lock:
+                os.replace(temp_path, path)
+                self._write_metadata(bucket, key, attributes)
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return self._etag(os.stat(path))
+
+    def _open(self, bucket: str, key: str, operation: str, if_match: Optional[str] = None):
+        """Open an object and return (file, stat), checking If-Match against the opened version."""
+        path = self._object_path(bucket, key, operation)
+        try:
+            file_obj = open(path, 'rb')
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            code = '404' if operation == 'HeadObject' else 'NoSuchKey'
+            raise _client_error(code, f"Object not found: {bucket}/{key}", operation)
+
+        stat_result = os.fstat(file_obj.fileno())
+        if if_match and if_match.strip('"') != self._etag(stat_result).strip('"'):
+            file_obj.close()
+            raise _client_error('PreconditionFailed', "At least one of the preconditions failed", operation)
+        return file_obj, stat_result
+
+    def _describe(self, bucket: str, key: str, stat_result: os.stat_result) -> Dict[str, Any]:
+        """Common head/get response fields."""
+        attributes = self._read_metadata(bucket, key)
+        response = {
+            'ContentLength': stat_result.st_size,
+            'ETag': self._etag(stat_result),
+            'LastModified': datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc),
+            'Metadata': attributes.get('Metadata', {}),
+            'ContentType': attributes.get('ContentType', 'binary/octet-stream')
+        }
+        if 'ChecksumSHA256' in attributes:
+            response['ChecksumSHA256'] = attributes['ChecksumSHA256']
+        return response
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None,
+                   IfMatch: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        file_obj, stat_result = self._open(Bucket, Key, 'GetObject', IfMatch)
+        response = self._describe(Bucket, Key, stat_result)
+        size = stat_result.st_size
+
+        start, end = 0, size - 1
+        if Range:
+            try:
+                first, last = Range[len('bytes='):].split('-')
+                start, end = int(first), min(int(last), size - 1)
+            except ValueError:
+                file_obj.close()
+                raise _client_error('InvalidArgument', f"Unsupported range: {Range}", 'GetObject')
+            if start >= size:
+                file_obj.close()
+                raise _client_error('InvalidRange', "The requested range is not satisfiable", 'GetObject')
+            response['ContentRange'] = f'bytes {start}-{end}/{size}'
+
+        file_obj.seek(start)
+        response['ContentLength'] = end - start + 1
+        response['Body'] = LocalObjectBody(file_obj, end - start + 1)
+        return response
+
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> Dict[str, Any]:
+        def write(fd: int) -> None:
+            with os.fdopen(os.dup(fd), 'wb') as f:
+                if isinstance(Body, (bytes, bytearray)):
+                    f.write(Body)
+                else:
+                    shutil.copyfileobj(Body, f, 1024 * 1024)
+
+        attributes = self._attributes(kwargs)
+        etag = self._store(Bucket, Key, 'PutObject', write, attributes)
+        response = {'ETag': etag}
+        if 'ChecksumSHA256' in attributes:
+            # Bytes never leave the machine, so the supplied checksum is echoed unverified
+            response['ChecksumSHA256'] = attributes['ChecksumSHA256']
+        return response
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        file_obj, stat_result = self._open(Bucket, Key, 'HeadObject', kwargs.get('IfMatch'))
+        file_obj.close()
+        return self._describe(Bucket, Key, stat_result)
+
+    def copy_object(self, CopySource: Dict[str, str], Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        source_bucket, source_key = CopySource['Bucket'], CopySource['Key']
+        source_path = self._object_path(source_bucket, source_key, 'CopyObject')
+        if not os.path.isfile(source_path):
+            raise _client_error('NoSuchKey', f"Object not found: {source_bucket}/{source_key}", 'CopyObject')
+
+        attributes = self._read_metadata(source_bucket, source_key)
+        if kwargs.get('MetadataDirective') == 'REPLACE':
+            attributes = {**self._attributes(kwargs), **{
+                k: v for k, v in attributes.items() if k == 'ChecksumSHA256'
+            }}
+
+        path = self._object_path(Bucket, Key, 'CopyObject')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        link_path = os.path.join(os.path.dirname(path), f'.tmp-link-{uuid.uuid4().hex}')
+        try:
+            # Stored inodes are never rewritten, so sharing one is a safe copy
+            os.link(source_path, link_path)
+            with self._lock:
+                os.replace(link_path, path)
+                self._write_metadata(Bucket, Key, attributes)
+            etag = self._etag(os.stat(path))
+        except OSError as e:
+            if os.path.exists(link_path):
+                os.unlink(link_path)
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            with open(source_path, 'rb') as source:
+                size = os.fstat(source.fileno()).st_size
+                etag = self._store(Bucket, Key, 'CopyObject',
+                                   lambda fd: _copy_fd(source.fileno(), fd, size), attributes)
+
+        return {'CopyObjectResult': {'ETag': etag, 'LastModified': datetime.now(timezone.utc)}}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = '', **kwargs) -> Dict[str, Any]:
+        bucket_path = self._bucket_path(Bucket, 'ListObjectsV2')
+        max_keys = int(kwargs.get('MaxKeys', 1000))
+        start_after = kwargs.get('ContinuationToken') or kwargs.get('StartAfter') or ''
+
+        # Only walk the directory the prefix points into
+        walk_root = os.path.normpath(os.path.join(bucket_path, os.path.dirname(Prefix)))
+        if walk_root != bucket_path and not walk_root.startswith(bucket_path + os.sep):
+            raise _client_error('InvalidArgument', f"Invalid prefix: {Prefix[:100]}", 'ListObjectsV2')
+        keys = []
+        for directory, dirnames, filenames in os.walk(walk_root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for filename in filenames:
+                if filename.startswith('.tmp-'):
+                    continue
+                key = os.path.relpath(os.path.join(directory, filename), bucket_path).replace(os.sep, '/')
+                if key.startswith(Prefix) and key > start_after:
+                    keys.append(key)
+        keys.sort()
+
+        page = keys[:max_keys]
+        contents = []
+        for key in page:
+            try:
+                stat_result = os.stat(os.path.join(bucket_path, key))
+            except FileNotFoundError:
+                continue
+            contents.append({
+                'Key': key,
+                'Size': stat_result.st_size,
+                'ETag': self._etag(stat_result),
+                'LastModified': datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc)
+            })
+
+        response = {'Contents': contents, 'KeyCount': len(contents), 'IsTruncated': len(keys) > max_keys}
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str,
+                    ExtraArgs: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        with open(Filename, 'rb') as source:
+            size = os.fstat(source.fileno()).st_size
+            self._store(Bucket, Key, 'PutObject', lambda fd: _copy_fd(source.fileno(), fd, size),
+                        self._attributes(ExtraArgs or {}))
+
+    def download_file(self, Bucket: str, Key: str, Filename: str,
+                      ExtraArgs: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        file_obj, stat_result = self._open(Bucket, Key, 'GetObject', (ExtraArgs or {}).get('IfMatch'))
+        with file_obj:
+            fd = os.open(Filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                _copy_fd(file_obj.fileno(), fd, stat_result.st_size)
+            finally:
+                os.close(fd)
+
+def create_storage_backend(backend: Optional[str] = None, region_name: Optional[str] = None,
+                           max_pool_connections: int = 10, local_root: Optional[str] = None):
+    """
+    Create the storage backend selected by configuration.
+
+    Args:
+        backend: 's3' or 'local' (defaults to STORAGE_BACKEND, then 's3')
+        region_name: AWS region for the S3 backend
+        max_pool_connections: HTTP connection pool size for the S3 backend
+        local_root: Root directory for the local backend (defaults to STORAGE_LOCAL_ROOT)
+
+    Returns:
+        A boto3 S3 client or a LocalStorageBackend
+
+    Raises:
+        ValueError: If the backend is unknown or the local root is not configured
+    """
+    backend = (backend or os.environ.get('STORAGE_BACKEND', S3_BACKEND)).lower()
+
+    if backend == S3_BACKEND:
+        return boto3.client(
+            's3', region_name=region_name,
+            config=Config(max_pool_connections=max_pool_connections)
+        )
+
+    if backend == LOCAL_BACKEND:
+        local_root = local_root or os.environ.get('STORAGE_LOCAL_ROOT')
+        if not local_root:
+            raise ValueError("STORAGE_LOCAL_ROOT must be set for the local storage backend")
+        return LocalStorageBackend(local_root)
+
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Unit tests for admission control.
+"""
+
+import io
+import os
+import sys
+import wave
+import struct
+import unittest
+from unittest.mock import Mock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.admission import (
+        AdmissionController, AdmissionDecision, probe_audio_header, estimate_resources
+    )
+    from utils.error_handlers import ResourceError
+    from audio_processor import AudioProcessingService
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+MB = 1024 * 1024
+
+def make_wav(seconds=2, frame_rate=44100, channels=2):
+    """Build 16-bit PCM WAV bytes."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(frame_rate)
+        w.writeframes(b'\0' * (seconds * frame_rate * channels * 2))
+    return buffer.getvalue()
+
+def make_flac_header(sample_rate=48000, channels=2, bits=24, total_samples=48000 * 60):
+    """Build a FLAC marker and STREAMINFO block."""
+    info = bytearray(34)
+    info[10] = (sample_rate >> 12) & 0xFF
+    info[11] = (sample_rate >> 4) & 0xFF
+    info[12] = ((sample_rate & 0x0F) << 4) | ((channels - 1) << 1) | ((bits - 1) >> 4)
+    info[13] = (((bits - 1) & 0x0F) << 4) | ((total_samples >> 32) & 0x0F)
+    info[14:18] = struct.pack('>I', total_samples & 0xFFFFFFFF)
+    return b'fLaC' + b'\x80\x00\x00\x22' + bytes(info)
+
+def box(box_type, payload=b''):
+    """Build an ISO BMFF box."""
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+def make_moov_at_end_m4a(media_bytes=15 * MB, seconds=900, sample_rate=44100, channels=1):
+    """Build an M4A laid out like an iOS recording: ftyp, mdat, then moov."""
+    mvhd = b'\x00' * 12 + struct.pack('>II', 1000, seconds * 1000)
+    mp4a = b'\x00' * 16 + struct.pack('>HH', channels, 16) + b'\x00' * 4 + struct.pack('>I', sample_rate << 16)
+    moov = box(b'moov', box(b'mvhd', mvhd) + box(b'trak', box(b'stsd', box(b'mp4a', mp4a))))
+    return box(b'ftyp', b'M4A \x00\x00\x00\x00') + box(b'mdat', b'\x00' * media_bytes) + moov
+
+def range_reader(data):
+    """read_range over in-memory bytes, with an inclusive end like S3 ranges."""
+    return lambda start, end: data[start:end + 1]
+
+class TestProbeAudioHeader(unittest.TestCase):
+    """Test format identification and duration estimates."""
+
+    def test_wav_duration_is_exact(self):
+        """Test WAV duration comes from the data chunk size."""
+        data = make_wav(seconds=2)
+        probe = probe_audio_header(data[:1024], len(data))
+
+        self.assertEqual(probe['format'], 'wav')
+        self.assertAlmostEqual(probe['duration_seconds'], 2.0)
+        self.assertEqual((probe['sample_rate'], probe['channels'], probe['sample_width']), (44100, 2, 2))
+        self.assertTrue(probe['exact'])
+
+    def test_flac_streaminfo(self):
+        """Test FLAC duration and widened sample width from STREAMINFO."""
+        probe = probe_audio_header(make_flac_header(), 10 * MB)
+
+        self.assertEqual(probe['format'], 'flac')
+        self.assertAlmostEqual(probe['duration_seconds'], 60.0)
+        self.assertEqual((probe['sample_rate'], probe['channels'], probe['sample_width']), (48000, 2, 4))
+
+    def test_mp4_duration_from_mvhd(self):
+        """Test fast-start M4A duration comes from the movie header."""
+        mvhd = b'\x00' * 12 + struct.pack('>II', 1000, 90000)
+        head = box(b'ftyp', b'M4A \x00\x00\x00\x00') + box(b'moov', box(b'mvhd', mvhd))
+        probe = probe_audio_header(head, 2 * MB)
+
+        self.assertEqual(probe['format'], 'm4a')
+        self.assertAlmostEqual(probe['duration_seconds'], 90.0)
+        self.assertTrue(probe['exact'])
+
+    def test_mp4_moov_at_end(self):
+        """Test a moov box stored after the media data is found with range reads."""
+        data = make_moov_at_end_m4a()
+        head = data[:64 * 1024]
+
+        self.assertFalse(probe_audio_header(head, len(data))['exact'])
+
+        reads = []
+        def read_range(start, end):
+            reads.append((start, end))
+            return data[start:end + 1]
+
+        probe = probe_audio_header(head, len(data), read_range=read_range)
+
+        self.assertEqual(probe['format'], 'm4a')
+        self.assertTrue(probe['exact'])
+        self.assertAlmostEqual(probe['duration_seconds'], 900.0)
+        self.assertEqual((probe['sample_rate'], probe['channels']), (44100, 1))
+        self.assertLessEqual(sum(end - start + 1 for start, end in reads), 128 * 1024)
+
+    def test_mp3_duration_from_bitrate(self):
+        """Test MP3 duration is estimated from the first frame's bitrate."""
+        # MPEG 1 Layer III, 128 kbps, 44.1 kHz, joint stereo
+        head = b'\xff\xfb\x90\x44' + b'\x00' * 400
+        probe = probe_audio_header(head, 128000 // 8 * 30)
+
+        self.assertEqual(probe['format'], 'mp3')
+        self.assertAlmostEqual(probe['duration_seconds'], 30.0)
+        self.assertEqual((probe['sample_rate'], probe['channels']), (44100, 2))
+
+    def test_unknown_format_uses_conservative_defaults(self):
+        """Test unrecognised sources assume a low bitrate."""
+        probe = probe_audio_header(b'\x00' * 64, 8 * MB)
+
+        self.assertEqual(probe['format'], 'unknown')
+        self.assertFalse(probe['exact'])
+        self.assertGreater(probe['duration_seconds'], 1000)
+
+class TestAdmissionController(unittest.TestCase):
+    """Test admission decisions."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.estimate = estimate_resources(
+            {'duration_seconds': 600, 'sample_rate': 48000, 'channels': 2, 'sample_width': 2}, 20 * MB
+        )
+
+    def test_estimate_scales_with_decoded_size(self):
+        """Test memory and disk estimates derive from the decoded PCM size."""
+        self.assertEqual(self.estimate['pcm_bytes'], 600 * 48000 * 2 * 2)
+        self.assertEqual(self.estimate['peak_memory_bytes'], self.estimate['pcm_bytes'] * 4)
+        self.assertEqual(self.estimate['disk_bytes'], 20 * MB + self.estimate['pcm_bytes'] * 2)
+
+    def test_admit_with_headroom(self):
+        """Test jobs that fit are admitted."""
+        controller = AdmissionController(memory_capacity_mb=4096)
+        decision, _ = controller.decide(self.estimate, 2048, 10 * 1024 * MB)
+        self.assertEqual(decision, AdmissionDecision.ADMIT)
+
+    def test_defer_when_busy_then_admit(self):
+        """Test jobs that fit the worker but not its current headroom are deferred a bounded number of times."""
+        controller = AdmissionController(memory_capacity_mb=4096, max_deferrals=2)
+
+        decision, reason = controller.decide(self.estimate, 100, None, defer_count=0)
+        self.assertEqual(decision, AdmissionDecision.DEFER)
+        self.assertIn('memory', reason)
+
+        decision, _ = controller.decide(self.estimate, 100, None, defer_count=2)
+        self.assertEqual(decision, AdmissionDecision.ADMIT)
+
+    def test_oversized_job_rerouted_or_rejected(self):
+        """Test jobs that can never fit go to the large-job pool, or are rejected without one."""
+        decision, _ = AdmissionController(memory_capacity_mb=256, reroute_available=True).decide(
+            self.estimate, 256, None)
+        self.assertEqual(decision, AdmissionDecision.REROUTE)
+
+        decision, reason = AdmissionController(memory_capacity_mb=256).decide(self.estimate, 256, None)
+        self.assertEqual(decision, AdmissionDecision.REJECT)
+        self.assertIn('capacity', reason)
+
+    def test_inexact_estimate_never_rejected(self):
+        """Test a duration guessed from the file size cannot reroute or reject a job."""
+        probe = probe_audio_header(b'\x00' * 64, 15 * MB)
+        estimate = estimate_resources(probe, 15 * MB)
+        self.assertFalse(estimate['exact'])
+
+        for reroute_available in (False, True):
+            decision, reason = AdmissionController(memory_capacity_mb=2816, reroute_available=reroute_available
+                                                   ).decide(estimate, 2816, None)
+            self.assertEqual(decision, AdmissionDecision.ADMIT)
+            self.assertIn('inexact', reason)
+
+class TestServiceAdmission(unittest.TestCase):
+    """Test the service's admission check before download."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.logger_patcher = patch('audio_processor.logger', Mock())
+        self.logger_patcher.start()
+        self.service = AudioProcessingService(session_id='session')
+        self.service.s3_ops = Mock()
+        self.service.audio_processor = Mock()
+        self.service.audio_processor.config.preserve_original = True
+        # An hour of 48 kHz stereo 16-bit audio: ~1.3GB decoded, ~5.3GB peak
+        header = make_flac_header(bits=16, total_samples=48000 * 3600)
+        self.service.s3_ops.get_object_range.return_value = {
+            'data': header, 'total_size': 400 * MB, 'etag': 'abc'
+        }
+        self.env_patcher = patch.dict(os.environ, {'WORKSPACE_QUOTA_MB': '0'})
+        self.env_patcher.start()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.env_patcher.stop()
+        self.logger_patcher.stop()
+
+    def test_reads_only_the_header_range(self):
+        """Test admission reads a small range and records the source size."""
+        with patch('audio_processor.ErrorRecovery.get_memory_limit_mb', return_value=16384), \
+             patch('audio_processor.ErrorRecovery.get_available_memory_mb', return_value=16000):
+            self.assertIsNone(self.service.check_admission('bucket', 'public/unprocessed/u/a.flac'))
+
+        args = self.service.s3_ops.get_object_range.call_args.args
+        self.assertEqual(args[2], 0)
+        self.assertLess(args[3], MB)
+        self.assertEqual(self.service.source_size, 400 * MB)
+
+    def test_low_headroom_defers(self):
+        """Test a busy worker defers the job with a delay."""
+        with patch('audio_processor.ErrorRecovery.get_memory_limit_mb', return_value=16384), \
+             patch('audio_processor.ErrorRecovery.get_available_memory_mb', return_value=1024), \
+             patch.dict(os.environ, {'ADMISSION_DEFER_SECONDS': '90'}):
+            admission = self.service.check_admission('bucket', 'public/unprocessed/u/a.flac')
+
+        self.assertEqual(admission['decision'], 'defer')
+        self.assertEqual(admission['delaySeconds'], 90)
+
+    def test_oversized_job_without_reroute_raises(self):
+        """Test jobs larger than the worker fail as a non-recoverable resource error."""
+        with patch('audio_processor.ErrorRecovery.get_memory_limit_mb', return_value=2048), \
+             patch('audio_processor.ErrorRecovery.get_available_memory_mb', return_value=2000):
+            with self.assertRaises(ResourceError):
+                self.service.check_admission('bucket', 'public/unprocessed/u/a.flac')
+
+    def test_large_moov_at_end_m4a_admitted(self):
+        """Test a 15MB iOS-style .m4a is admitted on a 3GB worker instead of being rejected."""
+        data = make_moov_at_end_m4a()
+        self.service.s3_ops.get_object_range.side_effect = lambda bucket, key, start, end: {
+            'data': data[start:end + 1], 'total_size': len(data), 'etag': 'abc'
+        }
+
+        with patch('audio_processor.ErrorRecovery.get_memory_limit_mb', return_value=3072), \
+             patch('audio_processor.ErrorRecovery.get_available_memory_mb', return_value=3000):
+            self.assertIsNone(self.service.check_admission('bucket', 'public/unprocessed/u/a.m4a'))
+
+            # Without a readable moov the guessed estimate still never rejects
+            truncated = data[:-200]
+            self.service.s3_ops.get_object_range.side_effect = lambda bucket, key, start, end: {
+                'data': truncated[start:end + 1], 'total_size': len(truncated), 'etag': 'abc'
+            }
+            admission = self.service.check_admission('bucket', 'public/unprocessed/u/a.m4a')
+            self.assertTrue(admission is None or admission['decision'] == 'defer')
+
+    def test_probe_failure_admits(self):
+        """Test admission never blocks a job because the header could not be read."""
+        self.service.s3_ops.get_object_range.side_effect = Exception("timeout")
+        self.assertIsNone(self.service.check_admission('bucket', 'public/unprocessed/u/a.flac'))
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
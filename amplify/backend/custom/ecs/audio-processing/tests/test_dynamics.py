@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the vectorized compressor.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from pydub import AudioSegment
+    from utils.dynamics import _release_envelope, compress, limit, static_gain_reduction_db
+    from utils.audio_utils import AudioProcessor, AudioProcessingConfig
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+SAMPLE_RATE = 44100
+
+def tone(amplitude, seconds=1.0):
+    """Sine tone at a fixed amplitude."""
+    t = np.arange(int(SAMPLE_RATE * seconds))
+    return (amplitude * np.sin(2 * np.pi * 440 * t / SAMPLE_RATE)).astype(np.float32)
+
+def peak_db(audio_data):
+    """Peak level in dBFS."""
+    return 20 * np.log10(np.max(np.abs(audio_data)))
+
+class TestCompressor(unittest.TestCase):
+    """Test the gain computer, envelope and compressor output."""
+
+    def test_static_curve(self):
+        """Test hard and soft knee reduction above and below the threshold."""
+        levels = np.array([-40.0, -20.0, 0.0], dtype=np.float32)
+
+        hard = static_gain_reduction_db(levels, threshold_db=-20, ratio=4)
+        soft = static_gain_reduction_db(levels, threshold_db=-20, ratio=4, knee_db=10)
+
+        np.testing.assert_allclose(hard, [0.0, 0.0, 15.0])
+        np.testing.assert_allclose(soft, [0.0, 0.9375, 15.0])
+
+    def test_release_envelope_matches_recurrence(self):
+        """Test the vectorized release scan equals the sample-by-sample recurrence."""
+        rng = np.random.default_rng(0)
+        target = (rng.random(150000) * (rng.random(150000) > 0.999)).astype(np.float32)
+
+        envelope = _release_envelope(target, 0.995)
+
+        expected = np.empty_like(target)
+        previous = 0.0
+        for i, value in enumerate(target):
+            previous = max(value, 0.995 * previous)
+            expected[i] = previous
+        np.testing.assert_allclose(envelope, expected, atol=1e-6)
+
+    def test_steady_state_ratio(self):
+        """Test a full-scale tone settles at threshold + overshoot / ratio."""
+        audio = compress(tone(1.0), SAMPLE_RATE, threshold_db=-20, ratio=4, knee_db=0)
+
+        self.assertAlmostEqual(peak_db(audio[SAMPLE_RATE // 2:]), -15.0, places=1)
+
+    def test_quiet_signal_untouched(self):
+        """Test a signal below the threshold passes through unchanged."""
+        audio = tone(0.01)
+        expected = audio.copy()
+
+        compress(audio, SAMPLE_RATE, threshold_db=-20, knee_db=0)
+
+        np.testing.assert_allclose(audio, expected, rtol=1e-5)
+
+    def test_limiter_ceiling_with_lookahead(self):
+        """Test lookahead keeps a sudden burst below the ceiling."""
+        audio = np.concatenate([tone(0.05, 0.5), tone(1.0, 0.5)])
+
+        limit(audio, SAMPLE_RATE, ceiling_db=-6)
+
+        self.assertLessEqual(peak_db(audio), -6.0 + 1e-3)
+
+    def test_stereo_in_place(self):
+        """Test channels share one gain and the buffer is modified in place."""
+        left = tone(1.0)
+        audio = np.stack([left, 0.5 * left], axis=1)
+
+        result = compress(audio, SAMPLE_RATE, makeup_db='auto')
+
+        self.assertIs(result, audio)
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_allclose(audio[:, 1], 0.5 * audio[:, 0], rtol=1e-5, atol=1e-7)
+
+    def test_invalid_ratio(self):
+        """Test ratios below 1 are rejected."""
+        with self.assertRaises(ValueError):
+            compress(tone(1.0), SAMPLE_RATE, ratio=0.5)
+
+class TestProcessorCompression(unittest.TestCase):
+    """Test the optional compressor in AudioProcessor."""
+
+    def test_config_defaults(self):
+        """Test compression is off unless requested."""
+        config = AudioProcessingConfig()
+        self.assertFalse(config.compress_audio)
+
+        config = AudioProcessingConfig({'compressAudio': True, 'compressorRatio': 100})
+        self.assertTrue(config.compress_audio)
+        self.assertEqual(config.compressor_settings['ratio'], 10.5)
+
+    def test_compress_chunk(self):
+        """Test a 16-bit stereo chunk is compressed and keeps its format."""
+        pcm = (np.stack([tone(0.9), tone(0.9)], axis=1) * 32767).astype(np.int16)
+        chunk = AudioSegment(pcm.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=2)
+        processor = AudioProcessor(AudioProcessingConfig({
+            'compressAudio': True, 'compressorThresholdDb': -20, 'compressorRatio': 4
+        }))
+
+        compressed = processor._compress_chunk(chunk)
+
+        self.assertEqual((compressed.channels, compressed.sample_width, compressed.frame_rate),
+                         (2, 2, SAMPLE_RATE))
+        self.assertEqual(len(compressed.raw_data), len(chunk.raw_data))
+        self.assertLess(compressed.max_dBFS, chunk.max_dBFS - 10)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the load harness helpers.
+"""
+
+import os
+import sys
+import json
+import wave
+import random
+import argparse
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from load_harness import InstrumentedQueue, parse_distribution, percentile, synthesize_recording
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+QUEUE_URL = 'local://audio-jobs'
+DLQ_URL = 'local://audio-jobs-dlq'
+
+class TestHarnessHelpers(unittest.TestCase):
+    """Test distributions, percentiles and synthetic recordings."""
+
+    def test_distributions(self):
+        """Test duration distribution specs."""
+        rng = random.Random(1)
+        self.assertEqual(parse_distribution('fixed:12')(rng), 12)
+        self.assertTrue(all(5 <= parse_distribution('uniform:5,10')(rng) <= 10 for _ in range(50)))
+        self.assertIn(parse_distribution('choice:30,60')(rng), (30, 60))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_distribution('normal:1,2')
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+    def test_synthetic_recordings_are_unique(self):
+        """Test recordings have the requested length and different content."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, f'{i}.wav') for i in range(2)]
+            rng = random.Random(0)
+            durations = [synthesize_recording(path, 3.0, rng) for path in paths]
+            with wave.open(paths[0], 'rb') as w:
+                frames = w.getnframes()
+            with open(paths[0], 'rb') as a, open(paths[1], 'rb') as b:
+                self.assertNotEqual(a.read(), b.read())
+
+        self.assertAlmostEqual(durations[0], 3.0, places=2)
+        self.assertEqual(frames, 3 * 44100)
+
+class TestInstrumentedQueue(unittest.TestCase):
+    """Test job completion tracking."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.queue = InstrumentedQueue(QUEUE_URL, DLQ_URL)
+        self.queue.expected = 1
+        self.body = json.dumps({'recordId': 'r1'})
+
+    def receive(self):
+        """Receive the next job message."""
+        return self.queue.receive_message(QueueUrl=QUEUE_URL)['Messages'][0]
+
+    def test_requeue_does_not_finish_job(self):
+        """Test a job finishes only when its last message is deleted."""
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody=self.body)
+        first = self.receive()
+
+        # Requeue: new message first, then the old one is deleted
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody=self.body)
+        self.queue.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=first['ReceiptHandle'])
+        self.assertNotIn('r1', self.queue.finished)
+
+        self.queue.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=self.receive()['ReceiptHandle'])
+        self.assertIn('r1', self.queue.finished)
+        self.assertTrue(self.queue.all_finished.is_set())
+
+    def test_dead_letter_marks_failure(self):
+        """Test sends to the dead-letter queue mark the job failed."""
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody=self.body)
+        message = self.receive()
+        self.queue.send_message(QueueUrl=DLQ_URL, MessageBody=self.body)
+        self.queue.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=message['ReceiptHandle'])
+
+        self.assertIn('r1', self.queue.failed)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
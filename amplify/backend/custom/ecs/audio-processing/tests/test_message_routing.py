@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Unit tests for SQS message routing.
+"""
+
+import os
+import sys
+import json
+import unittest
+from unittest.mock import Mock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.message_routing import (
+        MessageRouter, MessageDisposition, determine_disposition,
+        get_attempt_history, calculate_retry_delay, get_defer_count,
+        ATTEMPT_HISTORY_ATTRIBUTE, DEFER_COUNT_ATTRIBUTE
+    )
+    from utils.error_handlers import ValidationError, StorageError, create_error_response
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+def make_message(history=None, receive_count=1):
+    """Build an SQS message as returned by receive_message."""
+    message = {
+        'MessageId': 'msg-1',
+        'ReceiptHandle': 'handle-1',
+        'Body': json.dumps({'bucket': 'b', 'key': 'k', 'userId': 'u', 'recordId': 'r'}),
+        'Attributes': {'ApproximateReceiveCount': str(receive_count)},
+        'MessageAttributes': {}
+    }
+    if history is not None:
+        message['MessageAttributes'][ATTEMPT_HISTORY_ATTRIBUTE] = {
+            'DataType': 'String',
+            'StringValue': json.dumps(history)
+        }
+    return message
+
+class TestDetermineDisposition(unittest.TestCase):
+    """Test disposition decisions."""
+
+    def test_success_completes(self):
+        """Test that a 200 response completes the message."""
+        self.assertEqual(determine_disposition({'statusCode': 200}, 1, 3), MessageDisposition.COMPLETED)
+
+    def test_non_recoverable_dead_letters_immediately(self):
+        """Test that non-recoverable errors skip retries."""
+        result = create_error_response(ValidationError("bad input"))
+        self.assertEqual(result['statusCode'], 400)
+        self.assertEqual(determine_disposition(result, 1, 3), MessageDisposition.DEAD_LETTER)
+
+    def test_recoverable_retries_until_max_attempts(self):
+        """Test that recoverable errors retry until attempts are exhausted."""
+        result = create_error_response(StorageError("transient"))
+        self.assertEqual(determine_disposition(result, 1, 3), MessageDisposition.RETRY)
+        self.assertEqual(determine_disposition(result, 3, 3), MessageDisposition.DEAD_LETTER)
+
+    def test_retry_delay_is_capped(self):
+        """Test exponential backoff is capped at the SQS maximum."""
+        self.assertEqual(calculate_retry_delay(1, 30), 30)
+        self.assertEqual(calculate_retry_delay(2, 30), 60)
+        self.assertEqual(calculate_retry_delay(10, 30), 900)
+
+class TestMessageRouter(unittest.TestCase):
+    """Test message routing against a mocked SQS client."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.sqs = Mock()
+        self.router = MessageRouter(self.sqs, 'queue-url', dead_letter_queue_url='dlq-url')
+
+    def test_success_deletes_message(self):
+        """Test successful results delete the message without sending."""
+        disposition = self.router.route(make_message(), {'statusCode': 200})
+
+        self.assertEqual(disposition, MessageDisposition.COMPLETED)
+        self.sqs.delete_message.assert_called_once_with(QueueUrl='queue-url', ReceiptHandle='handle-1')
+        self.sqs.send_message.assert_not_called()
+
+    def test_non_recoverable_sent_to_dead_letter_queue(self):
+        """Test poison messages go to the DLQ with attempt history attached."""
+        result = create_error_response(ValidationError("bad input"), 'session-1')
+        disposition = self.router.route(make_message(), result)
+
+        self.assertEqual(disposition, MessageDisposition.DEAD_LETTER)
+        send_kwargs = self.sqs.send_message.call_args[1]
+        self.assertEqual(send_kwargs['QueueUrl'], 'dlq-url')
+        history = json.loads(send_kwargs['MessageAttributes'][ATTEMPT_HISTORY_ATTRIBUTE]['StringValue'])
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0]['category'], 'validation')
+        self.assertFalse(history[0]['recoverable'])
+        self.assertEqual(history[0]['sessionId'], 'session-1')
+        self.sqs.delete_message.assert_called_once()
+
+    def test_recoverable_requeued_with_history(self):
+        """Test recoverable failures are requeued with backoff and appended history."""
+        previous = [{'attempt': 1, 'category': 'storage', 'recoverable': True, 'message': 'first'}]
+        result = create_error_response(StorageError("transient"))
+        disposition = self.router.route(make_message(history=previous), result)
+
+        self.assertEqual(disposition, MessageDisposition.RETRY)
+        send_kwargs = self.sqs.send_message.call_args[1]
+        self.assertEqual(send_kwargs['QueueUrl'], 'queue-url')
+        self.assertEqual(send_kwargs['DelaySeconds'], 60)
+        history = json.loads(send_kwargs['MessageAttributes'][ATTEMPT_HISTORY_ATTRIBUTE]['StringValue'])
+        self.assertEqual([h['attempt'] for h in history], [1, 2])
+        self.sqs.delete_message.assert_called_once()
+
+    def test_failed_dead_letter_send_keeps_message(self):
+        """Test the message is not deleted if it could not be dead-lettered."""
+        self.sqs.send_message.side_effect = Exception("send failed")
+        result = create_error_response(ValidationError("bad input"))
+
+        self.router.route(make_message(), result)
+
+        self.sqs.delete_message.assert_not_called()
+
+    def test_without_dead_letter_queue_deletes_with_record(self):
+        """Test poison messages are deleted when no DLQ is available."""
+        self.sqs.get_queue_attributes.return_value = {'Attributes': {}}
+        router = MessageRouter(self.sqs, 'queue-url')
+        result = create_error_response(ValidationError("bad input"))
+
+        disposition = router.route(make_message(), result)
+
+        self.assertEqual(disposition, MessageDisposition.DEAD_LETTER)
+        self.sqs.send_message.assert_not_called()
+        self.sqs.delete_message.assert_called_once()
+
+    def test_dead_letter_queue_discovered_from_redrive_policy(self):
+        """Test DLQ URL discovery from the queue's RedrivePolicy."""
+        self.sqs.get_queue_attributes.return_value = {'Attributes': {
+            'RedrivePolicy': json.dumps({
+                'deadLetterTargetArn': 'arn:aws:sqs:us-west-2:123:my-dlq',
+                'maxReceiveCount': 3
+            })
+        }}
+        self.sqs.get_queue_url.return_value = {'QueueUrl': 'discovered-dlq-url'}
+
+        router = MessageRouter(self.sqs, 'queue-url')
+
+        self.assertEqual(router.dead_letter_queue_url, 'discovered-dlq-url')
+        self.sqs.get_queue_url.assert_called_once_with(QueueName='my-dlq')
+
+    def test_malformed_history_ignored(self):
+        """Test malformed attempt history attributes are ignored."""
+        message = make_message()
+        message['MessageAttributes'][ATTEMPT_HISTORY_ATTRIBUTE] = {'DataType': 'String', 'StringValue': '{oops'}
+        self.assertEqual(get_attempt_history(message), [])
+
+class TestAdmissionRouting(unittest.TestCase):
+    """Test routing of jobs turned away by admission control."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.sqs = Mock()
+        self.router = MessageRouter(self.sqs, 'queue-url', dead_letter_queue_url='dlq-url',
+                                    reroute_queue_url='large-queue-url')
+
+    def test_defer_resends_with_delay_and_count(self):
+        """Test deferred jobs return to the queue without recording an attempt."""
+        message = make_message(history=[{'attempt': 1}])
+        result = {'statusCode': 202, 'admission': {'decision': 'defer', 'delaySeconds': 120, 'reason': 'busy'}}
+
+        disposition = self.router.route(message, result)
+
+        self.assertEqual(disposition, MessageDisposition.DEFERRED)
+        sent = self.sqs.send_message.call_args.kwargs
+        self.assertEqual(sent['QueueUrl'], 'queue-url')
+        self.assertEqual(sent['DelaySeconds'], 120)
+        self.assertEqual(sent['MessageAttributes'][DEFER_COUNT_ATTRIBUTE]['StringValue'], '1')
+        self.assertEqual(get_attempt_history({'MessageAttributes': sent['MessageAttributes']}),
+                         [{'attempt': 1}])
+        self.sqs.delete_message.assert_called_once()
+
+        # A second deferral increments the count
+        self.router.route({**message, 'MessageAttributes': sent['MessageAttributes']}, result)
+        resent = self.sqs.send_message.call_args.kwargs['MessageAttributes']
+        self.assertEqual(get_defer_count({'MessageAttributes': resent}), 2)
+
+    def test_reroute_sends_to_large_job_queue(self):
+        """Test rerouted jobs go to the reroute queue immediately."""
+        result = {'statusCode': 202, 'admission': {'decision': 'reroute', 'reason': 'too large'}}
+
+        disposition = self.router.route(make_message(), result)
+
+        self.assertEqual(disposition, MessageDisposition.REROUTED)
+        sent = self.sqs.send_message.call_args.kwargs
+        self.assertEqual(sent['QueueUrl'], 'large-queue-url')
+        self.assertEqual(sent['DelaySeconds'], 0)
+        self.sqs.delete_message.assert_called_once()
+
+    def test_failed_send_keeps_message(self):
+        """Test the message is not deleted when it could not be re-sent."""
+        self.sqs.send_message.side_effect = Exception("throttled")
+        result = {'statusCode': 202, 'admission': {'decision': 'defer', 'delaySeconds': 60}}
+
+        self.router.route(make_message(), result)
+
+        self.sqs.delete_message.assert_not_called()
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Unit tests for job prefetching.
+"""
+
+import os
+import sys
+import json
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.prefetch import JobPrefetcher, PrefetchedJob
+    from utils.error_handlers import ValidationError
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+def make_message(index, body=None):
+    """Build an SQS job message."""
+    return {
+        'MessageId': f'msg-{index}',
+        'ReceiptHandle': f'handle-{index}',
+        'Body': json.dumps(body if body is not None else {
+            'bucket': 'bucket', 'key': f'public/unprocessed/user/clip{index}.wav',
+            'userId': 'user', 'recordId': f'record-{index}'
+        })
+    }
+
+def fake_download(bucket, key, local_path, **kwargs):
+    """Write a small file in place of an S3 download."""
+    with open(local_path, 'wb') as f:
+        f.write(b'audio')
+    return True
+
+class TestJobPrefetcher(unittest.TestCase):
+    """Test the prefetch stage with mocked SQS and S3."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.sqs = Mock()
+        self.s3_ops = Mock()
+        self.s3_ops.get_file_metadata.return_value = {'content_length': 5, 'etag': 'etag-1'}
+        self.s3_ops.download_file.side_effect = fake_download
+        self.memory_patcher = patch('utils.prefetch.ErrorRecovery.get_available_memory_mb',
+                                    return_value=4096)
+        self.memory_patcher.start()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.memory_patcher.stop()
+
+    def make_prefetcher(self, **kwargs):
+        """Create a prefetcher without starting its threads."""
+        return JobPrefetcher(self.sqs, 'queue-url', self.s3_ops, wait_time_seconds=0, **kwargs)
+
+    def test_prefetch_downloads_source(self):
+        """Test a prefetched job hands over a ready local file."""
+        prefetcher = self.make_prefetcher()
+        job = PrefetchedJob(make_message(1))
+
+        prefetcher._prefetch(job)
+
+        self.assertIsNone(job.error)
+        self.assertTrue(os.path.exists(job.local_path))
+        self.assertEqual(job.size_bytes, 5)
+        self.assertEqual(job.body['recordId'], 'record-1')
+
+        prefetcher.release(job)
+        self.assertIsNone(job.local_path)
+
+    def test_prefetch_pins_etag_and_size_cap(self):
+        """Test the download is pinned to the HEAD ETag and capped at the source limit."""
+        prefetcher = self.make_prefetcher(max_source_bytes=100)
+        job = PrefetchedJob(make_message(1))
+
+        prefetcher._prefetch(job)
+
+        self.s3_ops.download_file.assert_called_once_with(
+            'bucket', 'public/unprocessed/user/clip1.wav', job.local_path, if_match='etag-1', max_bytes=100
+        )
+        self.assertEqual(job.etag, 'etag-1')
+        prefetcher.release(job)
+
+    def test_prefetch_skips_oversized_source(self):
+        """Test sources over the size limit are left for the worker to reject."""
+        self.s3_ops.get_file_metadata.return_value = {'content_length': 101, 'etag': 'etag-1'}
+        prefetcher = self.make_prefetcher(max_source_bytes=100)
+        job = PrefetchedJob(make_message(1))
+
+        prefetcher._prefetch(job)
+
+        self.assertIsNone(job.local_path)
+        self.assertEqual(prefetcher._reserved_bytes, 0)
+        self.s3_ops.download_file.assert_not_called()
+
+    def test_reservation_held_until_release(self):
+        """Test a job's bytes count against the budget until it is released, not when taken."""
+        prefetcher = self.make_prefetcher()
+        job = PrefetchedJob(make_message(1))
+        prefetcher._prefetch(job)
+        prefetcher._ready.put(job)
+
+        self.assertIs(prefetcher.get(timeout=1), job)
+        self.assertEqual(prefetcher._reserved_bytes, 5)
+
+        prefetcher.release(job)
+        prefetcher.release(job)
+        self.assertEqual(prefetcher._reserved_bytes, 0)
+
+    def test_prefetch_respects_disk_budget(self):
+        """Test sources larger than the remaining disk budget are not prefetched."""
+        self.s3_ops.get_file_metadata.return_value = {'content_length': 2 * 1024 * 1024}
+        prefetcher = self.make_prefetcher(disk_budget_mb=1)
+        job = PrefetchedJob(make_message(1))
+
+        prefetcher._prefetch(job)
+
+        self.assertIsNone(job.local_path)
+        self.assertIsNone(job.error)
+        self.s3_ops.download_file.assert_not_called()
+
+    def test_prefetch_records_validation_error(self):
+        """Test malformed messages are handed over with their validation error."""
+        prefetcher = self.make_prefetcher()
+        job = PrefetchedJob(make_message(1, body={'bucket': 'bucket'}))
+
+        prefetcher._prefetch(job)
+
+        self.assertIsInstance(job.error, ValidationError)
+        self.assertIsNone(job.local_path)
+
+    def test_prefetch_download_failure_falls_back(self):
+        """Test a failed download leaves no local file for the worker."""
+        self.s3_ops.download_file.side_effect = Exception("network down")
+        prefetcher = self.make_prefetcher()
+        job = PrefetchedJob(make_message(1))
+
+        prefetcher._prefetch(job)
+
+        self.assertIsNone(job.local_path)
+        self.assertIsNone(job.temp_dir)
+        self.assertIsNotNone(job.error)
+
+    def test_receive_loop_bounded_by_depth(self):
+        """Test the receiver holds at most max_depth jobs and stop returns them."""
+        messages = iter(make_message(i) for i in range(10))
+        self.sqs.receive_message.side_effect = lambda **kwargs: {'Messages': [next(messages)]}
+        prefetcher = self.make_prefetcher(max_depth=2)
+
+        prefetcher.start()
+        deadline = time.time() + 5
+        while prefetcher._ready.qsize() < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+
+        self.assertEqual(prefetcher._ready.qsize(), 2)
+        self.assertEqual(self.sqs.receive_message.call_count, 2)
+
+        job = prefetcher.get(timeout=1)
+        self.assertEqual(job.message['MessageId'], 'msg-0')
+        prefetcher.release(job)
+
+        prefetcher.stop(timeout=5)
+        returned = [c[1]['ReceiptHandle'] for c in self.sqs.change_message_visibility.call_args_list
+                    if c[1]['VisibilityTimeout'] == 0]
+        self.assertIn('handle-1', returned)
+        self.assertNotIn('handle-0', returned)
+
+    def test_heartbeat_extends_held_messages(self):
+        """Test visibility is extended for held messages until release."""
+        prefetcher = self.make_prefetcher(visibility_timeout=900, heartbeat_interval=0.05)
+        job = PrefetchedJob(make_message(1))
+        prefetcher._held[job.receipt_handle] = job
+
+        with patch.object(prefetcher, '_receive_loop', lambda: None):
+            prefetcher.start()
+            time.sleep(0.2)
+            prefetcher.release(job)
+            calls_after_release = self.sqs.change_message_visibility.call_count
+            time.sleep(0.2)
+            prefetcher.stop(timeout=1)
+
+        self.assertGreater(calls_after_release, 0)
+        self.assertLessEqual(self.sqs.change_message_visibility.call_count, calls_after_release + 1)
+        self.sqs.change_message_visibility.assert_any_call(
+            QueueUrl='queue-url', ReceiptHandle='handle-1', VisibilityTimeout=900
+        )
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the local queue backend.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+from botocore.exceptions import ClientError
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from queue_backends import LocalQueueBackend
+    from utils.message_routing import MessageRouter, MessageDisposition
+    from utils.error_handlers import StorageError, ValidationError, create_error_response
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+QUEUE_URL = 'local://audio-jobs'
+DLQ_URL = 'local://audio-jobs-dlq'
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class TestLocalQueueBackend(unittest.TestCase):
+    """Test SQS visibility semantics of the local queue."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.queue = LocalQueueBackend(visibility_timeout=30, max_receive_count=2, clock=self.clock)
+
+    def receive(self, **kwargs):
+        """Receive messages without waiting."""
+        return self.queue.receive_message(QueueUrl=QUEUE_URL, AttributeNames=['All'],
+                                          MessageAttributeNames=['All'], **kwargs).get('Messages', [])
+
+    def test_received_message_hidden_until_timeout(self):
+        """Test a received message reappears with a new receipt handle after its timeout."""
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody='job',
+                                MessageAttributes={'DeferCount': {'DataType': 'Number', 'StringValue': '1'}})
+
+        first = self.receive()
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first[0]['MessageAttributes']['DeferCount']['StringValue'], '1')
+        self.assertEqual(self.receive(), [])
+
+        self.clock.advance(31)
+        second = self.receive()
+        self.assertEqual(second[0]['MessageId'], first[0]['MessageId'])
+        self.assertEqual(second[0]['Attributes']['ApproximateReceiveCount'], '2')
+        self.assertNotEqual(second[0]['ReceiptHandle'], first[0]['ReceiptHandle'])
+
+        # The stale handle no longer deletes the message
+        with self.assertRaises(ClientError):
+            self.queue.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=first[0]['ReceiptHandle'])
+        self.queue.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=second[0]['ReceiptHandle'])
+        self.clock.advance(31)
+        self.assertEqual(self.receive(), [])
+
+    def test_extend_and_release_visibility(self):
+        """Test change_message_visibility extends a lease or returns the message at once."""
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody='job')
+        message = self.receive(VisibilityTimeout=10)[0]
+
+        self.clock.advance(8)
+        self.queue.change_message_visibility(QueueUrl=QUEUE_URL, ReceiptHandle=message['ReceiptHandle'],
+                                             VisibilityTimeout=10)
+        self.clock.advance(8)
+        self.assertEqual(self.receive(), [])
+
+        self.queue.change_message_visibility(QueueUrl=QUEUE_URL, ReceiptHandle=message['ReceiptHandle'],
+                                             VisibilityTimeout=0)
+        self.assertEqual(len(self.receive()), 1)
+
+    def test_delayed_message(self):
+        """Test DelaySeconds hides a new message."""
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody='job', DelaySeconds=60)
+
+        self.assertEqual(self.receive(), [])
+        attributes = self.queue.get_queue_attributes(QueueUrl=QUEUE_URL)['Attributes']
+        self.assertEqual(attributes['ApproximateNumberOfMessagesDelayed'], '1')
+
+        self.clock.advance(60)
+        self.assertEqual(len(self.receive()), 1)
+
+    def test_receive_batch(self):
+        """Test up to MaxNumberOfMessages are received in send order."""
+        for i in range(5):
+            self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody=str(i))
+
+        batch = self.receive(MaxNumberOfMessages=3)
+
+        self.assertEqual([m['Body'] for m in batch], ['0', '1', '2'])
+        self.assertEqual(len(self.receive(MaxNumberOfMessages=10)), 2)
+
+    def test_redrive_to_dead_letter_queue(self):
+        """Test messages received too often move to the dead-letter queue."""
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody='poison')
+        for _ in range(2):
+            self.assertEqual(len(self.receive()), 1)
+            self.clock.advance(31)
+
+        self.assertEqual(self.receive(), [])
+        dead = self.queue.receive_message(QueueUrl=DLQ_URL).get('Messages', [])
+        self.assertEqual([m['Body'] for m in dead], ['poison'])
+
+    def test_long_poll_wakes_on_send(self):
+        """Test a waiting receive returns as soon as a message is sent."""
+        queue = LocalQueueBackend()
+        threading.Timer(0.05, queue.send_message, kwargs={'QueueUrl': QUEUE_URL, 'MessageBody': 'job'}).start()
+
+        start = time.monotonic()
+        messages = queue.receive_message(QueueUrl=QUEUE_URL, WaitTimeSeconds=5).get('Messages', [])
+
+        self.assertEqual(len(messages), 1)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_router_on_local_queue(self):
+        """Test MessageRouter discovers the dead-letter queue and routes through the local backend."""
+        router = MessageRouter(self.queue, QUEUE_URL, retry_base_delay=30)
+        self.assertEqual(router.dead_letter_queue_url, DLQ_URL)
+
+        self.queue.send_message(QueueUrl=QUEUE_URL, MessageBody=json.dumps({'key': 'a'}))
+        message = self.receive()[0]
+        disposition = router.route(message, create_error_response(StorageError("transient")))
+        self.assertEqual(disposition, MessageDisposition.RETRY)
+
+        self.clock.advance(30)
+        retried = self.receive()[0]
+        disposition = router.route(retried, create_error_response(ValidationError("bad input")))
+        self.assertEqual(disposition, MessageDisposition.DEAD_LETTER)
+
+        self.clock.advance(60)
+        self.assertEqual(self.receive(), [])
+        self.assertEqual(len(self.queue.receive_message(QueueUrl=DLQ_URL).get('Messages', [])), 1)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
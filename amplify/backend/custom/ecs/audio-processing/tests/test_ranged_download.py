@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Unit tests for parallel byte-range downloads against a local S3 stand-in.
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from s3_operations import S3Operations, S3OperationError, S3ObjectTooLargeError
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+MB = 1024 * 1024
+
+class LocalBody:
+    """Streaming body over in-memory bytes."""
+
+    def __init__(self, data):
+        self.data = data
+        self.read_started = False
+        self.closed = False
+
+    def iter_chunks(self, chunk_size):
+        self.read_started = True
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+class LocalS3:
+    """In-memory stand-in for the S3 client's get_object with Range and IfMatch."""
+
+    def __init__(self):
+        self.objects = {}
+        self.requests = []
+        self.corrupt_next_range = False
+        self._lock = threading.Lock()
+
+    def put(self, key, data):
+        self.objects[key] = (data, f'"{hashlib.md5(data).hexdigest()}"')
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        with self._lock:
+            self.requests.append({'Key': Key, 'Range': Range, 'IfMatch': IfMatch})
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        data, etag = self.objects[Key]
+        if IfMatch and IfMatch != etag:
+            raise ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'GetObject')
+
+        response = {'ETag': etag}
+        if Range:
+            start, end = (int(v) for v in Range[len('bytes='):].split('-'))
+            if start >= len(data):
+                raise ClientError({'Error': {'Code': 'InvalidRange'}}, 'GetObject')
+            end = min(end, len(data) - 1)
+            body = data[start:end + 1]
+            response['ContentRange'] = f'bytes {start}-{end}/{len(data)}'
+            with self._lock:
+                if self.corrupt_next_range and start > 0:
+                    self.corrupt_next_range = False
+                    body = b'\0' * len(body)
+        else:
+            body = data
+
+        response['ContentLength'] = len(body)
+        response['Body'] = LocalBody(body)
+        return response
+
+class TestRangedDownload(unittest.TestCase):
+    """Test ranged downloads of large objects."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        with patch('boto3.client'):
+            self.s3_ops = S3Operations(region_name='us-east-1', multipart_chunksize_mb=1,
+                                       ranged_download_threshold_mb=1, max_concurrency=4)
+        self.s3 = LocalS3()
+        self.s3_ops.s3_client = self.s3
+        self.data = os.urandom(3 * MB + 12345)
+        self.s3.put('large.wav', self.data)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.local_path = os.path.join(self.temp_dir.name, 'large.wav')
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def read_local(self):
+        """Read the downloaded file."""
+        with open(self.local_path, 'rb') as f:
+            return f.read()
+
+    def test_large_object_downloaded_in_ranges(self):
+        """Test the object is reassembled from parallel ranges pinned to its ETag."""
+        info = self.s3_ops.download_file('bucket', 'large.wav', self.local_path)
+
+        self.assertEqual(self.read_local(), self.data)
+        self.assertEqual(info['content_length'], len(self.data))
+        self.assertEqual(info['ranges'], 4)
+        _, etag = self.s3.objects['large.wav']
+        self.assertTrue(all(r['IfMatch'] == etag for r in self.s3.requests[1:]))
+
+    def test_small_object_single_request(self):
+        """Test objects below the threshold take one GET."""
+        self.s3.put('small.wav', b'audio')
+        info = self.s3_ops.download_file('bucket', 'small.wav', self.local_path)
+
+        self.assertEqual(self.read_local(), b'audio')
+        self.assertEqual(info['ranges'], 1)
+        self.assertEqual(len(self.s3.requests), 1)
+
+    def test_corrupted_range_is_retried(self):
+        """Test an MD5 mismatch fails the attempt and the retry succeeds."""
+        self.s3.corrupt_next_range = True
+        with patch('time.sleep'):
+            self.s3_ops.download_file('bucket', 'large.wav', self.local_path)
+
+        self.assertEqual(self.read_local(), self.data)
+        self.assertEqual(len(self.s3.requests), 8)
+
+    def test_object_changed_mid_download(self):
+        """Test ranges fail when the object is overwritten during the download."""
+        original_get = self.s3.get_object
+
+        def overwrite_after_first(**kwargs):
+            response = original_get(**kwargs)
+            if len(self.s3.requests) == 1:
+                self.s3.put('large.wav', os.urandom(len(self.data)))
+            return response
+
+        self.s3.get_object = overwrite_after_first
+        with self.assertRaises(S3OperationError) as context:
+            self.s3_ops.download_file('bucket', 'large.wav', self.local_path)
+
+        self.assertIn('changed', str(context.exception))
+
+    def test_size_cap_uses_total_size(self):
+        """Test the cap applies to the whole object, not the first range."""
+        with self.assertRaises(S3ObjectTooLargeError):
+            self.s3_ops.download_file('bucket', 'large.wav', self.local_path, max_bytes=2 * MB)
+
+        self.assertEqual(len(self.s3.requests), 1)
+
+    def test_empty_object(self):
+        """Test empty objects are rejected without retries."""
+        self.s3.put('empty.wav', b'')
+        with self.assertRaises(S3OperationError) as context:
+            self.s3_ops.download_file('bucket', 'empty.wav', self.local_path)
+
+        self.assertIn('empty', str(context.exception))
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the content-addressed result cache.
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.result_cache import ResultCache, compute_content_hash
+    from s3_operations import S3OperationError
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+class TestContentHash(unittest.TestCase):
+    """Test content addressing."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, data):
+        """Write a file into the temp directory."""
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_same_bytes_different_name(self):
+        """Test identical audio under a new name hashes identically."""
+        config = {'silence_threshold': -30}
+        self.assertEqual(
+            compute_content_hash(self.write('a.wav', b'audio'), config),
+            compute_content_hash(self.write('b.wav', b'audio'), config)
+        )
+
+    def test_config_changes_hash(self):
+        """Test a different effective configuration changes the address."""
+        path = self.write('a.wav', b'audio')
+        self.assertNotEqual(
+            compute_content_hash(path, {'silence_threshold': -30}),
+            compute_content_hash(path, {'silence_threshold': -40})
+        )
+
+class TestResultCache(unittest.TestCase):
+    """Test index storage and materialization."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.s3_ops = Mock()
+        self.cache = ResultCache(self.s3_ops, 'bucket')
+        self.upload_results = [
+            {'filename': 'take1-0.wav', 's3_key': 'public/processed/user/take1-0.wav', 'chunk_index': 0,
+             'format': 'wav', 'duration_seconds': 1.5, 'upload_success': True},
+            {'filename': 'take1-original.wav', 's3_key': 'public/processed/user/take1-original.wav',
+             'chunk_index': -1, 'format': 'wav', 'duration_seconds': 3.0, 'upload_success': True}
+        ]
+
+    def stored_entry(self):
+        """Store the fixture results and return the written entry."""
+        self.cache.store('user', 'hash', 'take1', self.upload_results)
+        bucket, key, data = self.s3_ops.put_object_bytes.call_args[0]
+        self.assertEqual(key, 'processing-cache/results/user/hash.json')
+        return json.loads(data)
+
+    def test_store_records_suffixes(self):
+        """Test entries record output suffixes relative to the base filename."""
+        entry = self.stored_entry()
+        self.assertEqual([o['suffix'] for o in entry['outputs']], ['-0.wav', '-original.wav'])
+
+    def test_materialize_copies_under_new_name(self):
+        """Test a hit is copied server-side under the new upload's base filename."""
+        entry = self.stored_entry()
+
+        results = self.cache.materialize(entry, 'user', 'take2', {'session-id': 's2'})
+
+        self.assertEqual([r['s3_key'] for r in results],
+                         ['public/processed/user/take2-0.wav', 'public/processed/user/take2-original.wav'])
+        self.assertTrue(all(r['cached'] and r['upload_success'] for r in results))
+        self.assertEqual(self.s3_ops.copy_object.call_count, 2)
+        self.s3_ops.upload_file.assert_not_called()
+
+    def test_materialize_same_name_skips_copy(self):
+        """Test re-uploading under the same name needs no copy at all."""
+        entry = self.stored_entry()
+        self.cache.materialize(entry, 'user', 'take1')
+        self.s3_ops.copy_object.assert_not_called()
+
+    def test_materialize_propagates_copy_failure(self):
+        """Test missing cached outputs surface as an error so the caller can reprocess."""
+        entry = self.stored_entry()
+        self.s3_ops.copy_object.side_effect = S3OperationError("S3 object not found")
+        with self.assertRaises(S3OperationError):
+            self.cache.materialize(entry, 'user', 'take2')
+
+    def test_lookup_miss(self):
+        """Test a missing index entry is a miss."""
+        self.s3_ops.get_object_bytes.return_value = None
+        self.assertIsNone(self.cache.lookup('user', 'hash'))
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -5,6 +5,8 @@ Unit tests for S3 operations functionality.
 
 import os
 import sys
+import base64
+import hashlib
 import unittest
 import tempfile
 from unittest.mock import Mock, patch, MagicMock
@@ -14,7 +16,7 @@ from botocore.exceptions import ClientError
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from s3_operations import S3Operations, S3OperationError
+    from s3_operations import S3Operations, S3OperationError, S3ObjectTooLargeError
 except ImportError as e:
     print(f"Import error in tests: {e}")
     sys.exit(1)
@@ -28,38 +30,75 @@ class TestS3Operations(unittest.TestCase):
             self.s3_ops = S3Operations(region_name='us-east-1')
             self.s3_ops.s3_client = Mock()
     
+    def make_get_response(self, data, etag='"abc"', content_length=None):
+        """Build a get_object response streaming the given bytes."""
+        body = Mock()
+        body.iter_chunks.return_value = [data] if data else []
+        return {
+            'Body': body,
+            'ContentLength': len(data) if content_length is None else content_length,
+            'ETag': etag
+        }
+    
     def test_download_file_success(self):
-        """Test successful file download."""
-        # Mock successful S3 operations
-        self.s3_ops.s3_client.head_object.return_value = {'ContentLength': 1024}
-        self.s3_ops.s3_client.download_file.return_value = None
+        """Test successful file download with a single GET."""
+        self.s3_ops.s3_client.get_object.return_value = self.make_get_response(b'test data')
         
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_path = temp_file.name
-            temp_file.write(b'test data')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, 'source.wav')
+            result = self.s3_ops.download_file('bucket', 'key', temp_path)
+            
+            self.assertEqual(result, {'content_length': 9, 'etag': 'abc', 'ranges': 1})
+            with open(temp_path, 'rb') as f:
+                self.assertEqual(f.read(), b'test data')
+            
+            # Verify S3 client calls
+            self.s3_ops.s3_client.get_object.assert_called_once_with(
+                Bucket='bucket', Key='key', Range=f'bytes=0-{16 * 1024 * 1024 - 1}'
+            )
+            self.s3_ops.s3_client.head_object.assert_not_called()
+    
+    def test_download_file_if_match(self):
+        """Test downloads can be pinned to a known ETag."""
+        self.s3_ops.s3_client.get_object.return_value = self.make_get_response(b'test data')
         
-        try:
-            with patch('os.path.getsize', return_value=1024):
-                with patch('os.makedirs'):
-                    result = self.s3_ops.download_file('bucket', 'key', temp_path)
-                    self.assertTrue(result)
-                    
-                    # Verify S3 client calls
-                    self.s3_ops.s3_client.head_object.assert_called_once_with(
-                        Bucket='bucket', Key='key'
-                    )
-                    self.s3_ops.s3_client.download_file.assert_called_once_with(
-                        'bucket', 'key', temp_path
-                    )
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.s3_ops.download_file('bucket', 'key', os.path.join(temp_dir, 'f'), if_match='abc')
+        
+        self.assertEqual(self.s3_ops.s3_client.get_object.call_args[1]['IfMatch'], '"abc"')
+    
+    def test_download_file_etag_changed(self):
+        """Test a changed object is not retried."""
+        error_response = {'Error': {'Code': 'PreconditionFailed'}}
+        self.s3_ops.s3_client.get_object.side_effect = ClientError(error_response, 'GetObject')
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with self.assertRaises(S3OperationError) as context:
+                self.s3_ops.download_file('bucket', 'key', os.path.join(temp_dir, 'f'), if_match='abc')
+        
+        self.assertIn('changed', str(context.exception))
+        self.assertEqual(self.s3_ops.s3_client.get_object.call_count, 1)
+    
+    def test_download_file_too_large(self):
+        """Test the size cap is enforced before the body is read."""
+        response = self.make_get_response(b'', content_length=200)
+        self.s3_ops.s3_client.get_object.return_value = response
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, 'f')
+            with self.assertRaises(S3ObjectTooLargeError):
+                self.s3_ops.download_file('bucket', 'key', temp_path, max_bytes=100)
+            
+            self.assertFalse(os.path.exists(temp_path))
+        
+        response['Body'].iter_chunks.assert_not_called()
+        response['Body'].close.assert_called_once()
     
     def test_download_file_not_found(self):
         """Test download with file not found error."""
         # Mock S3 not found error
         error_response = {'Error': {'Code': 'NoSuchKey'}}
-        self.s3_ops.s3_client.head_object.side_effect = ClientError(error_response, 'HeadObject')
+        self.s3_ops.s3_client.get_object.side_effect = ClientError(error_response, 'GetObject')
         
         with self.assertRaises(S3OperationError) as context:
             self.s3_ops.download_file('bucket', 'nonexistent', '/tmp/test')
@@ -69,7 +108,7 @@ class TestS3Operations(unittest.TestCase):
     def test_download_file_access_denied(self):
         """Test download with access denied error."""
         error_response = {'Error': {'Code': 'AccessDenied'}}
-        self.s3_ops.s3_client.head_object.side_effect = ClientError(error_response, 'HeadObject')
+        self.s3_ops.s3_client.get_object.side_effect = ClientError(error_response, 'GetObject')
         
         with self.assertRaises(S3OperationError) as context:
             self.s3_ops.download_file('bucket', 'key', '/tmp/test')
@@ -85,51 +124,42 @@ class TestS3Operations(unittest.TestCase):
     
     def test_download_file_retry_logic(self):
         """Test retry logic on transient failures."""
-        # Mock transient failure followed by success
-        self.s3_ops.s3_client.head_object.return_value = {'ContentLength': 1024}
-        self.s3_ops.s3_client.download_file.side_effect = [
+        # Mock transient failure, a truncated body, then success
+        self.s3_ops.s3_client.get_object.side_effect = [
             Exception("Transient error"),
-            Exception("Another transient error"),
-            None  # Success on third attempt
+            self.make_get_response(b'test', content_length=9),
+            self.make_get_response(b'test data')
         ]
         
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_path = temp_file.name
-            temp_file.write(b'test data')
-        
-        try:
-            with patch('os.path.getsize', return_value=1024):
-                with patch('os.makedirs'):
-                    with patch('time.sleep'):  # Speed up test
-                        result = self.s3_ops.download_file('bucket', 'key', temp_path, max_retries=3)
-                        self.assertTrue(result)
-                        
-                        # Should have made 3 download attempts
-                        self.assertEqual(self.s3_ops.s3_client.download_file.call_count, 3)
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch('time.sleep'):  # Speed up test
+                result = self.s3_ops.download_file(
+                    'bucket', 'key', os.path.join(temp_dir, 'f'), max_retries=3
+                )
+            self.assertEqual(result['content_length'], 9)
+            
+            # Should have made 3 download attempts
+            self.assertEqual(self.s3_ops.s3_client.get_object.call_count, 3)
     
     def test_upload_file_success(self):
-        """Test successful file upload."""
+        """Test successful checksummed upload without a head_object round-trip."""
         # Create temporary file
         with tempfile.NamedTemporaryFile(delete=False) as temp_file:
             temp_file.write(b'test data')
             temp_path = temp_file.name
         
         try:
-            # Mock successful upload
-            self.s3_ops.s3_client.upload_file.return_value = None
-            self.s3_ops.s3_client.head_object.return_value = {'ContentLength': 9}
+            checksum = base64.b64encode(hashlib.sha256(b'test data').digest()).decode()
+            self.s3_ops.s3_client.put_object.return_value = {'ChecksumSHA256': checksum}
             
             result = self.s3_ops.upload_file(temp_path, 'bucket', 'key')
             self.assertTrue(result)
             
             # Verify S3 client calls
-            self.s3_ops.s3_client.upload_file.assert_called_once()
-            self.s3_ops.s3_client.head_object.assert_called_once_with(
-                Bucket='bucket', Key='key'
-            )
+            call_args = self.s3_ops.s3_client.put_object.call_args[1]
+            self.assertEqual(call_args['ChecksumSHA256'], checksum)
+            self.s3_ops.s3_client.upload_file.assert_not_called()
+            self.s3_ops.s3_client.head_object.assert_not_called()
         finally:
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
@@ -141,23 +171,96 @@ class TestS3Operations(unittest.TestCase):
             temp_path = temp_file.name
         
         try:
-            # Mock successful upload
-            self.s3_ops.s3_client.upload_file.return_value = None
-            self.s3_ops.s3_client.head_object.return_value = {'ContentLength': 9}
+            self.s3_ops.s3_client.put_object.return_value = {}
             
             metadata = {'session-id': 'test123', 'user-id': 'user456'}
             result = self.s3_ops.upload_file(temp_path, 'bucket', 'key', metadata=metadata)
             self.assertTrue(result)
             
             # Check that upload was called with metadata
-            call_args = self.s3_ops.s3_client.upload_file.call_args
-            extra_args = call_args[1]['ExtraArgs']
-            self.assertIn('Metadata', extra_args)
-            self.assertEqual(extra_args['Metadata'], metadata)
+            call_args = self.s3_ops.s3_client.put_object.call_args[1]
+            self.assertIn('Metadata', call_args)
+            self.assertEqual(call_args['Metadata'], metadata)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    def test_upload_file_checksum_mismatch(self):
+        """Test a mismatched echoed checksum fails the upload."""
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            temp_file.write(b'test data')
+            temp_path = temp_file.name
+        
+        try:
+            self.s3_ops.s3_client.put_object.return_value = {'ChecksumSHA256': 'bogus'}
+            
+            with self.assertRaises(S3OperationError) as context:
+                self.s3_ops.upload_file(temp_path, 'bucket', 'key')
+            
+            self.assertIn('Checksum mismatch', str(context.exception))
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    def test_upload_file_verify(self):
+        """Test head_object verification when explicitly requested."""
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            temp_file.write(b'test data')
+            temp_path = temp_file.name
+        
+        try:
+            self.s3_ops.s3_client.put_object.return_value = {}
+            
+            self.s3_ops.upload_file(temp_path, 'bucket', 'key', verify=True)
+            
+            self.s3_ops.s3_client.head_object.assert_called_once_with(
+                Bucket='bucket', Key='key'
+            )
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    def test_upload_large_file_multipart(self):
+        """Test large files use the shared transfer manager with SHA-256 part checksums."""
+        self.s3_ops.multipart_threshold = 4
+        self.s3_ops._transfer_manager = Mock()
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            temp_file.write(b'test data')
+            temp_path = temp_file.name
+        
+        try:
+            self.s3_ops.upload_file(temp_path, 'bucket', 'key')
+            
+            extra_args = self.s3_ops._transfer_manager.upload.call_args[1]['extra_args']
+            self.assertEqual(extra_args['ChecksumAlgorithm'], 'SHA256')
+            self.s3_ops._transfer_manager.upload.return_value.result.assert_called_once()
+            self.s3_ops.s3_client.put_object.assert_not_called()
         finally:
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
     
+    def test_upload_many_reports_per_file_outcomes(self):
+        """Test batch uploads run every file and report failures individually."""
+        self.s3_ops.upload_file = Mock(side_effect=[True, S3OperationError("boom"), True])
+        uploads = [{'local_path': f'/tmp/{i}', 'bucket': 'bucket', 'key': f'k{i}'} for i in range(3)]
+        
+        outcomes = self.s3_ops.upload_many(uploads)
+        
+        self.assertEqual([o['key'] for o in outcomes], ['k0', 'k1', 'k2'])
+        self.assertEqual([o['success'] for o in outcomes], [True, False, True])
+        self.assertIn('boom', outcomes[1]['error'])
+        self.assertEqual(self.s3_ops.upload_file.call_count, 3)
+    
+    def test_transfer_settings_from_environment(self):
+        """Test transfer tuning is read from the environment."""
+        env = {'S3_MULTIPART_THRESHOLD_MB': '16', 'S3_MAX_CONCURRENCY': '4'}
+        with patch.dict(os.environ, env), patch('boto3.client') as mock_client:
+            s3_ops = S3Operations(region_name='us-east-1')
+        
+        self.assertEqual(s3_ops.transfer_config.multipart_threshold, 16 * 1024 * 1024)
+        self.assertEqual(s3_ops.transfer_config.max_concurrency, 4)
+        self.assertEqual(mock_client.call_args[1]['config'].max_pool_connections, 8)
+    
     def test_upload_file_not_found(self):
         """Test upload with non-existent local file."""
         with self.assertRaises(S3OperationError) as context:
@@ -224,6 +327,21 @@ class TestS3Operations(unittest.TestCase):
         
         self.assertIn('not found', str(context.exception))
     
+    def test_get_object_bytes(self):
+        """Test reading a small object into memory."""
+        body = Mock()
+        body.read.return_value = b'{"ok": true}'
+        self.s3_ops.s3_client.get_object.return_value = {'Body': body}
+        
+        self.assertEqual(self.s3_ops.get_object_bytes('bucket', 'key'), b'{"ok": true}')
+    
+    def test_get_object_bytes_missing(self):
+        """Test reading a missing object returns None."""
+        error_response = {'Error': {'Code': 'NoSuchKey'}}
+        self.s3_ops.s3_client.get_object.side_effect = ClientError(error_response, 'GetObject')
+        
+        self.assertIsNone(self.s3_ops.get_object_bytes('bucket', 'missing'))
+    
     def test_cleanup_temp_files(self):
         """Test temporary file cleanup."""
         # Create temporary files
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the storage backends.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from storage_backends import LocalStorageBackend, StorageBackend, create_storage_backend
+    from s3_operations import S3Operations, S3OperationError, S3ObjectTooLargeError
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+class TestLocalStorageBackend(unittest.TestCase):
+    """Test S3Operations against a local filesystem store."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.temp_dir.name, 'store')
+        self.work = os.path.join(self.temp_dir.name, 'work')
+        os.makedirs(self.work)
+        with patch.dict(os.environ, {'STORAGE_BACKEND': 'local', 'STORAGE_LOCAL_ROOT': self.root}):
+            self.s3_ops = S3Operations(region_name='us-east-1')
+        self.data = os.urandom(256 * 1024)
+        self.source = self.write_local('source.wav', self.data)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def write_local(self, name, data):
+        """Write a file into the working directory."""
+        path = os.path.join(self.work, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read_local(self, path):
+        """Read a local file."""
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_backend_selected_from_environment(self):
+        """Test STORAGE_BACKEND selects the local store."""
+        self.assertIsInstance(self.s3_ops.s3_client, LocalStorageBackend)
+        self.assertTrue(self.s3_ops.file_transfers)
+        with self.assertRaises(ValueError):
+            create_storage_backend('local', local_root='')
+
+    def test_upload_download_round_trip(self):
+        """Test files round-trip with metadata and checksum."""
+        self.s3_ops.upload_file(self.source, 'bucket', 'public/a.wav', metadata={'user-id': 'u1'})
+
+        target = os.path.join(self.work, 'downloaded.wav')
+        info = self.s3_ops.download_file('bucket', 'public/a.wav', target)
+
+        self.assertEqual(self.read_local(target), self.data)
+        self.assertEqual(info['content_length'], len(self.data))
+        metadata = self.s3_ops.get_file_metadata('bucket', 'public/a.wav')
+        self.assertEqual(metadata['metadata'], {'user-id': 'u1'})
+        self.assertEqual(metadata['etag'], info['etag'])
+
+    def test_download_checks_etag_and_size(self):
+        """Test If-Match and size caps behave as they do against S3."""
+        self.s3_ops.upload_file(self.source, 'bucket', 'a.wav')
+        target = os.path.join(self.work, 'downloaded.wav')
+
+        with self.assertRaises(S3ObjectTooLargeError):
+            self.s3_ops.download_file('bucket', 'a.wav', target, max_bytes=1024)
+        with self.assertRaises(S3OperationError) as context:
+            self.s3_ops.download_file('bucket', 'a.wav', target, if_match='stale')
+        self.assertIn('changed', str(context.exception))
+        with self.assertRaises(S3OperationError) as context:
+            self.s3_ops.download_file('bucket', 'missing.wav', target)
+        self.assertIn('not found', str(context.exception))
+
+    def test_overwrite_changes_etag(self):
+        """Test every stored version gets a new ETag."""
+        self.s3_ops.upload_file(self.source, 'bucket', 'a.wav')
+        first = self.s3_ops.get_file_metadata('bucket', 'a.wav')['etag']
+        self.s3_ops.upload_file(self.source, 'bucket', 'a.wav')
+
+        self.assertNotEqual(self.s3_ops.get_file_metadata('bucket', 'a.wav')['etag'], first)
+
+    def test_copy_is_hardlink(self):
+        """Test copies share the stored file and survive overwrites of the source."""
+        self.s3_ops.upload_file(self.source, 'bucket', 'a.wav')
+        self.s3_ops.copy_object('bucket', 'a.wav', 'bucket', 'cache/a.wav', metadata={'cached': 'true'})
+
+        source_path = os.path.join(self.root, 'bucket', 'a.wav')
+        copy_path = os.path.join(self.root, 'bucket', 'cache', 'a.wav')
+        self.assertEqual(os.stat(source_path).st_ino, os.stat(copy_path).st_ino)
+        self.assertEqual(self.s3_ops.get_file_metadata('bucket', 'cache/a.wav')['metadata'], {'cached': 'true'})
+
+        self.s3_ops.put_object_bytes('bucket', 'a.wav', b'replaced')
+        self.assertEqual(self.s3_ops.get_object_bytes('bucket', 'cache/a.wav'), self.data)
+
+    def test_ranged_get(self):
+        """Test byte-range reads report the total size."""
+        self.s3_ops.upload_file(self.source, 'bucket', 'a.wav')
+
+        header = self.s3_ops.get_object_range('bucket', 'a.wav', 100, 199)
+
+        self.assertEqual(header['data'], self.data[100:200])
+        self.assertEqual(header['total_size'], len(self.data))
+
+    def test_list_objects_paginates(self):
+        """Test listing follows continuation tokens in key order."""
+        for name in ('c', 'a', 'b'):
+            self.s3_ops.put_object_bytes('bucket', f'results/{name}.json', b'{}')
+        self.s3_ops.put_object_bytes('bucket', 'other/d.json', b'{}')
+
+        list_page = self.s3_ops.s3_client.list_objects_v2
+        with patch.object(self.s3_ops.s3_client, 'list_objects_v2',
+                          side_effect=lambda **kw: list_page(MaxKeys=2, **kw)) as small_pages:
+            objects = self.s3_ops.list_objects('bucket', 'results/')
+
+        self.assertEqual([o['key'] for o in objects], ['results/a.json', 'results/b.json', 'results/c.json'])
+        self.assertEqual(small_pages.call_count, 2)
+
+    def test_missing_object_bytes(self):
+        """Test reading a missing small object returns None."""
+        self.assertIsNone(self.s3_ops.get_object_bytes('bucket', 'missing.json'))
+
+    def test_keys_cannot_escape_bucket(self):
+        """Test the backend refuses keys outside the bucket directory."""
+        backend = self.s3_ops.s3_client
+        with self.assertRaises(ClientError):
+            backend.put_object(Bucket='bucket', Key='../../outside', Body=b'x')
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, 'outside')))
+
+class InMemoryBackend(StorageBackend):
+    """Backend implementing only the abstract object operations."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None, **kwargs):
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.read()
+        return {'ETag': '"etag"'}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        return {'ContentLength': len(self.objects[(Bucket, Key)])}
+
+    def copy_object(self, CopySource, Bucket, Key, **kwargs):
+        self.objects[(Bucket, Key)] = self.objects[(CopySource['Bucket'], CopySource['Key'])]
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix='', **kwargs):
+        return {'Contents': [{'Key': k} for b, k in self.objects if b == Bucket and k.startswith(Prefix)]}
+
+class TestStorageBackendDefaults(unittest.TestCase):
+    """Test the default file transfers built on put_object/get_object."""
+
+    def test_default_file_transfers_round_trip(self):
+        """Test upload_file/download_file stream through the object operations."""
+        backend = InMemoryBackend()
+        self.assertFalse(backend.supports_file_transfers)
+        data = os.urandom(3 * 1024 * 1024 + 17)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = os.path.join(temp_dir, 'source.wav')
+            dest = os.path.join(temp_dir, 'dest.wav')
+            with open(source, 'wb') as f:
+                f.write(data)
+
+            backend.upload_file(source, 'bucket', 'clip.wav')
+            backend.download_file('bucket', 'clip.wav', dest)
+
+            self.assertEqual(backend.objects[('bucket', 'clip.wav')], data)
+            with open(dest, 'rb') as f:
+                self.assertEqual(f.read(), data)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for streaming source decoding.
+"""
+
+import io
+import os
+import sys
+import wave
+import shutil
+import struct
+import hashlib
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from pydub import AudioSegment
+    from utils.stream_decode import decode_source_stream, requires_seekable_input
+    from utils.result_cache import compute_content_hash
+    from audio_processor import AudioProcessingService
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+def make_wav(frames=4410, channels=2, trailing_chunk=False):
+    """Build 16-bit PCM WAV bytes, optionally followed by a LIST chunk."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(44100)
+        w.writeframes(os.urandom(frames * channels * 2))
+    data = buffer.getvalue()
+    if trailing_chunk:
+        info = b'INFOISFT\x06\x00\x00\x00Lavf\x00\x00'
+        data += b'LIST' + struct.pack('<I', len(info)) + info
+        data = data[:4] + struct.pack('<I', len(data) - 8) + data[8:]
+    return data
+
+def box(box_type, payload=b''):
+    """Build an ISO BMFF box."""
+    return struct.pack('>I', 8 + len(payload)) + box_type + payload
+
+def chunked(data, size=1000):
+    """Split bytes into chunks as a GET body would deliver them."""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+class TestSeekableDetection(unittest.TestCase):
+    """Test detection of sources that cannot be piped."""
+
+    def test_moov_before_mdat_streams(self):
+        """Test fast-start MP4 can be piped."""
+        head = box(b'ftyp', b'M4A \x00\x00\x00\x00') + box(b'moov', b'x' * 32) + box(b'mdat', b'a' * 64)
+        self.assertFalse(requires_seekable_input(head))
+
+    def test_moov_at_end_needs_seeking(self):
+        """Test MP4 with the index after the payload is decoded from disk."""
+        head = box(b'ftyp', b'M4A \x00\x00\x00\x00') + box(b'free') + box(b'mdat', b'a' * 64)
+        self.assertTrue(requires_seekable_input(head))
+
+    def test_non_mp4_streams(self):
+        """Test WAV, FLAC and MP3 sources are always piped."""
+        self.assertFalse(requires_seekable_input(make_wav(frames=10)))
+        self.assertFalse(requires_seekable_input(b'fLaC' + b'\x00' * 40))
+        self.assertFalse(requires_seekable_input(b'ID3\x04' + b'\x00' * 40))
+
+class TestDecodeSourceStream(unittest.TestCase):
+    """Test decoding paths."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.temp_dir, 'source')
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_pcm_wav_decoded_natively(self):
+        """Test PCM WAV streams match the file-based decode and consume every byte."""
+        data = make_wav(trailing_chunk=True)
+        consumed = []
+
+        def tracked():
+            for chunk in chunked(data):
+                consumed.append(chunk)
+                yield chunk
+
+        audio = decode_source_stream(tracked(), self.spill_path)
+
+        expected = AudioSegment.from_wav(io.BytesIO(data))
+        self.assertEqual(audio.raw_data, expected.raw_data)
+        self.assertEqual((audio.channels, audio.frame_rate, audio.sample_width), (2, 44100, 2))
+        self.assertEqual(b''.join(consumed), data)
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_moov_at_end_spilled_to_disk(self):
+        """Test sources needing seeks are written to disk unchanged."""
+        data = box(b'ftyp', b'M4A \x00\x00\x00\x00') + box(b'mdat', os.urandom(5000)) + box(b'moov')
+
+        self.assertIsNone(decode_source_stream(chunked(data), self.spill_path))
+
+        with open(self.spill_path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    @unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg not installed")
+    def test_ffmpeg_pipe_decode(self):
+        """Test compressed sources are decoded through ffmpeg's stdin."""
+        source = AudioSegment(data=os.urandom(44100 * 4), sample_width=2, frame_rate=44100, channels=2)
+        buffer = io.BytesIO()
+        source.export(buffer, format='flac')
+
+        audio = decode_source_stream(chunked(buffer.getvalue()), self.spill_path)
+
+        self.assertEqual(audio.raw_data, source.raw_data)
+
+class TestStreamSourceAudio(unittest.TestCase):
+    """Test the service's streaming download."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.logger_patcher = patch('audio_processor.logger', Mock())
+        self.logger_patcher.start()
+        self.service = AudioProcessingService(session_id='session')
+        self.service.s3_ops = Mock()
+        self.data = make_wav()
+        body = Mock()
+        body.iter_chunks.return_value = chunked(self.data)
+        self.service.s3_ops.open_object_stream.return_value = {
+            'body': body, 'content_length': len(self.data), 'etag': 'abc'
+        }
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.service.cleanup()
+        self.logger_patcher.stop()
+
+    def test_streamed_source_hashes_like_downloaded_source(self):
+        """Test the streamed digest gives the same content hash as the file on disk."""
+        audio, local_path = self.service.stream_source_audio('bucket', 'public/unprocessed/u/a.wav')
+
+        self.assertIsNone(local_path)
+        self.assertEqual(len(audio.raw_data), 4410 * 4)
+        self.assertEqual(self.service.source_digest.hexdigest(), hashlib.sha256(self.data).hexdigest())
+
+        path = os.path.join(tempfile.mkdtemp(), 'a.wav')
+        self.service.temp_files.append(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(self.data)
+        config = {'silence_threshold': -30}
+        self.assertEqual(compute_content_hash(None, config, source_digest=self.service.source_digest),
+                         compute_content_hash(path, config))
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
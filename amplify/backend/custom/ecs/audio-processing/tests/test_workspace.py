@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-job workspaces.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.workspace import Workspace, choose_workspace_root
+    from utils.error_handlers import ErrorRecovery, ResourceError
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+class TestWorkspace(unittest.TestCase):
+    """Test workspace accounting and cleanup."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.root)
+
+    def write(self, path, size):
+        """Write a file of the given size."""
+        with open(path, 'wb') as f:
+            f.write(b'\0' * size)
+        return path
+
+    def test_cleanup_removes_nested_tree(self):
+        """Test cleanup removes every file and directory the job created."""
+        workspace = Workspace('session-1', root=self.root)
+        self.write(os.path.join(workspace.subdir('source'), 'a.wav'), 10)
+        self.write(os.path.join(workspace.subdir('output'), 'a-0.wav'), 10)
+
+        workspace.cleanup()
+        workspace.cleanup()
+
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_accounting_and_quota(self):
+        """Test bytes are accounted per file and the quota is enforced."""
+        workspace = Workspace('session-1', root=self.root, quota_bytes=100)
+        path = self.write(os.path.join(workspace.subdir('output'), 'a.wav'), 60)
+
+        self.assertEqual(workspace.account(path), 60)
+        self.assertEqual(workspace.account(path), 60)
+        with self.assertRaises(ResourceError):
+            workspace.ensure_capacity(50)
+
+        second = self.write(os.path.join(workspace.path, 'b.wav'), 60)
+        with self.assertRaises(ResourceError):
+            workspace.account(second)
+
+    def test_context_manager_cleans_up(self):
+        """Test the workspace is removed when used as a context manager."""
+        with Workspace('session-1', root=self.root) as workspace:
+            self.write(os.path.join(workspace.path, 'a.wav'), 1)
+        self.assertFalse(os.path.exists(workspace.path))
+
+class TestWorkspaceRoot(unittest.TestCase):
+    """Test RAM-backed root selection."""
+
+    def test_small_jobs_use_ram_root(self):
+        """Test jobs below the RAM limit use the RAM root."""
+        ram_root = tempfile.gettempdir()
+        self.assertEqual(choose_workspace_root(1024, '/disk', ram_root, 4096), ram_root)
+
+    def test_large_or_unknown_jobs_use_disk(self):
+        """Test large or unsized jobs stay on disk."""
+        ram_root = tempfile.gettempdir()
+        self.assertEqual(choose_workspace_root(8192, '/disk', ram_root, 4096), '/disk')
+        self.assertEqual(choose_workspace_root(None, '/disk', ram_root, 4096), '/disk')
+        self.assertEqual(choose_workspace_root(1024, '/disk', None, 4096), '/disk')
+
+class TestCleanupTempFiles(unittest.TestCase):
+    """Test temporary path cleanup."""
+
+    def test_removes_files_and_directories(self):
+        """Test directories are removed recursively alongside files."""
+        temp_dir = tempfile.mkdtemp()
+        nested = os.path.join(temp_dir, 'nested')
+        os.makedirs(nested)
+        file_path = os.path.join(nested, 'a.wav')
+        open(file_path, 'wb').close()
+
+        ErrorRecovery.cleanup_temp_files([file_path, temp_dir])
+
+        self.assertFalse(os.path.exists(temp_dir))
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
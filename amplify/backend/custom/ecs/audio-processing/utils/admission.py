@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Admission Control for Little Bit Audio Processing Service
+Estimates a job's decoded size, peak memory and scratch disk from the source
+object's size and header before anything is downloaded or decoded, and
+decides whether this worker should take the job now, later, or not at all.
+"""
+
+import struct
+import logging
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .stream_decode import ChunkReader, parse_wav_format
+from .error_handlers import AudioProcessingError
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the start of the object to identify its format
+HEADER_PROBE_BYTES = 64 * 1024
+
+# Top-level MP4 boxes walked looking for a moov box stored after the media data
+MAX_TOP_LEVEL_BOXES = 16
+
+# Assumed parameters when the header does not give them. Low bitrates make
+# duration (and therefore memory) estimates err on the high side.
+DEFAULT_SAMPLE_RATE = 48000
+DEFAULT_CHANNELS = 2
+DEFAULT_LOSSY_BITRATE = 64000
+
+# pydub decodes lossy (float) codecs to 32-bit samples
+LOSSY_SAMPLE_WIDTH = 4
+
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000]    # MPEG 2.5
+}
+ADTS_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050,
+                     16000, 12000, 11025, 8000, 7350]
+
+class AdmissionDecision(Enum):
+    """Outcome of admission control for a job."""
+    ADMIT = "admit"
+    DEFER = "defer"
+    REROUTE = "reroute"
+    REJECT = "reject"
+
+def _probe_wav(head: bytes, source_bytes: int) -> Dict[str, Any]:
+    """Read parameters and exact duration from a RIFF/WAVE header."""
+    fmt, data_size = parse_wav_format(ChunkReader([head]))
+    frame_width = max(fmt['bits'] // 8, 1) * fmt['channels']
+    if data_size in (0, 0xFFFFFFFF) or data_size > source_bytes:
+        data_size = source_bytes
+    return {
+        'format': 'wav', 'sample_rate': fmt['frame_rate'], 'channels': fmt['channels'],
+        'sample_width': max(fmt['bits'] // 8, 2),
+        'duration_seconds': data_size / (frame_width * fmt['frame_rate']), 'exact': True
+    }
+
+def _probe_flac(head: bytes) -> Optional[Dict[str, Any]]:
+    """Read parameters and exact duration from the FLAC STREAMINFO block."""
+    if len(head) < 26:
+        return None
+    info = head[8:26]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    channels = ((info[12] >> 1) & 0x07) + 1
+    bits = (((info[12] & 0x01) << 4) | (info[13] >> 4)) + 1
+    total_samples = ((info[13] & 0x0F) << 32) | struct.unpack('>I', info[14:18])[0]
+    if not sample_rate or not total_samples:
+        return None
+    return {
+        'format': 'flac', 'sample_rate': sample_rate, 'channels': channels,
+        # 24-bit audio is held as 32-bit samples after decoding
+        'sample_width': 2 if bits <= 16 else 4,
+        'duration_seconds': total_samples / sample_rate, 'exact': True
+    }
+
+def _probe_mp4(head: bytes) -> Dict[str, Any]:
+    """Read duration (mvhd) and channel layout (mp4a) when the moov box is in the header."""
+    probe = {'format': 'm4a', 'sample_width': LOSSY_SAMPLE_WIDTH}
+
+    mvhd = head.find(b'mvhd')
+    if mvhd >= 0:
+        version = head[mvhd + 4] if mvhd + 4 < len(head) else 0
+        try:
+            if version == 1:
+                timescale, duration = struct.unpack('>IQ', head[mvhd + 24:mvhd + 36])
+            else:
+                timescale, duration = struct.unpack('>II', head[mvhd + 16:mvhd + 24])
+            if timescale:
+                probe.update(duration_seconds=duration / timescale, exact=True)
+        except struct.error:
+            pass
+
+    mp4a = head.find(b'mp4a')
+    if mp4a >= 0 and mp4a + 32 <= len(head):
+        channels = struct.unpack('>H', head[mp4a + 20:mp4a + 22])[0]
+        sample_rate = struct.unpack('>I', head[mp4a + 28:mp4a + 32])[0] >> 16
+        if channels:
+            probe['channels'] = channels
+        if sample_rate:
+            probe['sample_rate'] = sample_rate
+
+    return probe
+
+def _find_trailing_moov(read_range: Callable[[int, int], bytes], source_bytes: int) -> Optional[bytes]:
+    """
+    Locate a moov box written after mdat, as iOS does for .m4a recordings.
+
+    Walks the top-level box headers with small range reads, skipping over
+    the media data, and returns the start of the moov box (which holds mvhd
+    and the sample description).
+
+    Args:
+        read_range: Called as read_range(start, end) with an inclusive end
+        source_bytes: Total object size
+
+    Returns:
+        Up to HEADER_PROBE_BYTES from the start of moov, or None if not found
+    """
+    offset = 0
+    for _ in range(MAX_TOP_LEVEL_BOXES):
+        if offset + 8 > source_bytes:
+            return None
+        header = read_range(offset, offset + 15)
+        size, box_type = struct.unpack('>I4s', header[:8])
+        if size == 1:
+            size = struct.unpack('>Q', header[8:16])[0]
+        elif size == 0:
+            size = source_bytes - offset
+        if box_type == b'moov':
+            return read_range(offset, min(offset + HEADER_PROBE_BYTES, source_bytes) - 1)
+        if size < 8:
+            return None
+        offset += size
+    return None
+
+def _probe_mp3(head: bytes, source_bytes: int) -> Dict[str, Any]:
+    """Estimate duration from the first MPEG audio frame's bitrate."""
+    offset = 0
+    if head[:3] == b'ID3' and len(head) >= 10:
+        # Skip the ID3v2 tag (syncsafe size)
+        offset = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+
+    probe = {'format': 'mp3', 'sample_width': LOSSY_SAMPLE_WIDTH}
+    for i in range(offset, min(len(head) - 4, offset + 4096)):
+        if head[i] != 0xFF or (head[i + 1] & 0xE0) != 0xE0:
+            continue
+        version = (head[i + 1] >> 3) & 0x03
+        bitrate_index = head[i + 2] >> 4
+        rate_index = (head[i + 2] >> 2) & 0x03
+        if version == 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        bitrate = MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+        probe.update(
+            sample_rate=MP3_SAMPLE_RATES[version][rate_index],
+            channels=1 if (head[i + 3] >> 6) == 3 else 2,
+            duration_seconds=max(source_bytes - offset, 0) * 8 / bitrate
+        )
+        break
+    return probe
+
+def _probe_adts(head: bytes) -> Dict[str, Any]:
+    """Read sample rate and channels from an ADTS AAC header."""
+    probe = {'format': 'aac', 'sample_width': LOSSY_SAMPLE_WIDTH}
+    rate_index = (head[2] >> 2) & 0x0F
+    channels = ((head[2] & 0x01) << 2) | (head[3] >> 6)
+    if rate_index < len(ADTS_SAMPLE_RATES):
+        probe['sample_rate'] = ADTS_SAMPLE_RATES[rate_index]
+    if channels:
+        probe['channels'] = channels
+    return probe
+
+def probe_audio_header(head: bytes, source_bytes: int,
+                       read_range: Optional[Callable[[int, int], bytes]] = None) -> Dict[str, Any]:
+    """
+    Identify a source's format and decoded parameters from its first bytes.
+
+    Args:
+        head: First bytes of the object (HEADER_PROBE_BYTES is plenty)
+        source_bytes: Total object size
+        read_range: Optional read_range(start, end) for further byte ranges,
+            used to find the moov box of MP4 files that store it last
+
+    Returns:
+        Dict with format, sample_rate, channels, sample_width (bytes per
+        decoded sample), duration_seconds and whether the duration is exact
+    """
+    probe = None
+    try:
+        if head[:4] == b'RIFF':
+            probe = _probe_wav(head, source_bytes)
+        elif head[:4] == b'fLaC':
+            probe = _probe_flac(head)
+        elif head[4:8] == b'ftyp':
+            probe = _probe_mp4(head)
+            if not probe.get('exact') and read_range is not None and source_bytes > len(head):
+                try:
+                    moov = _find_trailing_moov(read_range, source_bytes)
+                except Exception as e:
+                    logger.warning(f"Could not read trailing moov box: {str(e)}")
+                    moov = None
+                if moov:
+                    probe = _probe_mp4(moov)
+        elif head[:3] == b'ID3':
+            probe = _probe_mp3(head, source_bytes)
+        elif len(head) > 3 and head[0] == 0xFF and (head[1] & 0xF6) == 0xF0:
+            # ADTS: 12-bit sync word with the layer bits zero
+            probe = _probe_adts(head)
+        elif len(head) > 3 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0:
+            probe = _probe_mp3(head, source_bytes)
+    except (AudioProcessingError, struct.error, IndexError) as e:
+        logger.warning(f"Could not parse source header, using defaults: {str(e)}")
+
+    probe = probe or {'format': 'unknown', 'sample_width': LOSSY_SAMPLE_WIDTH}
+    probe.setdefault('sample_rate', DEFAULT_SAMPLE_RATE)
+    probe.setdefault('channels', DEFAULT_CHANNELS)
+    if probe.get('duration_seconds') is None:
+        probe['duration_seconds'] = source_bytes * 8 / DEFAULT_LOSSY_BITRATE
+        probe['exact'] = False
+    probe.setdefault('exact', False)
+    return probe
+
+def estimate_resources(probe: Dict[str, Any], source_bytes: int, memory_factor: float = 4.0,
+                       preserve_original: bool = True) -> Dict[str, int]:
+    """
+    Estimate decoded PCM size, peak job memory and scratch disk.
+
+    Args:
+        probe: Result of probe_audio_header
+        source_bytes: Total object size
+        memory_factor: Peak memory as a multiple of the decoded PCM (the
+            decoded segment, split chunks, normalized copies and export buffers)
+        preserve_original: Whether a full-length copy is exported as well
+
+    Returns:
+        Dict with pcm_bytes, peak_memory_bytes and disk_bytes
+    """
+    pcm_bytes = int(probe['duration_seconds'] * probe['sample_rate'] *
+                    probe['channels'] * probe['sample_width'])
+    return {
+        'pcm_bytes': pcm_bytes,
+        'peak_memory_bytes': int(pcm_bytes * memory_factor),
+        # Source, one-shots (at most the whole recording) and the preserved original
+        'disk_bytes': source_bytes + pcm_bytes * (2 if preserve_original else 1),
+        'exact': bool(probe.get('exact', True))
+    }
+
+class AdmissionController:
+    """
+    Decides whether a worker takes a job given its resource estimate.
+
+    Jobs that could never fit this worker are rerouted (or rejected when no
+    reroute target exists); jobs that fit but not right now are deferred a
+    bounded number of times before being admitted anyway. Only exact
+    estimates can reroute or reject a job: a duration guessed from the file
+    size can be off by two orders of magnitude.
+    """
+
+    def __init__(self, memory_capacity_mb: Optional[int], disk_capacity_bytes: Optional[int] = None,
+                 defer_delay_seconds: int = 60, max_deferrals: int = 5, reroute_available: bool = False):
+        """
+        Initialize the controller.
+
+        Args:
+            memory_capacity_mb: Memory a single job may use on this worker, if known
+            disk_capacity_bytes: Scratch disk a single job may use (workspace quota)
+            defer_delay_seconds: How long a deferred job waits before redelivery
+            max_deferrals: Deferrals after which a job is admitted regardless of headroom
+            reroute_available: Whether oversized jobs can be sent to a larger worker pool
+        """
+        self.memory_capacity_mb = memory_capacity_mb
+        self.disk_capacity_bytes = disk_capacity_bytes
+        self.defer_delay_seconds = defer_delay_seconds
+        self.max_deferrals = max_deferrals
+        self.reroute_available = reroute_available
+
+    def decide(self, estimate: Dict[str, int], available_memory_mb: Optional[int],
+               available_disk_bytes: Optional[int], defer_count: int = 0) -> Tuple[AdmissionDecision, str]:
+        """
+        Decide what to do with a job.
+
+        Args:
+            estimate: Result of estimate_resources
+            available_memory_mb: Memory headroom on the worker right now, if known
+            available_disk_bytes: Free scratch disk right now, if known
+            defer_count: Times this job has already been deferred
+
+        Returns:
+            Tuple of (decision, human-readable reason)
+        """
+        memory_mb = estimate['peak_memory_bytes'] / (1024 * 1024)
+        disk_bytes = estimate['disk_bytes']
+
+        oversized = []
+        if self.memory_capacity_mb is not None and memory_mb > self.memory_capacity_mb:
+            oversized.append(f"needs ~{memory_mb:.0f}MB memory, worker capacity {self.memory_capacity_mb}MB")
+        if self.disk_capacity_bytes is not None and disk_bytes > self.disk_capacity_bytes:
+            oversized.append(f"needs ~{disk_bytes // (1024 * 1024)}MB disk, "
+                             f"quota {self.disk_capacity_bytes // (1024 * 1024)}MB")
+        if oversized:
+            if not estimate.get('exact', True):
+                # Waiting cannot make it fit, so deferring would only add delay
+                logger.warning(f"Admitting job with an inexact estimate over capacity: {'; '.join(oversized)}")
+                return AdmissionDecision.ADMIT, f"inexact estimate: {'; '.join(oversized)}"
+            decision = AdmissionDecision.REROUTE if self.reroute_available else AdmissionDecision.REJECT
+            return decision, '; '.join(oversized)
+
+        constrained = []
+        if available_memory_mb is not None and memory_mb > available_memory_mb:
+            constrained.append(f"needs ~{memory_mb:.0f}MB memory, {available_memory_mb}MB available")
+        if available_disk_bytes is not None and disk_bytes > available_disk_bytes:
+            constrained.append(f"needs ~{disk_bytes // (1024 * 1024)}MB disk, "
+                               f"{available_disk_bytes // (1024 * 1024)}MB free")
+        if constrained:
+            if defer_count < self.max_deferrals:
+                return AdmissionDecision.DEFER, '; '.join(constrained)
+            logger.warning(f"Admitting job after {defer_count} deferrals despite low headroom: "
+                           f"{'; '.join(constrained)}")
+
+        return AdmissionDecision.ADMIT, 'fits current headroom'
@@ -13,6 +13,7 @@ from pydub.effects import normalize
 import json
 
 from .error_handlers import AudioProcessingError, ValidationError
+from .upload_manifest import compute_file_checksum
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +70,26 @@ class AudioProcessingConfig:
         self.preserve_original = config.get('preserveOriginal', True)
         self.output_format = config.get('outputFormat', 'original')
         
+        # Dynamics: optional compressor applied to each one-shot before normalization
+        self.compress_audio = config.get('compressAudio', False)
+        self.compressor_settings = {
+            'threshold_db': self._validate_range(
+                config.get('compressorThresholdDb', -18.0), -60.0, 0.0, 'compressorThresholdDb'
+            ),
+            'ratio': self._validate_range(
+                config.get('compressorRatio', 4.0), 1.0, 20.0, 'compressorRatio'
+            ),
+            'attack_ms': self._validate_range(
+                config.get('compressorAttackMs', 5.0), 0.1, 100.0, 'compressorAttackMs'
+            ),
+            'release_ms': self._validate_range(
+                config.get('compressorReleaseMs', 100.0), 10.0, 2000.0, 'compressorReleaseMs'
+            ),
+            'lookahead_ms': self._validate_range(
+                config.get('compressorLookaheadMs', 5.0), 0.0, 20.0, 'compressorLookaheadMs'
+            )
+        }
+        
         # Auto-detection settings
         self.auto_detect_threshold = config.get('autoDetectThreshold', False)
         self.analysis_window_ms = int(self._validate_range(
@@ -108,6 +129,8 @@ class AudioProcessingConfig:
             'target_dbfs': self.target_dbfs,
             'preserve_original': self.preserve_original,
             'output_format': self.output_format,
+            'compress_audio': self.compress_audio,
+            'compressor_settings': self.compressor_settings,
             'auto_detect_threshold': self.auto_detect_threshold,
             'quality_settings': self.quality_settings
         }
@@ -219,6 +242,31 @@ class AudioProcessor:
             logger.info(f"Loading audio file: {input_path} (format: {file_ext})")
             audio = AudioSegment.from_file(input_path, format=file_ext)
             
+            return self.process_audio_segment(audio, output_dir, base_filename)
+            
+        except Exception as e:
+            if isinstance(e, (AudioProcessingError, ValidationError)):
+                raise
+            else:
+                raise AudioProcessingError(f"Audio processing failed: {str(e)}")
+    
+    def process_audio_segment(self, audio: AudioSegment, output_dir: str, 
+                              base_filename: str) -> List[Dict[str, Any]]:
+        """
+        Create one-shots from already decoded audio.
+        
+        Args:
+            audio: Decoded source audio
+            output_dir: Directory for output files
+            base_filename: Base filename for output files
+            
+        Returns:
+            List of processing results with file information
+        """
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        
+        try:
             # Analyze audio characteristics
             analysis = self.analyze_audio(audio)
             
@@ -320,6 +368,10 @@ class AudioProcessor:
             
             padded_chunk = beginning_silence + chunk + ending_silence
             
+            # Compress before normalizing so the target level applies to the compressed signal
+            if self.config.compress_audio:
+                padded_chunk = self._compress_chunk(padded_chunk)
+            
             # Normalize audio if enabled
             if self.config.normalize_audio:
                 normalized_chunk = self._normalize_chunk(padded_chunk)
@@ -347,6 +399,7 @@ class AudioProcessor:
                 'format': output_format,
                 'duration_seconds': normalized_chunk.duration_seconds,
                 'file_size_bytes': os.path.getsize(output_path),
+                'sha256': compute_file_checksum(output_path),
                 'chunk_index': index,
                 'dbfs': normalized_chunk.dBFS,
                 'max_dbfs': normalized_chunk.max_dBFS
@@ -361,6 +414,37 @@ class AudioProcessor:
         except Exception as e:
             raise AudioProcessingError(f"Chunk processing failed for index {index}: {str(e)}")
     
+    def _compress_chunk(self, chunk: AudioSegment) -> AudioSegment:
+        """
+        Apply the configured compressor to an audio chunk.
+        
+        Args:
+            chunk: Audio chunk to compress
+            
+        Returns:
+            Compressed audio chunk
+        """
+        try:
+            import numpy as np
+            from .dynamics import compress
+            
+            # PCM samples to float32 frames in [-1, 1)
+            full_scale = float(1 << (8 * chunk.sample_width - 1))
+            samples = np.array(chunk.get_array_of_samples())
+            frames = samples.astype(np.float32).reshape(-1, chunk.channels)
+            frames *= np.float32(1.0 / full_scale)
+            
+            compress(frames, chunk.frame_rate, **self.config.compressor_settings)
+            
+            frames *= np.float32(full_scale)
+            np.rint(frames, out=frames)
+            np.clip(frames, -full_scale, full_scale - 1, out=frames)
+            return chunk._spawn(frames.astype(samples.dtype).tobytes())
+            
+        except Exception as e:
+            logger.warning(f"Compression failed, using uncompressed chunk: {str(e)}")
+            return chunk
+    
     def _normalize_chunk(self, chunk: AudioSegment) -> AudioSegment:
         """
         Normalize audio chunk to target dBFS level.
@@ -413,6 +497,7 @@ class AudioProcessor:
                 'format': output_format,
                 'duration_seconds': audio.duration_seconds,
                 'file_size_bytes': os.path.getsize(output_path),
+                'sha256': compute_file_checksum(output_path),
                 'chunk_index': -1,  # Indicates original file
                 'dbfs': audio.dBFS,
                 'max_dbfs': audio.max_dBFS
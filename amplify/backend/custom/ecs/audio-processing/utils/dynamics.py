@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Dynamics Processing for Little Bit Audio Processing Service
+Feed-forward compressor/limiter with lookahead, computed in vectorized form.
+
+The ECS service and the Lambda keep identical copies of this file; change
+both together (lambda-audio-processing/tests/test_compressor.py checks).
+"""
+
+import logging
+from typing import Optional, Union
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d, uniform_filter1d
+from scipy.signal import lfilter
+
+logger = logging.getLogger(__name__)
+
+# Floor for level detection, well below 16-bit quantization
+MIN_LEVEL_DB = -120.0
+
+# Samples per step of the release scan; bounds float64 temporaries
+SCAN_CHUNK_SAMPLES = 1 << 16
+
+def _time_coefficient(time_ms: float, sample_rate: int) -> float:
+    """One-pole coefficient for a time constant in milliseconds."""
+    if time_ms <= 0:
+        return 0.0
+    return float(np.exp(-1000.0 / (time_ms * sample_rate)))
+
+def detect_level_db(audio_data: np.ndarray, sample_rate: int, detector: str = 'peak',
+                    rms_window_ms: float = 10.0) -> np.ndarray:
+    """
+    Detector level in dBFS, linked across channels.
+
+    Args:
+        audio_data: float32 samples, shape (n,) or (n, channels)
+        sample_rate: Sample rate in Hz
+        detector: 'peak' for instantaneous magnitude, 'rms' for a one-pole
+            mean-square average over rms_window_ms
+        rms_window_ms: RMS averaging time constant
+
+    Returns:
+        float32 level per sample
+    """
+    if audio_data.ndim == 2:
+        magnitude = np.max(np.abs(audio_data), axis=1)
+    else:
+        magnitude = np.abs(audio_data)
+
+    if detector == 'rms':
+        coefficient = _time_coefficient(rms_window_ms, sample_rate)
+        magnitude *= magnitude
+        power = lfilter([1.0 - coefficient], [1.0, -coefficient], magnitude).astype(np.float32)
+        np.maximum(power, np.float32(10 ** (MIN_LEVEL_DB / 10)), out=power)
+        return np.float32(10.0) * np.log10(power)
+    if detector != 'peak':
+        raise ValueError(f"Unknown detector: {detector}")
+
+    np.maximum(magnitude, np.float32(10 ** (MIN_LEVEL_DB / 20)), out=magnitude)
+    return np.float32(20.0) * np.log10(magnitude)
+
+def static_gain_reduction_db(level_db: np.ndarray, threshold_db: float, ratio: float,
+                             knee_db: float = 0.0) -> np.ndarray:
+    """
+    Gain computer: dB of reduction for each input level, with a soft knee.
+
+    Args:
+        level_db: Detector level in dBFS
+        threshold_db: Threshold in dBFS
+        ratio: Compression ratio; float('inf') for a limiter
+        knee_db: Knee width in dB
+
+    Returns:
+        Non-negative reduction in dB
+    """
+    slope = np.float32(1.0 - 1.0 / ratio)
+    over = np.asarray(level_db, dtype=np.float32) - np.float32(threshold_db)
+
+    if knee_db <= 0:
+        return np.maximum(over, 0.0) * slope
+
+    half_knee = np.float32(knee_db / 2)
+    knee_part = np.clip(over + half_knee, 0.0, knee_db)
+    reduction = knee_part * knee_part * (slope / np.float32(2 * knee_db))
+    reduction += np.maximum(over - half_knee, 0.0) * slope
+    return reduction
+
+def _release_envelope(target: np.ndarray, coefficient: float) -> np.ndarray:
+    """
+    Peak-hold with exponential release: r[n] = max(target[n], coefficient * r[n-1]).
+
+    The recurrence is a running maximum in the log domain,
+    log r[n] = n log a + max(log r[-1] + log a, cummax(log target[m] - m log a)),
+    evaluated chunk by chunk with the last value carried over.
+    """
+    if coefficient <= 0:
+        return target
+
+    envelope = np.empty_like(target)
+    log_coefficient = np.log(coefficient)
+    previous = 0.0
+
+    for start in range(0, len(target), SCAN_CHUNK_SAMPLES):
+        values = target[start:start + SCAN_CHUNK_SAMPLES].astype(np.float64)
+        steps = np.arange(len(values), dtype=np.float64) * log_coefficient
+        with np.errstate(divide='ignore'):
+            scan = np.maximum.accumulate(np.log(values) - steps)
+        if previous > 0:
+            np.maximum(scan, np.log(previous) + log_coefficient, out=scan)
+        scan += steps
+        chunk = np.exp(scan)
+        envelope[start:start + len(chunk)] = chunk
+        previous = chunk[-1]
+
+    return envelope
+
+def compute_gain_db(audio_data: np.ndarray, sample_rate: int, threshold_db: float = -18.0,
+                    ratio: float = 4.0, knee_db: float = 6.0, attack_ms: float = 5.0,
+                    release_ms: float = 100.0, lookahead_ms: float = 5.0, detector: str = 'peak',
+                    rms_window_ms: float = 10.0) -> np.ndarray:
+    """
+    Per-sample gain in dB (zero or negative) for a feed-forward compressor.
+
+    The static reduction is held with an exponential release, then held over
+    the lookahead window and smoothed by a moving average over the attack
+    time, so the gain is fully down when a peak arrives instead of after it.
+
+    Args:
+        audio_data: float32 samples, shape (n,) or (n, channels)
+        sample_rate: Sample rate in Hz
+        threshold_db: Threshold in dBFS
+        ratio: Compression ratio; float('inf') for a limiter
+        knee_db: Knee width in dB
+        attack_ms: Attack time
+        release_ms: Release time constant
+        lookahead_ms: Lookahead; raised to the attack time if shorter when non-zero
+        detector: 'peak' or 'rms'
+        rms_window_ms: RMS averaging time constant
+
+    Returns:
+        float32 gain in dB per sample
+    """
+    level_db = detect_level_db(audio_data, sample_rate, detector, rms_window_ms)
+    reduction = static_gain_reduction_db(level_db, threshold_db, ratio, knee_db)
+    reduction = _release_envelope(reduction, _time_coefficient(release_ms, sample_rate))
+
+    attack = max(1, int(round(attack_ms * sample_rate / 1000)))
+    lookahead = int(round(lookahead_ms * sample_rate / 1000))
+    if lookahead:
+        lookahead = max(lookahead, attack - 1)
+        # Maximum over [n, n + lookahead]
+        reduction = maximum_filter1d(reduction, size=lookahead + 1, origin=-(lookahead // 2) - (lookahead % 2),
+                                     mode='nearest')
+    if attack > 1:
+        # Mean over [n - attack + 1, n]
+        reduction = uniform_filter1d(reduction, size=attack, origin=(attack - 1) // 2, mode='nearest')
+
+    return (-reduction).astype(np.float32, copy=False)
+
+def compress(audio_data: np.ndarray, sample_rate: int, threshold_db: float = -18.0, ratio: float = 4.0,
+             knee_db: float = 6.0, attack_ms: float = 5.0, release_ms: float = 100.0,
+             lookahead_ms: float = 5.0, makeup_db: Union[float, str, None] = 0.0,
+             detector: str = 'peak', rms_window_ms: float = 10.0) -> np.ndarray:
+    """
+    Compress a float32 signal in place.
+
+    Args:
+        audio_data: float32 samples, shape (n,) or (n, channels), modified in place
+        sample_rate: Sample rate in Hz
+        threshold_db: Threshold in dBFS
+        ratio: Compression ratio; float('inf') for a limiter
+        knee_db: Knee width in dB
+        attack_ms: Attack time
+        release_ms: Release time constant
+        lookahead_ms: Lookahead time
+        makeup_db: Gain added after compression, or 'auto' for half the
+            reduction a full-scale signal would get
+        detector: 'peak' or 'rms'
+        rms_window_ms: RMS averaging time constant
+
+    Returns:
+        audio_data
+    """
+    if ratio < 1:
+        raise ValueError(f"Compression ratio must be at least 1, got {ratio}")
+    if len(audio_data) == 0:
+        return audio_data
+
+    if makeup_db == 'auto':
+        makeup_db = 0.5 * float(static_gain_reduction_db(np.float32(0.0), threshold_db, ratio, knee_db))
+
+    gain = compute_gain_db(audio_data, sample_rate, threshold_db, ratio, knee_db, attack_ms,
+                           release_ms, lookahead_ms, detector, rms_window_ms)
+    if makeup_db:
+        gain += np.float32(makeup_db)
+
+    # dB to linear in place: 10 ** (g / 20)
+    gain *= np.float32(np.log(10) / 20)
+    np.exp(gain, out=gain)
+
+    if audio_data.ndim == 2:
+        audio_data *= gain[:, np.newaxis]
+    else:
+        audio_data *= gain
+    return audio_data
+
+def limit(audio_data: np.ndarray, sample_rate: int, ceiling_db: float = -1.0,
+          release_ms: float = 50.0, lookahead_ms: float = 5.0) -> np.ndarray:
+    """
+    Brickwall limiter: infinite ratio, hard knee, instant attack with lookahead.
+
+    Args:
+        audio_data: float32 samples, modified in place
+        sample_rate: Sample rate in Hz
+        ceiling_db: Output ceiling in dBFS
+        release_ms: Release time constant
+        lookahead_ms: Lookahead time
+
+    Returns:
+        audio_data
+    """
+    return compress(audio_data, sample_rate, threshold_db=ceiling_db, ratio=float('inf'), knee_db=0.0,
+                    attack_ms=lookahead_ms, release_ms=release_ms, lookahead_ms=lookahead_ms)
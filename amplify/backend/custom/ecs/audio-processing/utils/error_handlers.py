@@ -213,22 +213,26 @@ class ErrorRecovery:
     
     @staticmethod
     def cleanup_temp_files(file_paths: list) -> None:
-        """Clean up temporary files on error."""
+        """Clean up temporary files and directories on error."""
         import os
+        import shutil
         for file_path in file_paths:
             try:
-                if os.path.exists(file_path):
+                if os.path.isdir(file_path) and not os.path.islink(file_path):
+                    shutil.rmtree(file_path)
+                    logger.info(f"Cleaned up temporary directory: {file_path}")
+                elif os.path.lexists(file_path):
                     os.remove(file_path)
                     logger.info(f"Cleaned up temporary file: {file_path}")
             except Exception as e:
                 logger.warning(f"Failed to clean up {file_path}: {str(e)}")
     
     @staticmethod
-    def check_disk_space(required_mb: int = 100) -> bool:
+    def check_disk_space(required_mb: int = 100, path: str = '/tmp') -> bool:
         """Check if sufficient disk space is available."""
         import shutil
         try:
-            total, used, free = shutil.disk_usage('/tmp')
+            total, used, free = shutil.disk_usage(path)
             free_mb = free // (1024 * 1024)
             
             if free_mb < required_mb:
@@ -241,6 +245,54 @@ class ErrorRecovery:
             logger.error(f"Failed to check disk space: {str(e)}")
             return False
     
+    @staticmethod
+    def get_available_memory_mb() -> Optional[int]:
+        """Get available memory in MB, honouring the container cgroup limit."""
+        available = None
+        try:
+            with open('/proc/meminfo') as meminfo:
+                for line in meminfo:
+                    if line.startswith('MemAvailable:'):
+                        available = int(line.split()[1]) // 1024
+                        break
+        except (OSError, ValueError):
+            pass
+        
+        # Fargate tasks are limited by cgroup, not by host memory
+        try:
+            with open('/sys/fs/cgroup/memory.max') as f:
+                limit = f.read().strip()
+            with open('/sys/fs/cgroup/memory.current') as f:
+                current = int(f.read().strip())
+            if limit != 'max':
+                cgroup_available = (int(limit) - current) // (1024 * 1024)
+                available = cgroup_available if available is None else min(available, cgroup_available)
+        except (OSError, ValueError):
+            pass
+        
+        return available
+
+    @staticmethod
+    def get_memory_limit_mb() -> Optional[int]:
+        """Get total memory in MB the container may use (cgroup limit, else host memory)."""
+        try:
+            with open('/sys/fs/cgroup/memory.max') as f:
+                limit = f.read().strip()
+            if limit != 'max':
+                return int(limit) // (1024 * 1024)
+        except (OSError, ValueError):
+            pass
+
+        try:
+            with open('/proc/meminfo') as meminfo:
+                for line in meminfo:
+                    if line.startswith('MemTotal:'):
+                        return int(line.split()[1]) // 1024
+        except (OSError, ValueError):
+            pass
+
+        return None
+
     @staticmethod
     def validate_environment() -> None:
         """Validate required environment variables and configurations."""
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Idempotency Utilities for Little Bit Audio Processing Service
+Suppresses duplicate jobs from at-least-once SQS delivery and repeated S3
+events by fingerprinting each job and recording a completion marker.
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Result fields worth keeping in a completion marker (local paths are not)
+MARKER_RESULT_FIELDS = [
+    'filename', 'format', 'duration_seconds', 'file_size_bytes', 'chunk_index',
+    'dbfs', 'max_dbfs', 's3_key', 's3_bucket', 'upload_success'
+]
+
+def normalize_processing_params(params: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """
+    Normalize PROCESSING_PARAMS so equivalent requests fingerprint identically.
+
+    Args:
+        params: PROCESSING_PARAMS as a JSON string or dictionary
+
+    Returns:
+        Dictionary with null values removed
+    """
+    if isinstance(params, str):
+        try:
+            params = json.loads(params or '{}')
+        except json.JSONDecodeError:
+            params = {}
+
+    if not isinstance(params, dict):
+        return {}
+
+    return {k: v for k, v in params.items() if v is not None}
+
+def compute_job_fingerprint(bucket: str, key: str, etag: str,
+                            params: Union[str, Dict[str, Any], None]) -> str:
+    """
+    Compute a stable fingerprint for a processing job.
+
+    Args:
+        bucket: Source S3 bucket
+        key: Source S3 key
+        etag: Source object ETag (identifies the exact object version)
+        params: PROCESSING_PARAMS as a JSON string or dictionary
+
+    Returns:
+        Hex SHA-256 fingerprint
+    """
+    canonical = json.dumps({
+        'bucket': bucket,
+        'key': key,
+        'etag': etag.strip('"'),
+        'params': normalize_processing_params(params)
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class IdempotencyStore:
+    """
+    Completion markers for processed jobs.
+
+    Markers are small JSON objects stored in S3 under a private prefix, with
+    an in-process LRU index in front so a long-running service answers
+    repeated duplicates without any S3 request.
+    """
+
+    # Shared across instances: the service creates one store per request
+    _local_index: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+    _index_lock = threading.Lock()
+
+    def __init__(self, s3_ops, bucket: str, prefix: str = 'processing-manifests/jobs',
+                 local_index_size: int = 1024):
+        """
+        Initialize the idempotency store.
+
+        Args:
+            s3_ops: S3Operations instance
+            bucket: Bucket holding the completion markers
+            prefix: Key prefix for completion markers
+            local_index_size: Number of markers kept in the local index
+        """
+        self.s3_ops = s3_ops
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.local_index_size = local_index_size
+
+    def marker_key(self, fingerprint: str) -> str:
+        """S3 key of the completion marker for a fingerprint."""
+        return f"{self.prefix}/{fingerprint}.json"
+
+    def get_completed(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the completion marker for a job.
+
+        Args:
+            fingerprint: Job fingerprint
+
+        Returns:
+            Marker dictionary, or None if the job has not completed
+        """
+        with self._index_lock:
+            marker = self._local_index.get(fingerprint)
+            if marker is not None:
+                self._local_index.move_to_end(fingerprint)
+                return marker
+
+        try:
+            data = self.s3_ops.get_object_bytes(self.bucket, self.marker_key(fingerprint))
+        except Exception as e:
+            # A failed lookup must never block processing
+            logger.warning(f"Completion marker lookup failed, processing anyway: {str(e)}")
+            return None
+
+        if data is None:
+            return None
+
+        try:
+            marker = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed completion marker: {self.marker_key(fingerprint)}")
+            return None
+
+        self._remember(fingerprint, marker)
+        return marker
+
+    def mark_completed(self, fingerprint: str, job: Dict[str, Any],
+                       results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Record a job as completed.
+
+        Args:
+            fingerprint: Job fingerprint
+            job: Job identity (bucket, key, etag, user_id, session_id)
+            results: Upload results produced by the job
+
+        Returns:
+            The stored marker
+        """
+        marker = {
+            'fingerprint': fingerprint,
+            'completedAt': time.time(),
+            **job,
+            'results': [
+                {k: r[k] for k in MARKER_RESULT_FIELDS if k in r}
+                for r in results
+            ]
+        }
+
+        try:
+            self.s3_ops.put_object_bytes(
+                self.bucket, self.marker_key(fingerprint),
+                json.dumps(marker, default=str).encode('utf-8')
+            )
+        except Exception as e:
+            # Outputs are already uploaded; a missing marker only costs a re-run
+            logger.warning(f"Failed to write completion marker: {str(e)}")
+
+        self._remember(fingerprint, marker)
+        return marker
+
+    def _remember(self, fingerprint: str, marker: Dict[str, Any]) -> None:
+        """Add a marker to the local LRU index."""
+        with self._index_lock:
+            self._local_index[fingerprint] = marker
+            self._local_index.move_to_end(fingerprint)
+            while len(self._local_index) > self.local_index_size:
+                self._local_index.popitem(last=False)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+SQS Message Routing for Little Bit Audio Processing Service
+Decides what happens to a queue message after a processing attempt and keeps
+a per-message attempt history in message attributes.
+"""
+
+import json
+import time
+import logging
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from .error_handlers import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Message attribute carrying the JSON-encoded attempt history
+ATTEMPT_HISTORY_ATTRIBUTE = 'AttemptHistory'
+FAILURE_CATEGORY_ATTRIBUTE = 'FailureCategory'
+FAILURE_REASON_ATTRIBUTE = 'FailureReason'
+DEFER_COUNT_ATTRIBUTE = 'DeferCount'
+
+# Keep the history attribute well below the 256KB SQS message limit
+MAX_HISTORY_ENTRIES = 10
+MAX_ERROR_MESSAGE_LENGTH = 256
+
+# SQS caps DelaySeconds at 15 minutes
+MAX_DELAY_SECONDS = 900
+
+# Fields every processing job message must carry
+REQUIRED_MESSAGE_FIELDS = ['bucket', 'key', 'userId', 'recordId']
+
+class MessageDisposition(Enum):
+    """Outcome of routing a processed message."""
+    COMPLETED = "completed"
+    RETRY = "retry"
+    DEAD_LETTER = "dead_letter"
+    DEFERRED = "deferred"
+    REROUTED = "rerouted"
+
+def parse_job_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse and validate the body of a processing job message.
+
+    Args:
+        message: SQS message as returned by receive_message
+
+    Returns:
+        Parsed message body
+
+    Raises:
+        ValidationError: If the body is not JSON or is missing required fields
+    """
+    try:
+        body = json.loads(message['Body'])
+    except (TypeError, ValueError) as e:
+        raise ValidationError(f"SQS message body is not valid JSON: {str(e)}")
+
+    if not isinstance(body, dict):
+        raise ValidationError("SQS message body must be a JSON object")
+
+    missing_fields = [field for field in REQUIRED_MESSAGE_FIELDS if field not in body]
+    if missing_fields:
+        raise ValidationError(f"Missing required fields in SQS message: {missing_fields}")
+
+    return body
+
+def get_attempt_history(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Read the attempt history carried by an SQS message.
+
+    Args:
+        message: SQS message as returned by receive_message
+
+    Returns:
+        List of previous attempt records (oldest first)
+    """
+    attribute = message.get('MessageAttributes', {}).get(ATTEMPT_HISTORY_ATTRIBUTE)
+    if not attribute:
+        return []
+
+    try:
+        history = json.loads(attribute.get('StringValue', '[]'))
+        return history if isinstance(history, list) else []
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed attempt history on message {message.get('MessageId')}")
+        return []
+
+def get_defer_count(message: Dict[str, Any]) -> int:
+    """
+    Read how many times admission control has deferred a message.
+
+    Args:
+        message: SQS message as returned by receive_message
+
+    Returns:
+        Number of previous deferrals
+    """
+    attribute = message.get('MessageAttributes', {}).get(DEFER_COUNT_ATTRIBUTE)
+    try:
+        return int(attribute.get('StringValue', '0')) if attribute else 0
+    except (TypeError, ValueError):
+        return 0
+
+def build_attempt_record(result: Dict[str, Any], attempt: int) -> Dict[str, Any]:
+    """
+    Summarize a processing result as an attempt history entry.
+
+    Args:
+        result: Response dictionary from AudioProcessingService.process_request
+        attempt: 1-based attempt number
+
+    Returns:
+        Attempt record dictionary
+    """
+    error = result.get('error', {})
+    return {
+        'attempt': attempt,
+        'sessionId': result.get('sessionId'),
+        'statusCode': result.get('statusCode', 500),
+        'category': error.get('category', 'unknown'),
+        'recoverable': error.get('recoverable', True),
+        'message': str(error.get('message', result.get('message', '')))[:MAX_ERROR_MESSAGE_LENGTH],
+        'timestamp': time.time()
+    }
+
+def determine_disposition(result: Dict[str, Any], attempts: int, max_attempts: int) -> MessageDisposition:
+    """
+    Decide what to do with a message based on the processing result.
+
+    Non-recoverable errors (validation, configuration, resource) are routed to
+    the dead-letter destination immediately instead of waiting for the
+    visibility timeout to expire max_attempts times.
+
+    Args:
+        result: Response dictionary from AudioProcessingService.process_request
+        attempts: Number of attempts made so far, including this one
+        max_attempts: Maximum attempts before giving up on recoverable errors
+
+    Returns:
+        MessageDisposition for the message
+    """
+    if result.get('statusCode') == 200:
+        return MessageDisposition.COMPLETED
+
+    error = result.get('error', {})
+    if not error.get('recoverable', True):
+        return MessageDisposition.DEAD_LETTER
+
+    if attempts >= max_attempts:
+        return MessageDisposition.DEAD_LETTER
+
+    return MessageDisposition.RETRY
+
+def calculate_retry_delay(attempts: int, base_delay: int = 30) -> int:
+    """Calculate exponential backoff delay in seconds for a requeued message."""
+    return min(base_delay * (2 ** max(attempts - 1, 0)), MAX_DELAY_SECONDS)
+
+class MessageRouter:
+    """
+    Routes SQS messages after processing: delete on success, requeue with
+    backoff on recoverable failure, dead-letter on non-recoverable failure.
+    Jobs turned away by admission control are deferred or rerouted without
+    counting as attempts.
+    """
+
+    def __init__(self, sqs_client, queue_url: str, dead_letter_queue_url: Optional[str] = None,
+                 max_attempts: int = 3, retry_base_delay: int = 30,
+                 reroute_queue_url: Optional[str] = None):
+        """
+        Initialize the message router.
+
+        Args:
+            sqs_client: boto3 SQS client
+            queue_url: URL of the processing queue
+            dead_letter_queue_url: Optional dead-letter queue URL; discovered from the
+                queue's RedrivePolicy when not provided
+            max_attempts: Maximum attempts for recoverable failures
+            retry_base_delay: Base delay in seconds for requeue backoff
+            reroute_queue_url: Optional queue for jobs too large for this worker pool
+        """
+        self.sqs = sqs_client
+        self.queue_url = queue_url
+        self.reroute_queue_url = reroute_queue_url
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.dead_letter_queue_url = dead_letter_queue_url or self._discover_dead_letter_queue()
+
+    def _discover_dead_letter_queue(self) -> Optional[str]:
+        """Look up the dead-letter queue URL from the source queue's redrive policy."""
+        try:
+            response = self.sqs.get_queue_attributes(
+                QueueUrl=self.queue_url,
+                AttributeNames=['RedrivePolicy']
+            )
+            redrive_policy = response.get('Attributes', {}).get('RedrivePolicy')
+            if not redrive_policy:
+                return None
+
+            target_arn = json.loads(redrive_policy).get('deadLetterTargetArn', '')
+            queue_name = target_arn.split(':')[-1]
+            if not queue_name:
+                return None
+
+            return self.sqs.get_queue_url(QueueName=queue_name)['QueueUrl']
+        except Exception as e:
+            logger.warning(f"Could not discover dead-letter queue: {str(e)}")
+            return None
+
+    def route(self, message: Dict[str, Any], result: Dict[str, Any]) -> MessageDisposition:
+        """
+        Apply the disposition for a processed message.
+
+        Args:
+            message: SQS message as returned by receive_message
+            result: Response dictionary from AudioProcessingService.process_request
+
+        Returns:
+            The MessageDisposition that was applied
+        """
+        admission = result.get('admission')
+        if admission and admission.get('decision') in ('defer', 'reroute'):
+            return self._route_admission(message, admission)
+        
+        history = get_attempt_history(message)
+        receive_count = int(message.get('Attributes', {}).get('ApproximateReceiveCount', 1))
+        previous_attempts = history[-1].get('attempt', len(history)) if history else 0
+        attempts = max(previous_attempts + 1, receive_count)
+
+        disposition = determine_disposition(result, attempts, self.max_attempts)
+
+        if disposition == MessageDisposition.COMPLETED:
+            self._delete(message)
+            return disposition
+
+        history = (history + [build_attempt_record(result, attempts)])[-MAX_HISTORY_ENTRIES:]
+
+        if disposition == MessageDisposition.RETRY:
+            delay = calculate_retry_delay(attempts, self.retry_base_delay)
+            if self._send(self.queue_url, message, history, result, delay_seconds=delay):
+                self._delete(message)
+                logger.warning(f"Requeued message {message['MessageId']} for attempt {attempts + 1} "
+                               f"in {delay}s")
+            else:
+                logger.error(f"Failed to requeue message {message['MessageId']}, "
+                             f"leaving it for visibility timeout redelivery")
+            return disposition
+
+        failure = history[-1]
+        if self.dead_letter_queue_url:
+            if not self._send(self.dead_letter_queue_url, message, history, result):
+                logger.error(f"Failed to dead-letter message {message['MessageId']}, "
+                             f"leaving it for queue redrive")
+                return disposition
+            logger.error(f"Dead-lettered message {message['MessageId']} after {attempts} attempt(s)",
+                         extra={'message_id': message['MessageId'], 'error_category': failure['category'],
+                                'recoverable': failure['recoverable'], 'attempts': attempts})
+        else:
+            logger.error(f"Discarding message {message['MessageId']} after {attempts} attempt(s): "
+                         f"{failure['message']}",
+                         extra={'message_id': message['MessageId'], 'error_category': failure['category'],
+                                'recoverable': failure['recoverable'], 'attempts': attempts,
+                                'attempt_history': json.dumps(history)})
+
+        self._delete(message)
+        return disposition
+
+    def _route_admission(self, message: Dict[str, Any], admission: Dict[str, Any]) -> MessageDisposition:
+        """Defer a job to later on this queue, or reroute it to the large-job queue."""
+        attributes = self._copy_attributes(message)
+        if admission['decision'] == 'defer':
+            disposition = MessageDisposition.DEFERRED
+            target_url = self.queue_url
+            delay = min(int(admission.get('delaySeconds', 60)), MAX_DELAY_SECONDS)
+            attributes[DEFER_COUNT_ATTRIBUTE] = {
+                'DataType': 'Number',
+                'StringValue': str(get_defer_count(message) + 1)
+            }
+        else:
+            disposition = MessageDisposition.REROUTED
+            target_url = self.reroute_queue_url
+            delay = 0
+
+        if not target_url:
+            logger.error(f"No queue to {admission['decision']} message {message['MessageId']} to, "
+                         f"leaving it for visibility timeout redelivery")
+            return disposition
+
+        try:
+            # A fresh message keeps deferrals from counting toward the redrive maxReceiveCount
+            self.sqs.send_message(
+                QueueUrl=target_url,
+                MessageBody=message['Body'],
+                DelaySeconds=delay,
+                MessageAttributes=attributes
+            )
+        except Exception as e:
+            logger.error(f"Failed to {admission['decision']} message {message['MessageId']}: {str(e)}")
+            return disposition
+
+        self._delete(message)
+        logger.info(f"Message {message['MessageId']} {disposition.value}: {admission.get('reason')}",
+                    extra={'message_id': message['MessageId'], 'delay_seconds': delay})
+        return disposition
+
+    @staticmethod
+    def _copy_attributes(message: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the original message attributes in send_message form."""
+        return {
+            name: {k: v for k, v in value.items() if k in ('DataType', 'StringValue', 'BinaryValue')}
+            for name, value in message.get('MessageAttributes', {}).items()
+        }
+
+    def _build_attributes(self, message: Dict[str, Any], history: List[Dict[str, Any]],
+                          result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy the original message attributes and attach the updated attempt history."""
+        attributes = self._copy_attributes(message)
+        error = result.get('error', {})
+        attributes[ATTEMPT_HISTORY_ATTRIBUTE] = {
+            'DataType': 'String',
+            'StringValue': json.dumps(history)
+        }
+        attributes[FAILURE_CATEGORY_ATTRIBUTE] = {
+            'DataType': 'String',
+            'StringValue': error.get('category', 'unknown')
+        }
+        attributes[FAILURE_REASON_ATTRIBUTE] = {
+            'DataType': 'String',
+            'StringValue': history[-1]['message'] or 'unknown'
+        }
+        return attributes
+
+    def _send(self, queue_url: str, message: Dict[str, Any], history: List[Dict[str, Any]],
+              result: Dict[str, Any], delay_seconds: int = 0) -> bool:
+        """Send a copy of the message with updated attributes to the given queue."""
+        try:
+            self.sqs.send_message(
+                QueueUrl=queue_url,
+                MessageBody=message['Body'],
+                DelaySeconds=delay_seconds,
+                MessageAttributes=self._build_attributes(message, history, result)
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send message to {queue_url}: {str(e)}")
+            return False
+
+    def _delete(self, message: Dict[str, Any]) -> None:
+        """Delete the message from the processing queue."""
+        self.sqs.delete_message(
+            QueueUrl=self.queue_url,
+            ReceiptHandle=message['ReceiptHandle']
+        )
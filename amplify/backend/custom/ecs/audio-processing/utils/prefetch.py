@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Job Prefetching for Little Bit Audio Processing Service
+Receives the next SQS message and downloads its source file while the current
+job is processing, keeping visibility alive on every message it holds.
+"""
+
+import os
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from .error_handlers import ErrorRecovery, ProcessingError, StorageError
+from .message_routing import parse_job_message
+
+logger = logging.getLogger(__name__)
+
+class PrefetchedJob:
+    """A received message, and its downloaded source file when prefetch succeeded."""
+
+    def __init__(self, message: Dict[str, Any]):
+        """
+        Initialize a prefetched job.
+
+        Args:
+            message: SQS message as returned by receive_message
+        """
+        self.message = message
+        self.body: Optional[Dict[str, Any]] = None
+        self.local_path: Optional[str] = None
+        self.temp_dir: Optional[str] = None
+        self.size_bytes = 0
+        self.etag: Optional[str] = None
+        self.error: Optional[ProcessingError] = None
+
+    @property
+    def receipt_handle(self) -> str:
+        """Receipt handle of the underlying message."""
+        return self.message['ReceiptHandle']
+
+    def discard_files(self) -> None:
+        """Remove the prefetched source file and its directory."""
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.local_path = None
+        self.temp_dir = None
+
+class JobPrefetcher:
+    """
+    Background prefetch stage for service mode.
+
+    A receiver thread pulls up to max_depth messages ahead of the worker and
+    downloads their sources, as long as the prefetched bytes stay within the
+    disk budget and available memory stays above the memory reserve. A
+    source's bytes count against the budget until its job is released. A
+    heartbeat thread extends visibility on every held message, including the
+    one currently being processed, until it is released.
+    """
+
+    def __init__(self, sqs_client, queue_url: str, s3_ops, max_depth: int = 1,
+                 disk_budget_mb: int = 500, min_free_memory_mb: int = 512,
+                 visibility_timeout: int = 900, heartbeat_interval: Optional[int] = None,
+                 wait_time_seconds: int = 20, max_source_bytes: Optional[int] = None):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            sqs_client: boto3 SQS client
+            queue_url: URL of the processing queue
+            s3_ops: S3Operations instance used for source downloads
+            max_depth: Maximum number of jobs held ahead of the worker
+            disk_budget_mb: Maximum bytes of prefetched-but-unprocessed sources
+            min_free_memory_mb: Memory that must remain available to prefetch
+            visibility_timeout: Visibility timeout in seconds applied to held messages
+            heartbeat_interval: Seconds between visibility extensions (default: a third of the timeout)
+            wait_time_seconds: SQS long polling wait time
+            max_source_bytes: Sources larger than this are left to the worker,
+                which rejects them
+        """
+        self.sqs = sqs_client
+        self.queue_url = queue_url
+        self.s3_ops = s3_ops
+        self.max_depth = max(1, max_depth)
+        self.disk_budget_bytes = disk_budget_mb * 1024 * 1024
+        self.min_free_memory_mb = min_free_memory_mb
+        self.visibility_timeout = visibility_timeout
+        self.heartbeat_interval = heartbeat_interval or max(visibility_timeout // 3, 1)
+        self.wait_time_seconds = wait_time_seconds
+        self.max_source_bytes = max_source_bytes
+
+        self._ready: queue.Queue = queue.Queue()
+        self._held: Dict[str, PrefetchedJob] = {}
+        self._held_lock = threading.Lock()
+        self._reserved_bytes = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self) -> None:
+        """Start the receiver and heartbeat threads."""
+        for target, name in ((self._receive_loop, 'prefetch-receiver'),
+                             (self._heartbeat_loop, 'prefetch-heartbeat')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Prefetcher started (depth: {self.max_depth}, "
+                    f"disk budget: {self.disk_budget_bytes // (1024 * 1024)}MB)")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop background threads and return unprocessed messages to the queue."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+        while True:
+            try:
+                job = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            self._return_to_queue(job)
+
+        logger.info("Prefetcher stopped")
+
+    def get(self, timeout: Optional[float] = None) -> Optional[PrefetchedJob]:
+        """
+        Take the next prefetched job, waiting up to timeout seconds.
+
+        The job stays under the visibility heartbeat until release() is called.
+
+        Returns:
+            PrefetchedJob, or None if nothing arrived in time
+        """
+        try:
+            job = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return job
+
+    def release(self, job: PrefetchedJob) -> None:
+        """Stop extending visibility for a job once it has been routed, and free its disk budget."""
+        with self._held_lock:
+            self._held.pop(job.receipt_handle, None)
+            self._reserved_bytes -= job.size_bytes
+            job.size_bytes = 0
+        job.discard_files()
+
+    def _has_headroom(self) -> bool:
+        """Check whether another job may be prefetched."""
+        if self._ready.qsize() >= self.max_depth:
+            return False
+
+        available_mb = ErrorRecovery.get_available_memory_mb()
+        if available_mb is not None and available_mb < self.min_free_memory_mb:
+            logger.debug(f"Prefetch paused: {available_mb}MB memory available")
+            return False
+
+        return True
+
+    def _receive_loop(self) -> None:
+        """Receive messages ahead of the worker while within budget."""
+        while not self._stop.is_set():
+            if not self._has_headroom():
+                self._stop.wait(1.0)
+                continue
+
+            try:
+                response = self.sqs.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=1,
+                    WaitTimeSeconds=self.wait_time_seconds,
+                    VisibilityTimeout=self.visibility_timeout,
+                    AttributeNames=['ApproximateReceiveCount'],
+                    MessageAttributeNames=['All']
+                )
+            except Exception as e:
+                logger.error(f"Prefetch receive failed: {str(e)}")
+                self._stop.wait(5.0)
+                continue
+
+            for message in response.get('Messages', []):
+                job = PrefetchedJob(message)
+                with self._held_lock:
+                    self._held[job.receipt_handle] = job
+
+                if self._stop.is_set():
+                    self._return_to_queue(job)
+                    continue
+
+                self._prefetch(job)
+                self._ready.put(job)
+
+    def _prefetch(self, job: PrefetchedJob) -> None:
+        """
+        Download the job's source if it fits in the disk budget.
+
+        The download is pinned to the ETag from the HEAD request, which the job
+        carries so the worker can check it against its own fingerprint.
+        """
+        try:
+            job.body = parse_job_message(job.message)
+        except ProcessingError as e:
+            # Leave routing of malformed messages to the worker
+            job.error = e
+            return
+
+        bucket, key = job.body['bucket'], job.body['key']
+        try:
+            metadata = self.s3_ops.get_file_metadata(bucket, key)
+            size = metadata['content_length']
+            if self.max_source_bytes is not None and size > self.max_source_bytes:
+                logger.info(f"Skipping prefetch of s3://{bucket}/{key}: "
+                            f"{size} bytes exceeds the source size limit")
+                return
+
+            with self._held_lock:
+                if self._reserved_bytes + size > self.disk_budget_bytes:
+                    logger.info(f"Skipping prefetch of s3://{bucket}/{key}: "
+                                f"{size} bytes exceeds remaining disk budget")
+                    return
+                self._reserved_bytes += size
+                job.size_bytes = size
+
+            job.temp_dir = tempfile.mkdtemp(prefix='audio_prefetch_')
+            local_path = os.path.join(job.temp_dir, os.path.basename(key))
+            self.s3_ops.download_file(bucket, key, local_path, if_match=metadata.get('etag'),
+                                      max_bytes=self.max_source_bytes)
+            job.local_path = local_path
+            job.etag = metadata.get('etag')
+            logger.info(f"Prefetched s3://{bucket}/{key} ({size} bytes)")
+
+        except Exception as e:
+            # The worker falls back to a regular download
+            logger.warning(f"Prefetch of s3://{bucket}/{key} failed: {str(e)}")
+            job.error = StorageError(f"Prefetch failed: {str(e)}")
+            job.discard_files()
+
+    def _heartbeat_loop(self) -> None:
+        """Extend visibility on every held message until released."""
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._held_lock:
+                held = list(self._held.values())
+
+            for job in held:
+                try:
+                    self.sqs.change_message_visibility(
+                        QueueUrl=self.queue_url,
+                        ReceiptHandle=job.receipt_handle,
+                        VisibilityTimeout=self.visibility_timeout
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to extend visibility for message "
+                                   f"{job.message.get('MessageId')}: {str(e)}")
+
+    def _return_to_queue(self, job: PrefetchedJob) -> None:
+        """Make an unprocessed message visible again and drop its files."""
+        try:
+            self.sqs.change_message_visibility(
+                QueueUrl=self.queue_url,
+                ReceiptHandle=job.receipt_handle,
+                VisibilityTimeout=0
+            )
+        except Exception as e:
+            logger.warning(f"Failed to return message {job.message.get('MessageId')} "
+                           f"to queue: {str(e)}")
+        self.release(job)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Result Cache for Little Bit Audio Processing Service
+Reuses previously produced one-shot sets when a user uploads identical audio
+with identical effective processing configuration.
+"""
+
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .upload_manifest import file_digest
+
+logger = logging.getLogger(__name__)
+
+def compute_content_hash(file_path: Optional[str], config: Dict[str, Any],
+                         source_digest: Optional['hashlib._Hash'] = None) -> str:
+    """
+    Hash source audio bytes together with the effective processing configuration.
+
+    Args:
+        file_path: Path to the downloaded source file
+        config: Effective configuration from AudioProcessingConfig.to_dict()
+        source_digest: SHA-256 already fed with the source bytes (streamed
+            sources); used instead of reading file_path
+
+    Returns:
+        Hex SHA-256 content address
+    """
+    if source_digest is not None:
+        digest = source_digest.copy()
+    else:
+        digest = file_digest(file_path)
+
+    digest.update(b'\0')
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    Per-user content-addressed index of produced one-shot sets.
+
+    Each index entry lists the S3 keys of a completed output set. A hit is
+    materialized with server-side copies into the user's processed prefix,
+    renamed after the new upload's base filename.
+    """
+
+    def __init__(self, s3_ops, bucket: str, prefix: str = 'processing-cache/results',
+                 max_copy_workers: int = 8):
+        """
+        Initialize the result cache.
+
+        Args:
+            s3_ops: S3Operations instance
+            bucket: Bucket holding the index and the outputs
+            prefix: Key prefix for index entries
+            max_copy_workers: Maximum concurrent server-side copies
+        """
+        self.s3_ops = s3_ops
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.max_copy_workers = max_copy_workers
+
+    def index_key(self, user_id: str, content_hash: str) -> str:
+        """S3 key of the index entry for a user's content hash."""
+        return f"{self.prefix}/{user_id}/{content_hash}.json"
+
+    def lookup(self, user_id: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a previously produced output set.
+
+        Returns:
+            Index entry, or None on a miss
+        """
+        try:
+            data = self.s3_ops.get_object_bytes(self.bucket, self.index_key(user_id, content_hash))
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.warning(f"Result cache lookup failed, processing normally: {str(e)}")
+            return None
+
+    def store(self, user_id: str, content_hash: str, base_filename: str,
+              upload_results: List[Dict[str, Any]]) -> None:
+        """
+        Record a completed output set under its content address.
+
+        Args:
+            user_id: Owner of the outputs
+            content_hash: Content address from compute_content_hash
+            base_filename: Base filename the outputs were named after
+            upload_results: Successful upload results for the set
+        """
+        outputs = []
+        for result in upload_results:
+            filename = result['filename']
+            outputs.append({
+                # Suffix after the base name, e.g. "-0.wav" or "-original.wav"
+                'suffix': filename[len(base_filename):] if filename.startswith(base_filename) else f"-{filename}",
+                's3_key': result['s3_key'],
+                'format': result.get('format'),
+                'duration_seconds': result.get('duration_seconds'),
+                'file_size_bytes': result.get('file_size_bytes'),
+                'chunk_index': result.get('chunk_index'),
+                'dbfs': result.get('dbfs'),
+                'max_dbfs': result.get('max_dbfs')
+            })
+
+        entry = {'contentHash': content_hash, 'createdAt': time.time(), 'outputs': outputs}
+        try:
+            self.s3_ops.put_object_bytes(
+                self.bucket, self.index_key(user_id, content_hash),
+                json.dumps(entry, default=str).encode('utf-8')
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store result cache entry: {str(e)}")
+
+    def materialize(self, entry: Dict[str, Any], user_id: str, base_filename: str,
+                    metadata: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Copy a cached output set into the user's processed prefix server-side.
+
+        Args:
+            entry: Index entry from lookup()
+            user_id: Owner of the new outputs
+            base_filename: Base filename of the new upload
+            metadata: Optional metadata for the copied objects
+
+        Returns:
+            Upload results in the same shape as AudioProcessingService.upload_processed_files
+
+        Raises:
+            S3OperationError: If any copy fails (e.g. cached outputs were deleted)
+        """
+        def copy_output(output: Dict[str, Any]) -> Dict[str, Any]:
+            filename = f"{base_filename}{output['suffix']}"
+            s3_key = f"public/processed/{user_id}/{filename}"
+            if s3_key != output['s3_key']:
+                object_metadata = dict(metadata or {}, **{'chunk-index': str(output.get('chunk_index', -1))})
+                self.s3_ops.copy_object(self.bucket, output['s3_key'], self.bucket, s3_key, object_metadata)
+
+            return {
+                'filename': filename,
+                'format': output.get('format'),
+                'duration_seconds': output.get('duration_seconds'),
+                'file_size_bytes': output.get('file_size_bytes'),
+                'chunk_index': output.get('chunk_index'),
+                'dbfs': output.get('dbfs'),
+                'max_dbfs': output.get('max_dbfs'),
+                's3_key': s3_key,
+                's3_bucket': self.bucket,
+                'upload_success': True,
+                'cached': True
+            }
+
+        outputs = entry.get('outputs', [])
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_copy_workers, len(outputs)))) as executor:
+            return list(executor.map(copy_output, outputs))
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Streaming Source Decoder for Little Bit Audio Processing Service
+Decodes the S3 GET body as bytes arrive, so decoding overlaps the download
+and the source never touches disk. Inputs that need seeking are spilled to
+disk for the regular file-based path.
+"""
+
+import struct
+import logging
+import tempfile
+import threading
+import subprocess
+from itertools import chain
+from typing import Iterable, Iterator, Optional, Tuple
+
+from pydub import AudioSegment
+
+from .error_handlers import AudioProcessingError
+
+logger = logging.getLogger(__name__)
+
+# Bytes inspected before choosing a decode path
+HEADER_PEEK_BYTES = 64 * 1024
+
+# Size of reads from the decoder's output pipe
+PIPE_READ_SIZE = 256 * 1024
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# A RIFF chunk size ffmpeg writes when the output is not seekable
+UNKNOWN_CHUNK_SIZE = 0xFFFFFFFF
+
+class ChunkReader:
+    """File-like read() over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            try:
+                self._buffer.extend(next(self._chunks))
+            except StopIteration:
+                self._eof = True
+
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+def peek_header(chunks: Iterable[bytes], size: int = HEADER_PEEK_BYTES) -> Tuple[bytes, Iterator[bytes]]:
+    """
+    Read the first bytes of a chunk stream without losing them.
+
+    Returns:
+        Tuple of (header bytes, iterator over the complete stream)
+    """
+    iterator = iter(chunks)
+    consumed = []
+    length = 0
+    for chunk in iterator:
+        consumed.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            break
+
+    head = b''.join(consumed)
+    return head[:size], chain([head], iterator)
+
+def requires_seekable_input(head: bytes) -> bool:
+    """
+    Check whether a source cannot be decoded from a pipe.
+
+    MP4/M4A files whose 'moov' index follows the 'mdat' payload can only be
+    decoded after seeking to the end of the file.
+
+    Args:
+        head: First bytes of the source
+
+    Returns:
+        True if the source must be decoded from a file
+    """
+    if head[4:8] != b'ftyp':
+        return False
+
+    offset = 0
+    while offset + 8 <= len(head):
+        size, box_type = struct.unpack('>I4s', head[offset:offset + 8])
+        if box_type == b'moov':
+            return False
+        if box_type == b'mdat':
+            return True
+        if size == 1 and offset + 16 <= len(head):
+            size = struct.unpack('>Q', head[offset + 8:offset + 16])[0]
+        if size < 8:
+            break
+        offset += size
+
+    # Index not found in the header window; decode from disk to be safe
+    return True
+
+def parse_wav_format(reader) -> Tuple[dict, int]:
+    """
+    Read RIFF chunks up to the start of the 'data' chunk.
+
+    Returns:
+        Tuple of (format fields, declared data size)
+    """
+    riff = reader.read(12)
+    if len(riff) < 12 or riff[0:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        raise AudioProcessingError("Source is not a RIFF/WAVE stream")
+
+    fmt = None
+    while True:
+        header = reader.read(8)
+        if len(header) < 8:
+            raise AudioProcessingError("WAV stream ended before the data chunk")
+        chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+        if chunk_id == b'data':
+            if fmt is None:
+                raise AudioProcessingError("WAV data chunk precedes its fmt chunk")
+            return fmt, chunk_size
+
+        body = reader.read(chunk_size + (chunk_size & 1))
+        if chunk_id == b'fmt ':
+            tag, channels, frame_rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+            if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # The sub-format GUID starts with the real format tag
+                tag = struct.unpack('<H', body[24:26])[0]
+            fmt = {'tag': tag, 'channels': channels, 'frame_rate': frame_rate, 'bits': bits}
+
+def is_native_pcm(fmt: dict) -> bool:
+    """Check whether a WAV format can be used as AudioSegment data unchanged."""
+    return fmt['tag'] == WAVE_FORMAT_PCM and fmt['bits'] in (16, 24, 32)
+
+def read_wav_stream(reader) -> AudioSegment:
+    """
+    Build an AudioSegment from a streamed RIFF/WAVE source.
+
+    Args:
+        reader: Object with a read(size) method positioned at the RIFF header
+
+    Returns:
+        Decoded AudioSegment
+    """
+    fmt, data_size = parse_wav_format(reader)
+    if not is_native_pcm(fmt):
+        raise AudioProcessingError(f"Unsupported WAV sample format for streaming: {fmt}")
+
+    if data_size in (0, UNKNOWN_CHUNK_SIZE):
+        data = reader.read()
+    else:
+        data = reader.read(data_size)
+
+    sample_width = fmt['bits'] // 8
+    frame_width = sample_width * fmt['channels']
+    # Drop a trailing partial frame from a truncated stream
+    data = data[:len(data) - len(data) % frame_width]
+
+    return AudioSegment(data=data, sample_width=sample_width,
+                        frame_rate=fmt['frame_rate'], channels=fmt['channels'])
+
+def _output_codec(head: bytes) -> str:
+    """Pick the PCM codec ffmpeg should decode to for this source."""
+    if head[:4] == b'fLaC' and len(head) >= 26:
+        # STREAMINFO bits-per-sample, stored minus one across bytes 20-21
+        bits = (((head[20] & 0x01) << 4) | (head[21] >> 4)) + 1
+        if bits > 16:
+            return 'pcm_s32le'
+    elif head[:4] == b'RIFF':
+        try:
+            fmt, _ = parse_wav_format(ChunkReader([head]))
+            if fmt['bits'] > 16:
+                return 'pcm_s32le'
+        except AudioProcessingError:
+            pass
+    return 'pcm_s16le'
+
+def decode_with_ffmpeg(chunks: Iterable[bytes], codec: str = 'pcm_s16le') -> AudioSegment:
+    """
+    Decode a source by piping it through ffmpeg's stdin and reading WAV from stdout.
+
+    Args:
+        chunks: Source bytes as they arrive
+        codec: PCM codec for the decoded output
+
+    Returns:
+        Decoded AudioSegment
+    """
+    command = [
+        AudioSegment.converter, '-hide_banner', '-loglevel', 'error',
+        '-i', 'pipe:0', '-vn', '-acodec', codec, '-f', 'wav', 'pipe:1'
+    ]
+
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+        feed_error = []
+
+        def feed():
+            source = iter(chunks)
+            try:
+                for chunk in source:
+                    process.stdin.write(chunk)
+            except BrokenPipeError:
+                # ffmpeg stopped reading; consume the rest so callers see every byte
+                try:
+                    for _ in source:
+                        pass
+                except Exception as e:
+                    feed_error.append(e)
+            except Exception as e:
+                feed_error.append(e)
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        feeder = threading.Thread(target=feed, name='ffmpeg-feed', daemon=True)
+        feeder.start()
+        try:
+            audio = read_wav_stream(ChunkReader(iter(lambda: process.stdout.read(PIPE_READ_SIZE), b'')))
+        except AudioProcessingError:
+            audio = None
+        finally:
+            process.stdout.close()
+            return_code = process.wait()
+            feeder.join()
+
+        if feed_error:
+            # The source stream failed; the decoded audio would be truncated
+            raise feed_error[0]
+
+        if return_code != 0 or audio is None:
+            stderr.seek(0)
+            message = stderr.read().decode('utf-8', errors='replace').strip()[-500:]
+            raise AudioProcessingError(f"Streaming decode failed (ffmpeg exit {return_code}): {message}")
+
+    return audio
+
+def decode_source_stream(chunks: Iterable[bytes], spill_path: str) -> Optional[AudioSegment]:
+    """
+    Decode a source stream, or spill it to disk if it needs seeking.
+
+    Args:
+        chunks: Source bytes as they arrive from S3
+        spill_path: File to write the source to when it cannot be streamed
+
+    Returns:
+        Decoded AudioSegment, or None if the source was written to spill_path
+    """
+    head, stream = peek_header(chunks)
+
+    if requires_seekable_input(head):
+        logger.info(f"Source needs seeking to decode, spilling to {spill_path}")
+        with open(spill_path, 'wb') as f:
+            for chunk in stream:
+                f.write(chunk)
+        return None
+
+    if head[:4] == b'RIFF':
+        try:
+            fmt, _ = parse_wav_format(ChunkReader([head]))
+            if is_native_pcm(fmt):
+                reader = ChunkReader(stream)
+                audio = read_wav_stream(reader)
+                # Consume trailing chunks so callers see every byte
+                reader.read()
+                return audio
+        except AudioProcessingError:
+            # Let ffmpeg report anything unusual about the file
+            pass
+
+    return decode_with_ffmpeg(stream, _output_codec(head))
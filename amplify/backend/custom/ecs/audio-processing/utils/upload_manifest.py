@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Resumable Upload Manifest for Little Bit Audio Processing Service
+Records each uploaded chunk's S3 key, size and checksum so retries and
+redelivered messages only upload missing or mismatched chunks.
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+def file_digest(file_path: str, digest: Optional['hashlib._Hash'] = None) -> 'hashlib._Hash':
+    """
+    Feed a local file through a hash in fixed-size blocks.
+
+    Args:
+        file_path: Path to the file
+        digest: Hash object to update; a new SHA-256 if omitted
+
+    Returns:
+        The updated hash object
+    """
+    if digest is None:
+        digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest
+
+def compute_file_checksum(file_path: str) -> str:
+    """
+    Compute the SHA-256 checksum of a local file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return file_digest(file_path).hexdigest()
+
+class UploadManifest:
+    """
+    Per-job record of completed chunk uploads.
+
+    Entries are recorded as each chunk completes and persisted to a small
+    JSON object in S3 by save(), so a redelivered message for the same
+    job can resume where the previous attempt stopped.
+    """
+
+    def __init__(self, s3_ops, bucket: str, job_id: str,
+                 prefix: str = 'processing-manifests/uploads'):
+        """
+        Initialize the manifest.
+
+        Args:
+            s3_ops: S3Operations instance
+            bucket: Bucket holding the manifest
+            job_id: Stable job identifier (job fingerprint or content hash)
+            prefix: Key prefix for upload manifests
+        """
+        self.s3_ops = s3_ops
+        self.bucket = bucket
+        self.job_id = job_id
+        self.key = f"{prefix.strip('/')}/{job_id}.json"
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        # Serializes saves so an older snapshot never overwrites a newer one
+        self._save_lock = threading.Lock()
+
+    def load(self) -> 'UploadManifest':
+        """Load entries recorded by a previous attempt, if any."""
+        try:
+            data = self.s3_ops.get_object_bytes(self.bucket, self.key)
+            if data:
+                self.entries = json.loads(data).get('entries', {})
+                logger.info(f"Loaded upload manifest with {len(self.entries)} completed chunks")
+        except Exception as e:
+            # Without a manifest every chunk is simply uploaded again
+            logger.warning(f"Could not load upload manifest {self.key}: {str(e)}")
+            self.entries = {}
+        return self
+
+    def is_uploaded(self, s3_key: str, size: int, checksum: str) -> bool:
+        """Check whether an identical chunk was already uploaded to s3_key."""
+        with self._lock:
+            entry = self.entries.get(s3_key)
+        return bool(entry) and entry.get('size') == size and entry.get('checksum') == checksum
+
+    def record(self, s3_key: str, size: int, checksum: str) -> None:
+        """Record a completed chunk upload."""
+        with self._lock:
+            self.entries[s3_key] = {'size': size, 'checksum': checksum, 'uploadedAt': time.time()}
+            self._dirty = True
+
+    def get(self, s3_key: str) -> Optional[Dict[str, Any]]:
+        """Get the recorded entry for an S3 key."""
+        with self._lock:
+            return self.entries.get(s3_key)
+
+    def save(self) -> None:
+        """Persist the manifest if it changed since the last save."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps({'jobId': self.job_id, 'entries': self.entries}).encode('utf-8')
+                self._dirty = False
+
+            try:
+                self.s3_ops.put_object_bytes(self.bucket, self.key, data)
+            except Exception as e:
+                logger.warning(f"Failed to save upload manifest {self.key}: {str(e)}")
+                with self._lock:
+                    self._dirty = True
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Job Workspace for Little Bit Audio Processing Service
+Gives each job a single scratch directory tree with byte accounting, a disk
+quota and reliable recursive cleanup, optionally on a RAM-backed root.
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from .error_handlers import ResourceError
+
+logger = logging.getLogger(__name__)
+
+# Decoded WAV outputs plus the source typically need about this multiple of a
+# compressed source's size
+FOOTPRINT_FACTOR = 12
+
+def estimate_footprint(source_bytes: Optional[int]) -> Optional[int]:
+    """
+    Estimate the scratch space a job needs from its source size.
+
+    Args:
+        source_bytes: Size of the source object, if known
+
+    Returns:
+        Estimated workspace bytes, or None if the source size is unknown
+    """
+    if source_bytes is None:
+        return None
+    return source_bytes * FOOTPRINT_FACTOR
+
+def choose_workspace_root(expected_bytes: Optional[int], disk_root: Optional[str] = None,
+                          ram_root: Optional[str] = None, ram_max_bytes: int = 0) -> str:
+    """
+    Pick the filesystem a job's workspace is created on.
+
+    Small jobs go to the RAM-backed root (e.g. /dev/shm) when one is
+    configured and has room; everything else uses the disk root.
+
+    Args:
+        expected_bytes: Estimated workspace size, if known
+        disk_root: Disk-backed root, defaults to the system temp directory
+        ram_root: Optional tmpfs/RAM-backed root
+        ram_max_bytes: Largest expected workspace placed on the RAM root
+
+    Returns:
+        Directory to create the workspace in
+    """
+    disk_root = disk_root or tempfile.gettempdir()
+    if not ram_root or expected_bytes is None or expected_bytes > ram_max_bytes:
+        return disk_root
+
+    try:
+        if os.path.isdir(ram_root) and shutil.disk_usage(ram_root).free > expected_bytes * 2:
+            return ram_root
+    except OSError as e:
+        logger.warning(f"RAM workspace root {ram_root} unavailable: {str(e)}")
+    return disk_root
+
+class Workspace:
+    """
+    Per-job scratch directory tree.
+
+    Every file a job writes lives under one root directory, so cleanup is a
+    single recursive removal. Files are accounted as they are written and
+    the job fails with a ResourceError once it exceeds its quota.
+    """
+
+    def __init__(self, job_id: str, root: Optional[str] = None, quota_bytes: Optional[int] = None):
+        """
+        Create the workspace directory.
+
+        Args:
+            job_id: Identifier included in the directory name
+            root: Directory to create the workspace in
+            quota_bytes: Maximum bytes the job may write, None for unlimited
+        """
+        self.root = root or tempfile.gettempdir()
+        self.quota_bytes = quota_bytes
+        self.path = tempfile.mkdtemp(prefix=f'audio_job_{job_id[:8]}_', dir=self.root)
+        self._files: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._removed = False
+        logger.info(f"Created workspace {self.path}"
+                    f"{f' (quota {quota_bytes // (1024 * 1024)}MB)' if quota_bytes else ''}")
+
+    @property
+    def bytes_used(self) -> int:
+        """Bytes accounted to this workspace."""
+        with self._lock:
+            return sum(self._files.values())
+
+    def subdir(self, name: str) -> str:
+        """Create (if needed) and return a subdirectory of the workspace."""
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def ensure_capacity(self, additional_bytes: int) -> None:
+        """
+        Check that writing more bytes stays within the quota.
+
+        Raises:
+            ResourceError: If the write would exceed the quota
+        """
+        if self.quota_bytes is None:
+            return
+        used = self.bytes_used
+        if used + additional_bytes > self.quota_bytes:
+            raise ResourceError(
+                f"Workspace quota exceeded: {used + additional_bytes} bytes needed, "
+                f"quota {self.quota_bytes} bytes",
+                details={'workspace': self.path, 'bytes_used': used}
+            )
+
+    def account(self, file_path: str) -> int:
+        """
+        Record a file written into the workspace.
+
+        Re-accounting a path replaces its previous size.
+
+        Args:
+            file_path: Path of the written file
+
+        Returns:
+            Total bytes used by the workspace
+
+        Raises:
+            ResourceError: If the workspace is now over its quota
+        """
+        size = os.path.getsize(file_path)
+        with self._lock:
+            self._files[os.path.abspath(file_path)] = size
+            used = sum(self._files.values())
+
+        if self.quota_bytes is not None and used > self.quota_bytes:
+            raise ResourceError(
+                f"Workspace quota exceeded: {used} bytes used, quota {self.quota_bytes} bytes",
+                details={'workspace': self.path, 'bytes_used': used}
+            )
+        return used
+
+    def cleanup(self) -> None:
+        """Remove the workspace tree. Safe to call more than once."""
+        with self._lock:
+            if self._removed:
+                return
+            self._removed = True
+            used = sum(self._files.values())
+            self._files.clear()
+
+        def log_failure(function, path, exc_info):
+            logger.warning(f"Failed to remove {path} from workspace: {exc_info[1]}")
+
+        shutil.rmtree(self.path, onerror=log_failure)
+        logger.info(f"Removed workspace {self.path} ({used} bytes accounted)")
+
+    def __enter__(self) -> 'Workspace':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.cleanup()
@@ -1,15 +1,16 @@
+import time
+_MODULE_LOAD_STARTED = time.perf_counter()
+
 import json
 import os
 import boto3
 import logging
+import sys
+import importlib
+import threading
 from urllib.parse import unquote_plus
 import tempfile
-import librosa
-import soundfile as sf
-import numpy as np
-from pydub import AudioSegment
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configure logging
 logger = logging.getLogger()
@@ -18,47 +19,86 @@ logger.setLevel(logging.INFO)
 # Initialize AWS clients
 s3 = boto3.client('s3')
 
-# GraphQL client setup
+# Upper bound on SQS records processed at once in one invocation
+MAX_CONCURRENT_RECORDS = int(os.environ.get('MAX_CONCURRENT_RECORDS', '4'))
+
+# Threads used to render and upload pitch set variants, shared by all
+# concurrent records so an invocation never runs more than this many at once
+PITCH_SET_WORKERS = int(os.environ.get('PITCH_SET_WORKERS', str(os.cpu_count() or 2)))
+_variant_executor = None
+_variant_executor_lock = threading.Lock()
+
+# Impulse responses for reverb are fetched from S3 and kept in /tmp between invocations
+IMPULSE_RESPONSE_BUCKET = os.environ.get('IMPULSE_RESPONSE_BUCKET', os.environ.get('S3_BUCKET', ''))
+IMPULSE_RESPONSE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'impulse-responses')
+
+# GraphQL status publisher setup (created on first status update)
 API_URL = os.environ.get('API_URL')
-transport = RequestsHTTPTransport(
-    url=API_URL,
-    use_json=True,
-    headers={
-        'Content-Type': 'application/json',
-        'x-api-key': os.environ.get('API_KEY', '')
-    }
-)
-client = Client(transport=transport, fetch_schema_from_transport=False)
+STATUS_BATCH_SIZE = int(os.environ.get('STATUS_BATCH_SIZE', '10'))
+STATUS_FLUSH_TIMEOUT = float(os.environ.get('STATUS_FLUSH_TIMEOUT', '30'))
+_status_publisher = None
+_status_publisher_lock = threading.Lock()
 
-# GraphQL mutation for updating sample
-UPDATE_SAMPLE_MUTATION = gql('''
-    mutation UpdateSample($id: ID!, $processing_status: ProcessingStatus!, $processing_completed_at: AWSDateTime, $processing_error: String) {
-        updateSample(input: {
-            id: $id,
-            processing_status: $processing_status,
-            processing_completed_at: $processing_completed_at,
-            processing_error: $processing_error
-        }) {
-            id
-            processing_status
-        }
-    }
-''')
+# Heavy modules are imported on first use; librosa alone pulls in numba and scipy
+IMPORT_TIMINGS_MS = {}
+
+def _lazy_import(name):
+    """Import a module on first use and record how long the import took"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    IMPORT_TIMINGS_MS.setdefault(name, round(elapsed_ms, 1))
+    logger.info(f"Imported {name} in {elapsed_ms:.1f}ms")
+    return module
+
+def get_status_publisher():
+    """Return the sample status publisher, creating it on first use"""
+    global _status_publisher
+    
+    with _status_publisher_lock:
+        if _status_publisher is None:
+            status_publisher = _lazy_import('utils.status_publisher')
+            _status_publisher = status_publisher.StatusPublisher(
+                API_URL,
+                api_key=os.environ.get('API_KEY', ''),
+                max_batch_size=STATUS_BATCH_SIZE
+            )
+    
+    return _status_publisher
+
+def get_variant_executor():
+    """Return the pitch set variant thread pool, creating it on first use"""
+    global _variant_executor
+    
+    with _variant_executor_lock:
+        if _variant_executor is None:
+            _variant_executor = ThreadPoolExecutor(max_workers=PITCH_SET_WORKERS,
+                                                   thread_name_prefix='pitch-variant')
+    
+    return _variant_executor
+
+# Module initialization time, reported once by the first invocation
+INIT_DURATION_MS = round((time.perf_counter() - _MODULE_LOAD_STARTED) * 1000, 1)
+_cold_start = True
 
 def handler(event, context):
     """
     Lambda handler for audio processing
     Supports both direct S3 triggers and SQS messages
     """
+    global _cold_start
+    if _cold_start:
+        _cold_start = False
+        logger.info(f"Cold start: module initialized in {INIT_DURATION_MS}ms")
+    
     try:
         # Handle SQS event
         if 'Records' in event and event['Records'][0].get('eventSource') == 'aws:sqs':
-            for record in event['Records']:
-                message = json.loads(record['body'])
-                if 'Records' in message:  # S3 event wrapped in SQS
-                    process_s3_event(message)
-                else:  # Direct message with processing instructions
-                    process_audio_job(message)
+            return process_sqs_batch(event['Records'])
         
         # Handle direct S3 event
         elif 'Records' in event and event['Records'][0].get('eventSource') == 'aws:s3':
@@ -82,6 +122,42 @@ def handler(event, context):
             'statusCode': 500,
             'body': json.dumps(f'Processing failed: {str(e)}')
         }
+    
+    finally:
+        # The execution environment is frozen after returning
+        flush_status_updates()
+
+def process_sqs_batch(records):
+    """
+    Process SQS records concurrently and report partial batch failures
+    
+    Requires ReportBatchItemFailures on the event source mapping: only the
+    records listed in batchItemFailures are made visible again, the rest of
+    the batch is deleted from the queue.
+    """
+    workers = max(1, min(MAX_CONCURRENT_RECORDS, len(records)))
+    failures = []
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_sqs_record, record): record for record in records}
+        for future in as_completed(futures):
+            record = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Record {record.get('messageId')} failed: {str(e)}", exc_info=True)
+                failures.append({'itemIdentifier': record['messageId']})
+    
+    logger.info(f"Processed {len(records)} records with {workers} workers, {len(failures)} failed")
+    return {'batchItemFailures': failures}
+
+def process_sqs_record(record):
+    """Process a single SQS record"""
+    message = json.loads(record['body'])
+    if 'Records' in message:  # S3 event wrapped in SQS
+        process_s3_event(message)
+    else:  # Direct message with processing instructions
+        process_audio_job(message)
 
 def process_s3_event(event):
     """Process S3 event"""
@@ -109,16 +185,24 @@ def process_audio_job(job):
 def process_audio_file(bucket, key, sample_id, processing_params=None):
     """Main audio processing function"""
     
-    # Update status to PROCESSING
+    # Update status to PROCESSING; sent while the file downloads
     update_sample_status(sample_id, 'PROCESSING')
     
     try:
+        sf = _lazy_import('soundfile')
+        
         # Download file to temp directory
         with tempfile.NamedTemporaryFile(suffix='.wav') as tmp_input:
             s3.download_file(bucket, key, tmp_input.name)
             
             # Load audio file
-            audio_data, sample_rate = librosa.load(tmp_input.name, sr=None)
+            audio_data, sample_rate = load_audio(tmp_input.name)
+            
+            # Pitch sets write several files and a manifest instead of one output
+            if processing_params and processing_params.get('pitch_set'):
+                process_pitch_set(bucket, key, audio_data, sample_rate, processing_params)
+                update_sample_status(sample_id, 'COMPLETED')
+                return
             
             # Apply audio processing based on parameters
             if processing_params:
@@ -127,7 +211,7 @@ def process_audio_file(bucket, key, sample_id, processing_params=None):
             # Basic processing if no params specified
             else:
                 # Normalize audio
-                audio_data = librosa.util.normalize(audio_data)
+                audio_data = normalize_peak(audio_data)
                 
                 # Apply fade in/out
                 audio_data = apply_fade(audio_data, sample_rate)
@@ -153,36 +237,104 @@ def process_audio_file(bucket, key, sample_id, processing_params=None):
         update_sample_status(sample_id, 'FAILED', error=str(e))
         raise
 
+def process_pitch_set(bucket, key, audio_data, sample_rate, params):
+    """
+    Render and upload every variant of a pitch set, then its manifest
+    
+    Variants go to processed/.../<name>/<label>.wav next to a manifest.json
+    and are labelled by their pitch_set offset. pitch_shift moves the whole
+    set and is recorded separately in the manifest, time_stretch applies to
+    every variant and the remaining effects run on each variant after
+    rendering. Each variant is rendered, processed and uploaded by one task
+    on the shared variant pool, then released.
+    """
+    sf = _lazy_import('soundfile')
+    pitch_set = _lazy_import('utils.pitch_set')
+    effects_chain = _lazy_import('utils.effects_chain')
+    
+    base_shift = float(params.get('pitch_shift', 0.0))
+    rate = float(params.get('time_stretch', 1.0))
+    other_effects = {k: v for k, v in params.items() if k not in ('pitch_set', 'pitch_shift', 'time_stretch')}
+    plan = effects_chain.plan_effects(other_effects, resolve_impulse_response=fetch_impulse_response)
+    prefix = os.path.splitext(key.replace('unprocessed', 'processed'))[0]
+    
+    def upload_variant(offset, variant):
+        variant = plan.run(variant, sample_rate)
+        variant_key = f"{prefix}/{pitch_set.variant_name(offset)}.wav"
+        with tempfile.NamedTemporaryFile(suffix='.wav') as tmp_output:
+            sf.write(tmp_output.name, variant, sample_rate)
+            s3.upload_file(tmp_output.name, bucket, variant_key)
+        return {
+            'semitones': offset,
+            'key': variant_key,
+            'samples': len(variant),
+            'duration_seconds': round(len(variant) / sample_rate, 4)
+        }
+    
+    entries = pitch_set.render_pitch_set(audio_data, sample_rate, params['pitch_set'], upload_variant,
+                                         base_shift=base_shift, rate=rate, executor=get_variant_executor())
+    
+    manifest = {
+        'source': {'bucket': bucket, 'key': key},
+        'sample_rate': sample_rate,
+        'pitch_shift': base_shift,
+        'time_stretch': rate,
+        'variants': entries
+    }
+    manifest_key = f"{prefix}/manifest.json"
+    s3.put_object(Bucket=bucket, Key=manifest_key, Body=json.dumps(manifest, indent=2).encode('utf-8'),
+                  ContentType='application/json')
+    
+    logger.info(f"Uploaded {len(entries)} pitch variants and manifest to s3://{bucket}/{manifest_key}")
+    return manifest
+
 def apply_audio_effects(audio_data, sample_rate, params):
     """Apply various audio effects based on parameters"""
+    effects_chain = _lazy_import('utils.effects_chain')
     
-    # Pitch shift
-    if 'pitch_shift' in params:
-        n_steps = params['pitch_shift']
-        audio_data = librosa.effects.pitch_shift(audio_data, sr=sample_rate, n_steps=n_steps)
+    plan = effects_chain.plan_effects(params, resolve_impulse_response=fetch_impulse_response)
+    return plan.run(audio_data, sample_rate)
+
+def load_audio(path):
+    """
+    Load an audio file as mono float32 at its native sample rate
     
-    # Time stretch
-    if 'time_stretch' in params:
-        rate = params['time_stretch']
-        audio_data = librosa.effects.time_stretch(audio_data, rate=rate)
+    Channels are averaged like librosa.load(mono=True); mono files are
+    returned without an extra copy. Formats libsndfile cannot decode, such
+    as the app's AAC .m4a recordings, fall back to librosa (ffmpeg).
+    """
+    sf = _lazy_import('soundfile')
     
-    # Apply reverb
-    if params.get('reverb', False):
-        audio_data = apply_reverb(audio_data, sample_rate)
+    try:
+        audio_data, sample_rate = sf.read(path, dtype='float32', always_2d=True)
+    except RuntimeError as e:
+        # sf.LibsndfileError is a RuntimeError
+        logger.info(f"soundfile could not decode {path} ({e}), falling back to librosa")
+        librosa = _lazy_import('librosa')
+        return librosa.load(path, sr=None, mono=True)
+    
+    if audio_data.shape[1] == 1:
+        return audio_data[:, 0], sample_rate
     
-    # Apply compression
-    if params.get('compress', False):
-        audio_data = apply_compression(audio_data)
+    return audio_data.mean(axis=1, dtype='float32'), sample_rate
+
+def normalize_peak(audio_data):
+    """Scale audio in place so its peak absolute value is 1.0"""
+    np = _lazy_import('numpy')
     
-    # Apply EQ
-    if 'eq' in params:
-        audio_data = apply_eq(audio_data, sample_rate, params['eq'])
+    peak = float(max(audio_data.max(initial=0.0), -audio_data.min(initial=0.0)))
+    if peak <= np.finfo(audio_data.dtype).tiny:
+        return audio_data
     
+    audio_data *= audio_data.dtype.type(1.0 / peak)
     return audio_data
 
 def apply_fade(audio_data, sample_rate, fade_duration=0.1):
     """Apply fade in and fade out"""
-    fade_samples = int(fade_duration * sample_rate)
+    np = _lazy_import('numpy')
+    fade_samples = min(int(fade_duration * sample_rate), len(audio_data) // 2)
+    if fade_samples == 0:
+        return audio_data
     
     # Fade in
     audio_data[:fade_samples] *= np.linspace(0, 1, fade_samples)
@@ -192,74 +344,61 @@ def apply_fade(audio_data, sample_rate, fade_duration=0.1):
     
     return audio_data
 
-def remove_silence(audio_data, sample_rate, threshold_db=-40):
-    """Remove silence from beginning and end"""
-    # Convert to AudioSegment for easier manipulation
-    audio_segment = AudioSegment(
-        audio_data.tobytes(),
-        frame_rate=sample_rate,
-        sample_width=audio_data.dtype.itemsize,
-        channels=1
-    )
-    
-    # Remove silence
-    trimmed = audio_segment.strip_silence(
-        silence_thresh=threshold_db,
-        chunk_size=10,
-        padding=100
-    )
-    
-    # Convert back to numpy array
-    return np.array(trimmed.get_array_of_samples(), dtype=np.float32) / 32768.0
-
-def apply_reverb(audio_data, sample_rate, room_size=0.5):
-    """Simple reverb effect using convolution"""
-    # This is a simplified reverb - for production, use a proper impulse response
-    delay_samples = int(0.05 * sample_rate)
-    decay = 0.5
+def remove_silence(audio_data, sample_rate, threshold_db=-40, frame_ms=10, padding_ms=100):
+    """
+    Remove silence from beginning and end
     
-    reverb = np.zeros_like(audio_data)
-    reverb[delay_samples:] = audio_data[:-delay_samples] * decay
+    The signal is split into frame_ms frames and the mean power of each is
+    compared with threshold_db (dBFS). Everything before the first and after
+    the last frame above the threshold is dropped, keeping padding_ms of
+    context on both sides. Returns a view of audio_data.
+    """
+    np = _lazy_import('numpy')
     
-    return audio_data + reverb
-
-def apply_compression(audio_data, threshold=0.7, ratio=4):
-    """Dynamic range compression"""
-    compressed = np.copy(audio_data)
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    padding = int(sample_rate * padding_ms / 1000)
+    threshold_power = 10 ** (threshold_db / 10)
     
-    # Find samples above threshold
-    above_threshold = np.abs(compressed) > threshold
+    # Mean power per frame, computed on a reshaped view without squaring a copy
+    n_full = len(audio_data) // frame_length
+    frames = audio_data[:n_full * frame_length].reshape(n_full, frame_length)
+    power = np.einsum('ij,ij->i', frames, frames) / frame_length
+    tail = audio_data[n_full * frame_length:]
+    if tail.size:
+        power = np.append(power, np.dot(tail, tail) / tail.size)
     
-    # Apply compression
-    compressed[above_threshold] = threshold + (compressed[above_threshold] - threshold) / ratio
+    loud = np.flatnonzero(power > threshold_power)
+    if loud.size == 0:
+        return audio_data[:0]
     
-    return compressed
+    start = max(0, loud[0] * frame_length - padding)
+    end = min(len(audio_data), (loud[-1] + 1) * frame_length + padding)
+    return audio_data[start:end]
 
-def apply_eq(audio_data, sample_rate, eq_params):
-    """Apply parametric EQ"""
-    # Example: eq_params = {'low': -3, 'mid': 2, 'high': 1}  # in dB
-    
-    # This is a simplified EQ - for production, use proper filters
-    return audio_data  # Placeholder
+def fetch_impulse_response(key):
+    """Download an impulse response once per execution environment and return its path"""
+    path = os.path.join(IMPULSE_RESPONSE_CACHE_DIR, key.replace('/', '_'))
+    if not os.path.exists(path):
+        os.makedirs(IMPULSE_RESPONSE_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=IMPULSE_RESPONSE_CACHE_DIR, delete=False) as tmp:
+            s3.download_file(IMPULSE_RESPONSE_BUCKET, key, tmp.name)
+        os.replace(tmp.name, path)
+        logger.info(f"Fetched impulse response s3://{IMPULSE_RESPONSE_BUCKET}/{key}")
+    return path
 
 def update_sample_status(sample_id, status, error=None):
-    """Update sample status in GraphQL API"""
+    """
+    Queue a sample status update for the GraphQL API
+    
+    The update is sent in the background and coalesced with other updates in
+    the same batch; flush_status_updates() waits for delivery.
+    """
     try:
-        from datetime import datetime
-        
-        variables = {
-            'id': sample_id,
-            'processing_status': status
-        }
-        
-        if status == 'COMPLETED':
-            variables['processing_completed_at'] = datetime.utcnow().isoformat() + 'Z'
-        
-        if error:
-            variables['processing_error'] = error
-        
-        result = client.execute(UPDATE_SAMPLE_MUTATION, variable_values=variables)
-        logger.info(f"Updated sample {sample_id} status to {status}")
-        
+        return get_status_publisher().publish(sample_id, status, error=error)
     except Exception as e:
-        logger.error(f"Failed to update sample status: {str(e)}", exc_info=True)
\ No newline at end of file
+        logger.error(f"Failed to queue sample status update: {str(e)}", exc_info=True)
+
+def flush_status_updates():
+    """Wait for queued status updates before the invocation returns"""
+    if _status_publisher is not None:
+        _status_publisher.flush(timeout=STATUS_FLUSH_TIMEOUT)
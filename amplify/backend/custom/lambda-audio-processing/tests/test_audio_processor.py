@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the audio processing Lambda handler helpers.
+"""
+
+import os
+import sys
+import json
+import subprocess
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+try:
+    import audio_processor
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+SAMPLE_RATE = 22050
+
+class TestLoadAudio(unittest.TestCase):
+    """Test decoding through soundfile and the librosa fallback."""
+
+    def setUp(self):
+        """Write a short stereo WAV."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'clip.wav')
+        t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+        self.stereo = np.stack([np.sin(2 * np.pi * 440 * t), 0.5 * np.sin(2 * np.pi * 660 * t)],
+                               axis=1).astype(np.float32)
+        sf.write(self.path, self.stereo, SAMPLE_RATE, subtype='FLOAT')
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_soundfile_fast_path(self):
+        """Test channels are averaged to mono float32 at the native rate."""
+        audio_data, sample_rate = audio_processor.load_audio(self.path)
+
+        self.assertEqual(sample_rate, SAMPLE_RATE)
+        self.assertEqual(audio_data.dtype, np.float32)
+        np.testing.assert_allclose(audio_data, self.stereo.mean(axis=1), atol=1e-6)
+
+    def test_librosa_fallback(self):
+        """Test files libsndfile rejects are decoded by librosa instead."""
+        error = sf.LibsndfileError(1, 'Format not recognised')
+        with patch('soundfile.read', side_effect=error) as mock_read:
+            audio_data, sample_rate = audio_processor.load_audio(self.path)
+
+        mock_read.assert_called_once()
+        self.assertEqual(sample_rate, SAMPLE_RATE)
+        self.assertEqual(audio_data.dtype, np.float32)
+        np.testing.assert_allclose(audio_data, self.stereo.mean(axis=1), atol=1e-6)
+
+LAMBDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def modules_loaded_after(script):
+    """Run script in a fresh interpreter and return the module names it ends with loaded."""
+    code = script + '\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))\n'
+    env = dict(os.environ, AWS_DEFAULT_REGION='us-east-1')
+    output = subprocess.run([sys.executable, '-c', code], cwd=LAMBDA_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+class TestLazyImports(unittest.TestCase):
+    """Test heavy dependencies stay out of the cold start and the default path."""
+
+    def test_import_loads_no_heavy_modules(self):
+        """Test importing the handler module loads none of the audio or HTTP libraries."""
+        loaded = modules_loaded_after('import audio_processor')
+
+        for name in ('librosa', 'numpy', 'soundfile', 'requests'):
+            self.assertNotIn(name, loaded)
+
+    def test_default_path_skips_librosa(self):
+        """Test download, normalize, fade, trim and upload without loading librosa."""
+        loaded = modules_loaded_after(textwrap.dedent('''
+            import os, shutil, tempfile
+            from unittest.mock import Mock, patch
+            import numpy as np
+            import soundfile as sf
+            import audio_processor
+
+            source = tempfile.NamedTemporaryFile(suffix='.wav', delete=False).name
+            t = np.arange(22050) / 22050
+            sf.write(source, (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32), 22050)
+            s3 = Mock()
+            s3.download_file.side_effect = lambda bucket, key, path: shutil.copy(source, path)
+            with patch('audio_processor.s3', s3), patch('audio_processor.update_sample_status'):
+                audio_processor.process_audio_file('bucket', 'public/unprocessed/u/s.wav', 's')
+            os.remove(source)
+            assert s3.upload_file.call_count == 1
+        '''))
+
+        self.assertIn('soundfile', loaded)
+        self.assertNotIn('librosa', loaded)
+
+def sqs_record(message_id):
+    """SQS record carrying a processing job."""
+    return {'messageId': message_id, 'eventSource': 'aws:sqs',
+            'body': json.dumps({'bucket': 'bucket', 'key': f'public/unprocessed/u/{message_id}.wav',
+                                'sample_id': message_id})}
+
+class TestSqsBatch(unittest.TestCase):
+    """Test partial batch failures, concurrency and flushing."""
+
+    def test_failed_record_reported(self):
+        """Test only the record that raised is listed in batchItemFailures."""
+        def process(record):
+            if record['messageId'] == 'msg-2':
+                raise RuntimeError('decode failed')
+
+        records = [sqs_record(f'msg-{i}') for i in range(4)]
+        with patch('audio_processor.process_sqs_record', side_effect=process) as mock_process:
+            result = audio_processor.process_sqs_batch(records)
+
+        self.assertEqual(result, {'batchItemFailures': [{'itemIdentifier': 'msg-2'}]})
+        self.assertEqual(mock_process.call_count, 4)
+
+    def test_all_succeed(self):
+        """Test a clean batch reports no failures."""
+        with patch('audio_processor.process_sqs_record'):
+            result = audio_processor.process_sqs_batch([sqs_record('msg-0'), sqs_record('msg-1')])
+
+        self.assertEqual(result, {'batchItemFailures': []})
+
+    def test_concurrency_bounded(self):
+        """Test no more than MAX_CONCURRENT_RECORDS records run at once."""
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def process(record):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        with patch('audio_processor.MAX_CONCURRENT_RECORDS', 2), \
+             patch('audio_processor.process_sqs_record', side_effect=process):
+            result = audio_processor.process_sqs_batch([sqs_record(f'msg-{i}') for i in range(6)])
+
+        self.assertEqual(result, {'batchItemFailures': []})
+        self.assertEqual(peak[0], 2)
+
+    def test_handler_flushes_status_updates(self):
+        """Test the handler returns the batch response and flushes status updates, even on error."""
+        event = {'Records': [sqs_record('msg-0'), sqs_record('msg-1')]}
+
+        with patch('audio_processor.flush_status_updates') as mock_flush, \
+             patch('audio_processor.process_sqs_record', side_effect=[None, RuntimeError('boom')]):
+            result = audio_processor.handler(event, None)
+
+        self.assertEqual(len(result['batchItemFailures']), 1)
+        mock_flush.assert_called_once_with()
+
+        with patch('audio_processor.flush_status_updates') as mock_flush, \
+             patch('audio_processor.process_sqs_batch', side_effect=RuntimeError('boom')):
+            result = audio_processor.handler(event, None)
+
+        self.assertEqual(result['statusCode'], 500)
+        mock_flush.assert_called_once_with()
+
+class TestNormalizeAndTrim(unittest.TestCase):
+    """Test the default normalize and silence trimming steps."""
+
+    def test_normalize_peak_in_place(self):
+        """Test the peak is scaled to 1.0 in place and float32 is kept."""
+        audio = np.array([0.1, -0.4, 0.2], dtype=np.float32)
+
+        result = audio_processor.normalize_peak(audio)
+
+        self.assertIs(result, audio)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, [0.25, -1.0, 0.5], rtol=1e-6)
+
+    def test_normalize_peak_silent(self):
+        """Test all-zero input is returned unchanged."""
+        audio = np.zeros(100, dtype=np.float32)
+        np.testing.assert_array_equal(audio_processor.normalize_peak(audio), audio)
+
+    def test_trim_with_padding(self):
+        """Test leading and trailing silence is dropped, keeping padding_ms on each side."""
+        sample_rate = 1000
+        audio = np.zeros(3000, dtype=np.float32)
+        audio[1000:2000] = 0.5
+
+        trimmed = audio_processor.remove_silence(audio, sample_rate, frame_ms=10, padding_ms=100)
+
+        self.assertEqual(trimmed.dtype, np.float32)
+        self.assertEqual(len(trimmed), 1200)
+        self.assertTrue(np.shares_memory(trimmed, audio))
+        np.testing.assert_array_equal(trimmed, audio[900:2100])
+
+    def test_trim_all_silent(self):
+        """Test input with no frame above the threshold trims to empty."""
+        trimmed = audio_processor.remove_silence(np.full(5000, 1e-4, dtype=np.float32), 1000)
+
+        self.assertEqual(len(trimmed), 0)
+        self.assertEqual(trimmed.dtype, np.float32)
+
+    def test_trim_partial_final_frame(self):
+        """Test sound only in a tail shorter than one frame is kept to the end."""
+        audio = np.zeros(1005, dtype=np.float32)
+        audio[-3:] = 0.5
+
+        trimmed = audio_processor.remove_silence(audio, 1000, frame_ms=10, padding_ms=0)
+
+        np.testing.assert_array_equal(trimmed, audio[1000:])
+
+class TestProcessAudioFile(unittest.TestCase):
+    """Test sample status updates around processing."""
+
+    def test_import_failure_reports_failed(self):
+        """Test a failing soundfile import still sends the FAILED status."""
+        with patch('audio_processor.update_sample_status') as mock_status, \
+             patch('audio_processor._lazy_import', side_effect=ImportError('no libsndfile')):
+            with self.assertRaises(ImportError):
+                audio_processor.process_audio_file('bucket', 'public/unprocessed/u/s.wav', 's')
+
+        self.assertEqual([c[0][1] for c in mock_status.call_args_list], ['PROCESSING', 'FAILED'])
+        self.assertEqual(mock_status.call_args[1]['error'], 'no libsndfile')
+
+class TestProcessPitchSet(unittest.TestCase):
+    """Test pitch set variants, labels and manifest."""
+
+    def setUp(self):
+        """Capture uploads instead of sending them to S3."""
+        self.uploaded = {}
+        self.s3 = Mock()
+        self.s3.upload_file.side_effect = self.capture_upload
+        self.s3_patcher = patch('audio_processor.s3', self.s3)
+        self.s3_patcher.start()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.s3_patcher.stop()
+
+    def capture_upload(self, filename, bucket, key):
+        """Record the dominant frequency of each uploaded variant."""
+        audio_data, sample_rate = sf.read(filename, dtype='float32')
+        spectrum = np.abs(np.fft.rfft(audio_data * np.hanning(len(audio_data))))
+        self.uploaded[key] = np.argmax(spectrum) * sample_rate / len(audio_data)
+
+    def test_offsets_label_variants_and_pitch_shift_recorded(self):
+        """Test offsets are validated and named as given while pitch_shift moves the whole set."""
+        t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+        audio = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+        manifest = audio_processor.process_pitch_set(
+            'bucket', 'public/unprocessed/user/clip.wav', audio, SAMPLE_RATE,
+            {'pitch_set': [0, 12], 'pitch_shift': 15}
+        )
+
+        self.assertEqual(manifest['pitch_shift'], 15.0)
+        self.assertEqual([v['semitones'] for v in manifest['variants']], [0.0, 12.0])
+        self.assertEqual(sorted(self.uploaded), ['public/processed/user/clip/root.wav',
+                                                 'public/processed/user/clip/up12.wav'])
+        self.assertAlmostEqual(self.uploaded['public/processed/user/clip/root.wav'],
+                               220 * 2 ** (15 / 12), delta=3)
+        self.assertAlmostEqual(self.uploaded['public/processed/user/clip/up12.wav'],
+                               220 * 2 ** (27 / 12), delta=6)
+
+        manifest_call = self.s3.put_object.call_args[1]
+        self.assertEqual(manifest_call['Key'], 'public/processed/user/clip/manifest.json')
+        self.assertEqual(json.loads(manifest_call['Body']), manifest)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Lambda copy of the vectorized compressor.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.dynamics import compress, limit
+    from utils.effects_chain import plan_effects
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+SAMPLE_RATE = 44100
+
+LAMBDA_COPY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils', 'dynamics.py')
+ECS_COPY = os.path.join(os.path.dirname(os.path.dirname(LAMBDA_COPY)), os.pardir, 'ecs', 'audio-processing',
+                        'utils', 'dynamics.py')
+
+def tone(amplitude, seconds=1.0):
+    """Sine tone at a fixed amplitude."""
+    t = np.arange(int(SAMPLE_RATE * seconds))
+    return (amplitude * np.sin(2 * np.pi * 440 * t / SAMPLE_RATE)).astype(np.float32)
+
+def peak_db(audio_data):
+    """Peak level in dBFS."""
+    return 20 * np.log10(np.max(np.abs(audio_data)))
+
+class TestCompressor(unittest.TestCase):
+    """Test compressor and limiter output."""
+
+    def test_steady_state_ratio(self):
+        """Test a full-scale tone settles at threshold + overshoot / ratio."""
+        audio = compress(tone(1.0), SAMPLE_RATE, threshold_db=-20, ratio=4, knee_db=0)
+
+        self.assertAlmostEqual(peak_db(audio[SAMPLE_RATE // 2:]), -15.0, places=1)
+
+    def test_quiet_signal_untouched(self):
+        """Test a signal below the threshold passes through unchanged."""
+        audio = tone(0.01)
+        expected = audio.copy()
+
+        compress(audio, SAMPLE_RATE, threshold_db=-20, knee_db=0)
+
+        np.testing.assert_allclose(audio, expected, rtol=1e-5)
+
+    def test_limiter_ceiling_with_lookahead(self):
+        """Test lookahead keeps a sudden burst below the ceiling."""
+        audio = np.concatenate([tone(0.05, 0.5), tone(1.0, 0.5)])
+
+        limit(audio, SAMPLE_RATE, ceiling_db=-6)
+
+        self.assertLessEqual(peak_db(audio), -6.0 + 1e-3)
+
+    def test_invalid_ratio(self):
+        """Test ratios below 1 are rejected."""
+        with self.assertRaises(ValueError):
+            compress(tone(1.0), SAMPLE_RATE, ratio=0.5)
+
+class TestCompressStage(unittest.TestCase):
+    """Test the compress stage of the effects chain."""
+
+    def test_options_passed_through(self):
+        """Test compress options reach the compressor and it runs in place."""
+        audio = tone(1.0)
+        plan = plan_effects({'compress': {'threshold_db': -20, 'ratio': 4, 'knee_db': 0}})
+
+        result = plan.run(audio, SAMPLE_RATE)
+
+        self.assertEqual([stage.name for stage in plan.stages], ['compress'])
+        self.assertIs(result, audio)
+        self.assertAlmostEqual(peak_db(result[SAMPLE_RATE // 2:]), -15.0, places=1)
+
+    def test_default_settings(self):
+        """Test compress: true uses the compressor defaults."""
+        expected = compress(tone(1.0), SAMPLE_RATE)
+
+        result = plan_effects({'compress': True}).run(tone(1.0), SAMPLE_RATE)
+
+        np.testing.assert_array_equal(result, expected)
+
+class TestSharedCopy(unittest.TestCase):
+    """Test the Lambda and ECS copies of dynamics.py have not drifted."""
+
+    def test_matches_ecs_copy(self):
+        """Test both copies are byte-identical."""
+        if not os.path.exists(ECS_COPY):
+            self.skipTest('ECS service source not available')
+
+        with open(LAMBDA_COPY, 'rb') as lambda_file, open(ECS_COPY, 'rb') as ecs_file:
+            self.assertEqual(lambda_file.read(), ecs_file.read(),
+                             'utils/dynamics.py differs between the Lambda and the ECS service')
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the effects chain planner.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import librosa
+    from utils.effects_chain import plan_effects, spectral_transform
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+SAMPLE_RATE = 22050
+
+def tone(frequency, seconds=1.0):
+    """Sine tone."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def fundamental(audio_data):
+    """Frequency of the strongest spectral peak."""
+    window = np.hanning(len(audio_data))
+    spectrum = np.abs(np.fft.rfft(audio_data * window, n=8 * len(audio_data)))
+    return np.argmax(spectrum) * SAMPLE_RATE / (8 * len(audio_data))
+
+class TestPlanEffects(unittest.TestCase):
+    """Test which stages are planned and in what order."""
+
+    def test_stage_order(self):
+        """Test stages run spectral, reverb, compress, eq whatever the params order."""
+        plan = plan_effects({
+            'eq': {'low': 3}, 'compress': True, 'reverb': {'room_size': 0.2},
+            'time_stretch': 1.1, 'pitch_shift': 2
+        })
+
+        self.assertEqual([stage.name for stage in plan.stages], ['spectral', 'reverb', 'compress', 'eq'])
+        self.assertEqual(plan.allocating_stages, 2)
+
+    def test_pitch_and_stretch_fused(self):
+        """Test pitch_shift and time_stretch become one spectral stage."""
+        plan = plan_effects({'pitch_shift': 12, 'time_stretch': 0.5})
+
+        self.assertEqual(len(plan), 1)
+        self.assertEqual(plan.stages[0].options, {'rate': 0.5, 'pitch_ratio': 2.0})
+
+    def test_pass_through(self):
+        """Test empty params return the input unchanged."""
+        audio = tone(440)
+        expected = audio.copy()
+
+        plan = plan_effects({'pitch_shift': 0, 'time_stretch': 1.0, 'eq': {}})
+
+        self.assertEqual(len(plan), 0)
+        self.assertIs(plan.run(audio, SAMPLE_RATE), audio)
+        np.testing.assert_array_equal(audio, expected)
+
+    def test_in_place_stages_do_not_copy(self):
+        """Test compress and eq write into a writable float32 buffer."""
+        audio = tone(440)
+
+        result = plan_effects({'compress': {'threshold_db': -20}, 'eq': {'high': -6}}).run(audio, SAMPLE_RATE)
+
+        self.assertIs(result, audio)
+
+    def test_read_only_input_copied(self):
+        """Test a read-only or non-float32 input is copied before in-place stages."""
+        audio = tone(440)
+        audio.flags.writeable = False
+        plan = plan_effects({'eq': {'high': -6}})
+
+        self.assertIsNot(plan.run(audio, SAMPLE_RATE), audio)
+        self.assertEqual(plan.run(audio.astype(np.float64), SAMPLE_RATE).dtype, np.float32)
+
+    def test_impulse_response_needs_resolver(self):
+        """Test an impulse_response key is rejected without a resolver and resolved with one."""
+        params = {'reverb': {'impulse_response': 'irs/hall.wav'}}
+        with self.assertRaises(ValueError):
+            plan_effects(params)
+
+        plan = plan_effects(params, resolve_impulse_response=lambda key: f'/tmp/{key}')
+        self.assertEqual(plan.stages[0].options, {'impulse_response_path': '/tmp/irs/hall.wav'})
+        self.assertEqual(params['reverb'], {'impulse_response': 'irs/hall.wav'})
+
+    def test_invalid_time_stretch(self):
+        """Test non-positive stretch rates are rejected."""
+        with self.assertRaises(ValueError):
+            plan_effects({'time_stretch': 0})
+
+class TestSpectralTransform(unittest.TestCase):
+    """Test the fused phase-vocoder stage against librosa's separate effects."""
+
+    def test_matches_pitch_shift_then_time_stretch(self):
+        """Test output length and fundamental match pitch_shift followed by time_stretch."""
+        audio = tone(220)
+        semitones, rate = 4, 1.25
+
+        expected = librosa.effects.time_stretch(
+            librosa.effects.pitch_shift(audio, sr=SAMPLE_RATE, n_steps=semitones), rate=rate)
+        fused = spectral_transform(audio, SAMPLE_RATE, rate=rate, pitch_ratio=2.0 ** (semitones / 12))
+
+        self.assertEqual(fused.dtype, np.float32)
+        self.assertEqual(len(fused), len(expected))
+        self.assertAlmostEqual(fundamental(fused), fundamental(expected), delta=1.0)
+        self.assertAlmostEqual(fundamental(fused), 220 * 2.0 ** (semitones / 12), delta=1.0)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the biquad parametric EQ.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+from scipy.signal import sosfilt, sosfreqz
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.eq import CHUNK_SAMPLES, MAX_GAIN_DB, apply_parametric_eq, design_sos, normalize_eq_params
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+SAMPLE_RATE = 44100
+
+def response_db(eq_params, frequency):
+    """Magnitude response of the designed cascade at one frequency."""
+    sos = design_sos(normalize_eq_params(eq_params, SAMPLE_RATE), SAMPLE_RATE)
+    _, h = sosfreqz(sos, worN=[frequency], fs=SAMPLE_RATE)
+    return 20 * np.log10(np.abs(h[0]))
+
+class TestDesign(unittest.TestCase):
+    """Test the designed filters hit their specified gains."""
+
+    def test_peaking_gain_at_centre(self):
+        """Test a peaking band reaches its gain at the centre frequency."""
+        self.assertAlmostEqual(response_db({'mid': 6}, 1000), 6.0, delta=0.02)
+        self.assertAlmostEqual(response_db({'mid': {'gain': -9, 'frequency': 2500, 'q': 2}}, 2500),
+                               -9.0, delta=0.02)
+
+    def test_shelf_gains(self):
+        """Test shelves reach full gain in the shelf and half gain at the corner."""
+        self.assertAlmostEqual(response_db({'low': 8}, 10), 8.0, delta=0.02)
+        self.assertAlmostEqual(response_db({'low': 8}, 200), 4.0, delta=0.02)
+        self.assertAlmostEqual(response_db({'high': -6}, 20000), -6.0, delta=0.02)
+        self.assertAlmostEqual(response_db({'high': -6}, 4000), -3.0, delta=0.02)
+
+    def test_design_is_cached(self):
+        """Test identical band sets share one SOS array."""
+        bands = normalize_eq_params({'low': 3, 'high': -2}, SAMPLE_RATE)
+        self.assertIs(design_sos(bands, SAMPLE_RATE), design_sos(bands, SAMPLE_RATE))
+        self.assertEqual(design_sos(bands, SAMPLE_RATE).shape, (2, 6))
+
+class TestParams(unittest.TestCase):
+    """Test eq_params validation and normalization."""
+
+    def test_unknown_band(self):
+        """Test unknown band names are rejected."""
+        with self.assertRaises(ValueError):
+            normalize_eq_params({'presence': 3}, SAMPLE_RATE)
+
+    def test_invalid_frequency_and_q(self):
+        """Test non-positive frequency or q is rejected."""
+        with self.assertRaises(ValueError):
+            normalize_eq_params({'mid': {'gain': 3, 'frequency': 0}}, SAMPLE_RATE)
+        with self.assertRaises(ValueError):
+            normalize_eq_params({'mid': {'gain': 3, 'q': -1}}, SAMPLE_RATE)
+
+    def test_clamping(self):
+        """Test gain is clamped and frequency is kept below Nyquist."""
+        bands = normalize_eq_params({'high': {'gain': 100, 'frequency': 40000}}, SAMPLE_RATE)
+
+        self.assertEqual(bands, (('highshelf', 0.45 * SAMPLE_RATE, MAX_GAIN_DB, 0.707),))
+
+    def test_zero_gain_bands_dropped(self):
+        """Test zero-gain bands are skipped and an all-flat EQ is a no-op."""
+        self.assertEqual(len(normalize_eq_params({'low': 0, 'mid': 2, 'high': {'gain': 0}}, SAMPLE_RATE)), 1)
+
+        audio = np.random.default_rng(0).standard_normal(1000).astype(np.float32)
+        expected = audio.copy()
+        self.assertIs(apply_parametric_eq(audio, SAMPLE_RATE, {'low': 0, 'high': 0}), audio)
+        np.testing.assert_array_equal(audio, expected)
+
+class TestApply(unittest.TestCase):
+    """Test chunked in-place filtering."""
+
+    def test_chunked_matches_one_shot(self):
+        """Test carrying the filter state across CHUNK_SAMPLES equals one sosfilt call."""
+        eq_params = {'low': 4, 'mid': {'gain': -3, 'frequency': 800, 'q': 1.5}, 'high': 2}
+        audio = np.random.default_rng(0).standard_normal(CHUNK_SAMPLES + 5000).astype(np.float32)
+        sos = design_sos(normalize_eq_params(eq_params, SAMPLE_RATE), SAMPLE_RATE)
+        expected = sosfilt(sos, audio)
+
+        result = apply_parametric_eq(audio, SAMPLE_RATE, eq_params)
+
+        self.assertIs(result, audio)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, expected, atol=1e-5)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pitch set rendering.
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import librosa
+    from utils.effects_chain import N_FFT, HOP_LENGTH, spectral_transform
+    from utils.pitch_set import PitchSetAnalysis, render_pitch_set, validate_pitch_set, variant_name
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+SAMPLE_RATE = 22050
+
+def mixed_clip(seconds=2.0):
+    """Two partials over a little noise."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    noise = 0.05 * np.random.default_rng(0).standard_normal(len(t))
+    return (0.4 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 331 * t) + noise).astype(np.float32)
+
+class TestPitchSetAnalysis(unittest.TestCase):
+    """Test the shared analysis against librosa's phase vocoder."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Analyze one clip for every test."""
+        cls.audio = mixed_clip()
+        cls.analysis = PitchSetAnalysis(cls.audio, SAMPLE_RATE)
+        cls.spectrum = librosa.stft(cls.audio, n_fft=N_FFT, hop_length=HOP_LENGTH)
+
+    def test_stretch_matches_phase_vocoder(self):
+        """Test stretch() matches librosa.phase_vocoder on the same STFT."""
+        for rate in (0.5, 2.0 ** (-7 / 12), 1.0, 1.25, 2.0):
+            with self.subTest(rate=rate):
+                expected = librosa.phase_vocoder(self.spectrum, rate=rate, hop_length=HOP_LENGTH, n_fft=N_FFT)
+
+                stretched = self.analysis.stretch(rate)
+
+                self.assertEqual(stretched.shape, expected.shape)
+                # Magnitudes agree to float32 precision; phases drift apart
+                # slowly because librosa accumulates phase in float32 while
+                # stretch() accumulates in float64 (~3e-3 relative on 2s at 0.5)
+                np.testing.assert_allclose(np.abs(stretched), np.abs(expected), atol=1e-4)
+                relative_error = np.linalg.norm(stretched - expected) / np.linalg.norm(expected)
+                self.assertLess(relative_error, 1e-2)
+
+    def test_render_matches_spectral_transform(self):
+        """Test a rendered variant matches the single-clip spectral stage."""
+        expected = spectral_transform(self.audio, SAMPLE_RATE, rate=1.1, pitch_ratio=2.0 ** (5 / 12))
+
+        rendered = self.analysis.render(5, rate=1.1)
+
+        self.assertEqual(len(rendered), len(expected))
+        self.assertLess(np.linalg.norm(rendered - expected) / np.linalg.norm(expected), 1e-2)
+
+class TestRenderPitchSet(unittest.TestCase):
+    """Test offsets, base shift and per-variant hand-off."""
+
+    def test_offsets_validated_before_base_shift(self):
+        """Test the +/-24 limit applies to the offsets, not offset plus pitch_shift."""
+        results = render_pitch_set(mixed_clip(0.5), SAMPLE_RATE, [12, 0, 0.0], lambda offset, signal: offset,
+                                   base_shift=15, max_workers=2)
+
+        self.assertEqual(results, [0.0, 12.0])
+        with self.assertRaisesRegex(ValueError, r'\+/-24'):
+            render_pitch_set(mixed_clip(0.5), SAMPLE_RATE, [25], lambda offset, signal: offset)
+
+    def test_variants_handed_off_as_rendered(self):
+        """Test each variant reaches the handler on the task that rendered it."""
+        handled = []
+
+        def handle(offset, signal):
+            handled.append((offset, threading.current_thread().name, signal.dtype, len(signal)))
+            return variant_name(offset)
+
+        names = render_pitch_set(mixed_clip(0.5), SAMPLE_RATE, [-12, 0, 7], handle, rate=2.0, max_workers=3)
+
+        self.assertEqual(names, ['down12', 'root', 'up7'])
+        self.assertEqual(sorted(offset for offset, *_ in handled), [-12.0, 0.0, 7.0])
+        self.assertTrue(all(name != threading.main_thread().name for _, name, _, _ in handled))
+        self.assertTrue(all(dtype == np.float32 and length == SAMPLE_RATE // 4 for *_, dtype, length in handled))
+
+    def test_validate_and_name(self):
+        """Test offsets are de-duplicated and sorted, and labels avoid '+'."""
+        self.assertEqual(validate_pitch_set(['3', 0, -12, 3.0]), [-12.0, 0.0, 3.0])
+        for invalid in ([], ['up'], None):
+            with self.assertRaises(ValueError):
+                validate_pitch_set(invalid)
+        self.assertEqual([variant_name(v) for v in (0.0, 3.0, -12.0, 0.5)], ['root', 'up3', 'down12', 'up0.5'])
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the partitioned convolution reverb.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import fftconvolve
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.reverb import (BLOCKS_PER_SEGMENT, PartitionedConvolver, _file_convolver,
+                              apply_convolution_reverb, get_convolver, synthesize_impulse_response)
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+SAMPLE_RATE = 16000
+
+def noise(length, seed=0):
+    """Deterministic white noise."""
+    return np.random.default_rng(seed).standard_normal(length).astype(np.float32)
+
+class TestPartitionedConvolver(unittest.TestCase):
+    """Test the convolver against scipy.signal.fftconvolve."""
+
+    def assert_matches_fftconvolve(self, signal, impulse_response, block_size):
+        """Check the full convolution, tail included."""
+        convolver = PartitionedConvolver(impulse_response, block_size)
+        expected = fftconvolve(signal.astype(np.float64), impulse_response.astype(np.float64))
+
+        result = convolver.convolve(signal)
+
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(len(result), len(expected))
+        np.testing.assert_allclose(result, expected, atol=1e-4 * np.max(np.abs(expected)))
+        return convolver
+
+    def test_single_partition(self):
+        """Test an impulse response shorter than one block (P=1)."""
+        convolver = self.assert_matches_fftconvolve(noise(5000), noise(100, seed=1), block_size=256)
+        self.assertEqual(convolver.num_partitions, 1)
+
+    def test_multiple_partitions_across_segments(self):
+        """Test P>1 with a signal spanning several segments of the delay line."""
+        block_size = 64
+        signal = noise(block_size * (2 * BLOCKS_PER_SEGMENT + 7) + 13)
+        convolver = self.assert_matches_fftconvolve(signal, noise(1000, seed=1), block_size)
+        self.assertEqual(convolver.num_partitions, 16)
+
+    def test_signal_shorter_than_block(self):
+        """Test a signal shorter than one block still gets the whole tail."""
+        self.assert_matches_fftconvolve(noise(50), noise(700, seed=1), block_size=256)
+
+    def test_without_tail(self):
+        """Test tail=False keeps the input length and matches the start of the full result."""
+        convolver = PartitionedConvolver(noise(700, seed=1), block_size=256)
+        signal = noise(3000)
+
+        truncated = convolver.convolve(signal, tail=False)
+
+        self.assertEqual(len(truncated), len(signal))
+        np.testing.assert_allclose(truncated, convolver.convolve(signal)[:len(signal)], atol=1e-5)
+
+    def test_rejects_invalid_impulse_response(self):
+        """Test empty and multichannel impulse responses are rejected."""
+        with self.assertRaises(ValueError):
+            PartitionedConvolver(np.zeros(0, dtype=np.float32))
+        with self.assertRaises(ValueError):
+            PartitionedConvolver(np.zeros((10, 2), dtype=np.float32))
+
+class TestConvolverCache(unittest.TestCase):
+    """Test convolvers are cached per room and per impulse response file version."""
+
+    def setUp(self):
+        """Write an impulse response file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'hall.wav')
+        sf.write(self.path, noise(2000, seed=2) * 0.1, SAMPLE_RATE)
+        _file_convolver.cache_clear()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_file_cache_keyed_on_path_and_mtime(self):
+        """Test a file is loaded once per modification time."""
+        first = get_convolver(SAMPLE_RATE, impulse_response_path=self.path)
+        self.assertIs(get_convolver(SAMPLE_RATE, impulse_response_path=self.path), first)
+
+        sf.write(self.path, noise(3000, seed=3) * 0.1, SAMPLE_RATE)
+        stat_result = os.stat(self.path)
+        os.utime(self.path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10 ** 9))
+
+        second = get_convolver(SAMPLE_RATE, impulse_response_path=self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.ir_length, 3000)
+        self.assertEqual(_file_convolver.cache_info().misses, 2)
+
+    def test_room_convolver_shared(self):
+        """Test synthetic rooms are cached by rounded room size."""
+        self.assertIs(get_convolver(SAMPLE_RATE, room_size=0.5), get_convolver(SAMPLE_RATE, room_size=0.5001))
+
+    def test_wet_dry_mix(self):
+        """Test the mix is dry input plus the scaled convolution."""
+        signal = noise(4000)
+        impulse_response = synthesize_impulse_response(SAMPLE_RATE, 0.1)
+
+        mixed = apply_convolution_reverb(signal, SAMPLE_RATE, room_size=0.1, wet=0.25, dry=0.5)
+
+        expected = 0.25 * fftconvolve(signal.astype(np.float64), impulse_response.astype(np.float64))
+        expected[:len(signal)] += 0.5 * signal
+        np.testing.assert_allclose(mixed, expected, atol=1e-4 * np.max(np.abs(expected)))
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the batched sample status publisher.
+"""
+
+import os
+import sys
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.status_publisher import StatusPublisher, build_batch_mutation
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+class GraphQLStub:
+    """Local AppSync stand-in that answers aliased updateSample mutations."""
+
+    def __init__(self):
+        self.requests = []
+        self.fail_ids = set()
+        self.received = threading.Event()
+        # Cleared to hold responses until the test releases them
+        self.gate = threading.Event()
+        self.gate.set()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests.append(payload)
+                stub.received.set()
+                stub.gate.wait(5)
+
+                data, errors = {}, []
+                for name, update in payload['variables'].items():
+                    alias = 'u' + name[len('input'):]
+                    if update['id'] in stub.fail_ids:
+                        data[alias] = None
+                        errors.append({'path': [alias], 'message': f"Sample {update['id']} not found"})
+                    else:
+                        data[alias] = {'id': update['id'], 'processing_status': update['processing_status']}
+
+                body = json.dumps({'data': data, 'errors': errors or None}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/graphql'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def hold(self):
+        """Hold responses and wait for the next request to arrive."""
+        self.gate.clear()
+        self.received.clear()
+
+    def close(self):
+        self.gate.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestStatusPublisher(unittest.TestCase):
+    """Test coalescing, per-alias results and flushing against a local endpoint."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.stub = GraphQLStub()
+        self.publisher = StatusPublisher(self.stub.url, api_key='test-key', timeout=5)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.stub.close()
+
+    def block_sender(self):
+        """Put one update in flight so the next ones queue up behind it."""
+        self.stub.hold()
+        self.publisher.publish('blocker', 'PROCESSING')
+        self.assertTrue(self.stub.received.wait(5))
+
+    def test_batch_mutation_document(self):
+        """Test each update gets its own aliased updateSample."""
+        document = build_batch_mutation(2)
+
+        self.assertIn('$input0: UpdateSampleInput!, $input1: UpdateSampleInput!', document)
+        self.assertIn('u1: updateSample(input: $input1) { id processing_status }', document)
+
+    def test_processing_then_completed_coalesces(self):
+        """Test a queued PROCESSING is replaced by COMPLETED and both callers see the result."""
+        self.block_sender()
+        processing = self.publisher.publish('sample-1', 'PROCESSING')
+        completed = self.publisher.publish('sample-1', 'COMPLETED')
+        self.stub.gate.set()
+
+        self.assertTrue(self.publisher.flush(timeout=5))
+        self.assertEqual(len(self.stub.requests), 2)
+        update = self.stub.requests[1]['variables']
+        self.assertEqual(list(update), ['input0'])
+        self.assertEqual(update['input0']['processing_status'], 'COMPLETED')
+        self.assertIn('processing_completed_at', update['input0'])
+        for future in (processing, completed):
+            self.assertEqual(future.result(timeout=1), {'id': 'sample-1', 'processing_status': 'COMPLETED'})
+
+    def test_alias_errors_resolve_matching_futures(self):
+        """Test an error on one alias fails only that sample's future."""
+        self.stub.fail_ids.add('sample-b')
+        self.block_sender()
+        futures = {sample_id: self.publisher.publish(sample_id, 'COMPLETED')
+                   for sample_id in ('sample-a', 'sample-b', 'sample-c')}
+        self.stub.gate.set()
+
+        self.assertTrue(self.publisher.flush(timeout=5))
+        self.assertEqual(len(self.stub.requests[1]['variables']), 3)
+        self.assertEqual(futures['sample-a'].result(timeout=1)['id'], 'sample-a')
+        self.assertEqual(futures['sample-c'].result(timeout=1)['id'], 'sample-c')
+        with self.assertRaisesRegex(RuntimeError, 'sample-b not found'):
+            futures['sample-b'].result(timeout=1)
+
+    def test_flush_times_out_while_request_in_flight(self):
+        """Test flush returns False on timeout and True once the queue drains."""
+        self.block_sender()
+        future = self.publisher.publish('sample-1', 'COMPLETED')
+
+        self.assertFalse(self.publisher.flush(timeout=0.2))
+        self.assertFalse(future.done())
+
+        self.stub.gate.set()
+        self.assertTrue(self.publisher.flush(timeout=5))
+        self.assertEqual(future.result(timeout=1)['processing_status'], 'COMPLETED')
+
+    def test_transport_failure_fails_batch(self):
+        """Test every future in a batch gets the exception when the request fails."""
+        publisher = StatusPublisher('http://127.0.0.1:9/graphql', timeout=1)
+        future = publisher.publish('sample-1', 'FAILED', error='boom')
+
+        self.assertTrue(publisher.flush(timeout=10))
+        with self.assertRaises(Exception):
+            future.result(timeout=1)
+
+if __name__ == '__main__':
+    # Set up logging to suppress output during tests
+    import logging
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    unittest.main(verbosity=2)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Effects Chain Planner for Little Bit Audio Processing Service
+Turns processing_params into an ordered list of stages, fusing pitch shift
+and time stretch into one phase-vocoder pass and running sample-domain
+stages in place.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# STFT settings shared by the spectral stage (librosa's effects defaults)
+N_FFT = 2048
+HOP_LENGTH = 512
+
+class Stage:
+    """One step of an effects plan."""
+
+    def __init__(self, name: str, function: Callable[..., np.ndarray], in_place: bool, **options):
+        """
+        Initialize a stage.
+
+        Args:
+            name: Stage name for logging
+            function: Called as function(audio_data, sample_rate, **options)
+            in_place: Whether the stage writes into its input buffer
+            options: Stage options
+        """
+        self.name = name
+        self.function = function
+        self.in_place = in_place
+        self.options = options
+
+    def __repr__(self) -> str:
+        return f"{self.name}({', '.join(f'{k}={v}' for k, v in self.options.items())})"
+
+class EffectsPlan:
+    """Ordered stages for one set of processing_params."""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    @property
+    def allocating_stages(self) -> int:
+        """Number of stages that produce a new full-length buffer."""
+        return sum(1 for stage in self.stages if not stage.in_place)
+
+    def run(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Run every stage in order.
+
+        Args:
+            audio_data: Mono float32 signal; in-place stages modify it
+            sample_rate: Sample rate in Hz
+
+        Returns:
+            Processed float32 signal
+        """
+        if audio_data.dtype != np.float32 or not audio_data.flags.writeable:
+            audio_data = np.array(audio_data, dtype=np.float32)
+
+        for stage in self.stages:
+            audio_data = stage.function(audio_data, sample_rate, **stage.options)
+        return audio_data
+
+def spectral_transform(audio_data: np.ndarray, sample_rate: int, rate: float = 1.0,
+                       pitch_ratio: float = 1.0, res_type: str = 'soxr_hq') -> np.ndarray:
+    """
+    Time stretch and pitch shift with one STFT.
+
+    Pitch shifting by ratio p is a stretch to p times the length followed by
+    resampling from sample_rate * p to sample_rate; a following time stretch
+    by rate r folds into the same phase-vocoder pass, at rate r / p.
+
+    Args:
+        audio_data: Mono float32 signal
+        sample_rate: Sample rate in Hz
+        rate: Time stretch rate; above 1 is faster
+        pitch_ratio: Frequency ratio, 2 ** (semitones / 12)
+        res_type: librosa resampler
+
+    Returns:
+        float32 signal of round(len(audio_data) / rate) samples
+    """
+    import librosa
+
+    vocoder_rate = rate / pitch_ratio
+    output_length = int(round(len(audio_data) / rate))
+
+    if vocoder_rate != 1.0:
+        spectrum = librosa.stft(audio_data, n_fft=N_FFT, hop_length=HOP_LENGTH)
+        spectrum = librosa.phase_vocoder(spectrum, rate=vocoder_rate, hop_length=HOP_LENGTH, n_fft=N_FFT)
+        audio_data = librosa.istft(spectrum, hop_length=HOP_LENGTH, n_fft=N_FFT,
+                                   length=int(round(len(audio_data) / vocoder_rate)), dtype=np.float32)
+        del spectrum
+
+    if pitch_ratio != 1.0:
+        audio_data = librosa.resample(audio_data, orig_sr=sample_rate * pitch_ratio, target_sr=sample_rate,
+                                      res_type=res_type)
+
+    return librosa.util.fix_length(audio_data, size=output_length)
+
+def plan_effects(params: Dict[str, Any],
+                 resolve_impulse_response: Optional[Callable[[str], str]] = None) -> EffectsPlan:
+    """
+    Build the effects plan for processing_params.
+
+    Stages run in the order the Lambda has always applied them: spectral
+    (pitch_shift and time_stretch, fused), reverb, compression, EQ.
+    Compression and EQ work in place, so the only full-length allocations
+    are the spectral output and the reverb output, which carries the tail.
+
+    Args:
+        params: processing_params
+        resolve_impulse_response: Maps an impulse_response key to a local path
+
+    Returns:
+        EffectsPlan
+    """
+    from .reverb import apply_convolution_reverb
+    from .dynamics import compress
+    from .eq import apply_parametric_eq
+
+    stages = []
+
+    rate = float(params.get('time_stretch', 1.0))
+    pitch_ratio = 2.0 ** (float(params.get('pitch_shift', 0.0)) / 12.0)
+    if rate <= 0:
+        raise ValueError(f"time_stretch must be positive, got {rate}")
+    if rate != 1.0 or pitch_ratio != 1.0:
+        stages.append(Stage('spectral', spectral_transform, False, rate=rate, pitch_ratio=pitch_ratio))
+
+    if params.get('reverb', False):
+        options = dict(params['reverb']) if isinstance(params['reverb'], dict) else {}
+        impulse_response = options.pop('impulse_response', None)
+        if impulse_response:
+            if resolve_impulse_response is None:
+                raise ValueError("impulse_response given but no resolver configured")
+            options['impulse_response_path'] = resolve_impulse_response(impulse_response)
+        stages.append(Stage('reverb', apply_convolution_reverb, False, **options))
+
+    if params.get('compress', False):
+        options = params['compress'] if isinstance(params['compress'], dict) else {}
+        stages.append(Stage('compress', compress, True, **options))
+
+    if params.get('eq'):
+        stages.append(Stage('eq', apply_parametric_eq, True, eq_params=params['eq']))
+
+    plan = EffectsPlan(stages)
+    logger.info(f"Effects plan: {stages or 'pass-through'} "
+                f"({plan.allocating_stages} full-length allocations)")
+    return plan
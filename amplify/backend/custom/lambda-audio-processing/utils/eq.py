@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Parametric EQ for Little Bit Audio Processing Service
+RBJ cookbook biquads designed once per parameter set and applied as a single
+second-order-section cascade.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Band name -> (filter type, default centre/corner frequency in Hz, default Q)
+EQ_BANDS = {
+    'low': ('lowshelf', 200.0, 0.707),
+    'mid': ('peaking', 1000.0, 0.707),
+    'high': ('highshelf', 4000.0, 0.707),
+}
+
+MAX_GAIN_DB = 24.0
+
+# Samples filtered per sosfilt call when working in place
+CHUNK_SAMPLES = 1 << 18
+
+def biquad_coefficients(filter_type: str, frequency: float, gain_db: float, q: float,
+                        sample_rate: int) -> np.ndarray:
+    """
+    Design one RBJ cookbook biquad.
+
+    Args:
+        filter_type: 'lowshelf', 'peaking' or 'highshelf'
+        frequency: Centre or corner frequency in Hz
+        gain_db: Gain in dB
+        q: Quality factor; shelves use it as the slope parameter
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        Second-order section [b0, b1, b2, 1, a1, a2]
+    """
+    A = 10 ** (gain_db / 40)
+    w0 = 2 * np.pi * frequency / sample_rate
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2 * q)
+
+    if filter_type == 'peaking':
+        b = [1 + alpha * A, -2 * cos_w0, 1 - alpha * A]
+        a = [1 + alpha / A, -2 * cos_w0, 1 - alpha / A]
+    elif filter_type == 'lowshelf':
+        k = 2 * np.sqrt(A) * alpha
+        b = [A * ((A + 1) - (A - 1) * cos_w0 + k),
+             2 * A * ((A - 1) - (A + 1) * cos_w0),
+             A * ((A + 1) - (A - 1) * cos_w0 - k)]
+        a = [(A + 1) + (A - 1) * cos_w0 + k,
+             -2 * ((A - 1) + (A + 1) * cos_w0),
+             (A + 1) + (A - 1) * cos_w0 - k]
+    elif filter_type == 'highshelf':
+        k = 2 * np.sqrt(A) * alpha
+        b = [A * ((A + 1) + (A - 1) * cos_w0 + k),
+             -2 * A * ((A - 1) + (A + 1) * cos_w0),
+             A * ((A + 1) + (A - 1) * cos_w0 - k)]
+        a = [(A + 1) - (A - 1) * cos_w0 + k,
+             2 * ((A - 1) - (A + 1) * cos_w0),
+             (A + 1) - (A - 1) * cos_w0 - k]
+    else:
+        raise ValueError(f"Unknown filter type: {filter_type}")
+
+    return np.array(b + a, dtype=np.float64) / a[0]
+
+def normalize_eq_params(eq_params: Dict[str, Any], sample_rate: int) -> Tuple[Tuple[str, float, float, float], ...]:
+    """
+    Turn eq_params into a hashable tuple of active bands.
+
+    Each band is a gain in dB, or a dict with 'gain' and optional
+    'frequency' and 'q'. Bands with zero gain are dropped and frequencies are
+    kept below Nyquist.
+
+    Args:
+        eq_params: e.g. {'low': -3, 'mid': {'gain': 2, 'frequency': 800}, 'high': 1}
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        Tuple of (filter type, frequency, gain dB, q)
+    """
+    bands = []
+    for name, setting in eq_params.items():
+        if name not in EQ_BANDS:
+            raise ValueError(f"Unknown EQ band: {name}")
+        filter_type, frequency, q = EQ_BANDS[name]
+
+        if isinstance(setting, dict):
+            gain = float(setting.get('gain', 0.0))
+            frequency = float(setting.get('frequency', frequency))
+            q = float(setting.get('q', q))
+        else:
+            gain = float(setting)
+
+        gain = min(max(gain, -MAX_GAIN_DB), MAX_GAIN_DB)
+        if gain == 0.0:
+            continue
+        if frequency <= 0 or q <= 0:
+            raise ValueError(f"EQ band {name} needs a positive frequency and q")
+
+        frequency = min(frequency, 0.45 * sample_rate)
+        bands.append((filter_type, round(frequency, 3), round(gain, 3), round(q, 4)))
+
+    return tuple(bands)
+
+@lru_cache(maxsize=32)
+def design_sos(bands: Tuple[Tuple[str, float, float, float], ...], sample_rate: int) -> np.ndarray:
+    """
+    Design the second-order-section cascade for a set of bands.
+
+    Args:
+        bands: Output of normalize_eq_params
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        (n_bands, 6) SOS array, shared between callers
+    """
+    return np.stack([biquad_coefficients(t, f, g, q, sample_rate) for t, f, g, q in bands])
+
+def apply_parametric_eq(audio_data: np.ndarray, sample_rate: int, eq_params: Dict[str, Any]) -> np.ndarray:
+    """
+    Apply a parametric EQ in place.
+
+    All bands run as one sosfilt cascade, chunk by chunk with the filter
+    state carried over, writing back into audio_data so only a chunk-sized
+    temporary is allocated.
+
+    Args:
+        audio_data: Mono float32 signal, modified in place
+        sample_rate: Sample rate in Hz
+        eq_params: Band settings, see normalize_eq_params
+
+    Returns:
+        audio_data
+    """
+    from scipy.signal import sosfilt
+
+    bands = normalize_eq_params(eq_params, sample_rate)
+    if not bands:
+        return audio_data
+
+    sos = design_sos(bands, sample_rate)
+    state = np.zeros((sos.shape[0], 2), dtype=np.float64)
+
+    for start in range(0, len(audio_data), CHUNK_SAMPLES):
+        chunk = audio_data[start:start + CHUNK_SAMPLES]
+        filtered, state = sosfilt(sos, chunk, zi=state)
+        chunk[:] = filtered
+
+    logger.info(f"Applied {len(bands)}-band EQ")
+    return audio_data
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Pitch Set Rendering for Little Bit Audio Processing Service
+Renders many pitch-shifted variants of one clip from a single STFT and phase
+analysis, for chromatic sampler instruments.
+"""
+
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+import numpy as np
+
+from .effects_chain import N_FFT, HOP_LENGTH
+
+logger = logging.getLogger(__name__)
+
+# Largest shift accepted in either direction, in semitones
+MAX_SEMITONES = 24
+
+class PitchSetAnalysis:
+    """
+    STFT magnitude and phase increments of one clip, shared by every variant.
+
+    Each variant is a phase-vocoder stretch followed by a resample. The
+    vocoder step only depends on the magnitudes and on the per-frame phase
+    increments, so both are computed once here; rendering a variant is then
+    an interpolation, a cumulative sum of increments, an ISTFT and a resample.
+    """
+
+    def __init__(self, audio_data: np.ndarray, sample_rate: int):
+        """
+        Analyze a clip.
+
+        Args:
+            audio_data: Mono float32 signal
+            sample_rate: Sample rate in Hz
+        """
+        import librosa
+
+        self.sample_rate = sample_rate
+        self.length = len(audio_data)
+
+        spectrum = librosa.stft(audio_data, n_fft=N_FFT, hop_length=HOP_LENGTH)
+        self.num_frames = spectrum.shape[1]
+
+        # Two zero frames at the end, as librosa.phase_vocoder pads
+        self.magnitude = np.zeros((spectrum.shape[0], self.num_frames + 2), dtype=np.float32)
+        np.abs(spectrum, out=self.magnitude[:, :self.num_frames])
+        phase = np.zeros((spectrum.shape[0], self.num_frames + 2), dtype=np.float64)
+        phase[:, :self.num_frames] = np.angle(spectrum)
+        del spectrum
+
+        # Expected phase advance per hop, and the wrapped deviation from it
+        phi_advance = HOP_LENGTH * 2 * np.pi * np.arange(self.magnitude.shape[0]) / N_FFT
+        increments = np.diff(phase, axis=1) - phi_advance[:, np.newaxis]
+        increments -= 2.0 * np.pi * np.round(increments / (2.0 * np.pi))
+        increments += phi_advance[:, np.newaxis]
+
+        self.initial_phase = phase[:, 0]
+        self.phase_increments = increments
+
+    def stretch(self, rate: float) -> np.ndarray:
+        """
+        Phase-vocoder time stretch of the analyzed STFT.
+
+        Args:
+            rate: Stretch rate; below 1 is longer
+
+        Returns:
+            Complex STFT with ceil(num_frames / rate) frames
+        """
+        steps = np.arange(0, self.num_frames, rate, dtype=np.float64)
+        index = steps.astype(np.int64)
+        alpha = (steps - index).astype(np.float32)
+
+        magnitude = self.magnitude[:, index] * (1.0 - alpha)
+        magnitude += self.magnitude[:, index + 1] * alpha
+
+        # Phase of output frame j: initial phase plus the increments of all earlier steps
+        phase = np.empty(magnitude.shape, dtype=np.float64)
+        phase[:, 0] = self.initial_phase
+        np.cumsum(self.phase_increments[:, index[:-1]], axis=1, dtype=np.float64, out=phase[:, 1:])
+        phase[:, 1:] += self.initial_phase[:, np.newaxis]
+
+        return magnitude * np.exp(1j * phase).astype(np.complex64)
+
+    def render(self, semitones: float, rate: float = 1.0, res_type: str = 'soxr_hq') -> np.ndarray:
+        """
+        Render one pitch-shifted variant.
+
+        Args:
+            semitones: Pitch shift in semitones
+            rate: Additional time stretch rate
+            res_type: librosa resampler
+
+        Returns:
+            float32 signal of round(length / rate) samples
+        """
+        import librosa
+
+        pitch_ratio = 2.0 ** (semitones / 12.0)
+        vocoder_rate = rate / pitch_ratio
+        output_length = int(round(self.length / rate))
+
+        stretched = librosa.istft(self.stretch(vocoder_rate), hop_length=HOP_LENGTH, n_fft=N_FFT,
+                                  length=int(round(self.length / vocoder_rate)), dtype=np.float32)
+        if pitch_ratio != 1.0:
+            stretched = librosa.resample(stretched, orig_sr=self.sample_rate * pitch_ratio,
+                                         target_sr=self.sample_rate, res_type=res_type)
+
+        return librosa.util.fix_length(stretched, size=output_length)
+
+def validate_pitch_set(offsets: Iterable) -> list:
+    """
+    Validate and de-duplicate a list of semitone offsets.
+
+    Args:
+        offsets: Semitone offsets
+
+    Returns:
+        Sorted list of unique offsets
+    """
+    try:
+        values = sorted({float(offset) for offset in offsets})
+    except (TypeError, ValueError):
+        raise ValueError(f"pitch_set must be a list of semitone offsets, got {offsets!r}")
+
+    if not values:
+        raise ValueError("pitch_set is empty")
+    if any(abs(value) > MAX_SEMITONES for value in values):
+        raise ValueError(f"pitch_set offsets must be within +/-{MAX_SEMITONES} semitones")
+    return values
+
+def render_pitch_set(audio_data: np.ndarray, sample_rate: int, offsets: Iterable,
+                     handle_variant: Callable[[float, np.ndarray], Any], base_shift: float = 0.0,
+                     rate: float = 1.0, executor: Optional[Executor] = None,
+                     max_workers: Optional[int] = None) -> List[Any]:
+    """
+    Render every offset of a pitch set from one analysis.
+
+    Each task renders one variant and passes it straight to
+    handle_variant(offset, signal), so only the variants currently being
+    worked on are held in memory. The FFT, resampling and array work release
+    the GIL, so tasks run on separate cores.
+
+    Args:
+        audio_data: Mono float32 signal
+        sample_rate: Sample rate in Hz
+        offsets: Semitone offsets relative to base_shift
+        handle_variant: Called with each offset and its float32 signal
+        base_shift: Semitones added to every offset when rendering
+        rate: Time stretch rate applied to every variant
+        executor: Thread pool to run tasks on; a private one is used if omitted
+        max_workers: Size of the private thread pool
+
+    Returns:
+        handle_variant results, in ascending offset order
+    """
+    offsets = validate_pitch_set(offsets)
+    analysis = PitchSetAnalysis(audio_data, sample_rate)
+
+    def render_variant(offset: float) -> Any:
+        return handle_variant(offset, analysis.render(base_shift + offset, rate))
+
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=max_workers) as own_executor:
+            results = list(own_executor.map(render_variant, offsets))
+    else:
+        results = list(executor.map(render_variant, offsets))
+
+    logger.info(f"Rendered {len(offsets)} pitch variants from one {analysis.num_frames}-frame analysis")
+    return results
+
+def variant_name(semitones: float) -> str:
+    """
+    Key-safe label for an offset: 'root', 'up3', 'down12', 'up0.5'.
+
+    Avoids '+', which S3 event notifications decode as a space.
+    """
+    magnitude = abs(semitones)
+    value = int(magnitude) if float(magnitude).is_integer() else magnitude
+    if semitones == 0:
+        return 'root'
+    return f"{'up' if semitones > 0 else 'down'}{value}"
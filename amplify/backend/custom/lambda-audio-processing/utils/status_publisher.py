@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Sample Status Publisher for Little Bit Audio Processing Service
+Sends updateSample mutations to AppSync from a background thread over a
+keep-alive session, coalescing updates and batching them as aliased mutations.
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Fields returned for every aliased updateSample
+UPDATE_SAMPLE_FIELDS = 'id processing_status'
+
+def build_batch_mutation(count: int) -> str:
+    """
+    Build a mutation with one aliased updateSample per update.
+
+    Args:
+        count: Number of updates in the batch
+
+    Returns:
+        GraphQL document taking $input0..$input{count-1}
+    """
+    params = ', '.join(f'$input{i}: UpdateSampleInput!' for i in range(count))
+    fields = ' '.join(
+        f'u{i}: updateSample(input: $input{i}) {{ {UPDATE_SAMPLE_FIELDS} }}' for i in range(count)
+    )
+    return f'mutation UpdateSamples({params}) {{ {fields} }}'
+
+def build_update_input(sample_id: str, status: str, error: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the UpdateSampleInput for a status change.
+
+    Args:
+        sample_id: Sample ID
+        status: ProcessingStatus value
+        error: Optional processing error message
+
+    Returns:
+        UpdateSampleInput variables
+    """
+    update = {'id': sample_id, 'processing_status': status}
+    if status == 'COMPLETED':
+        update['processing_completed_at'] = datetime.utcnow().isoformat() + 'Z'
+    if error:
+        update['processing_error'] = error
+    return update
+
+class StatusPublisher:
+    """
+    Asynchronous publisher for sample status updates.
+
+    publish() only queues the update and returns a Future, so callers can
+    start their S3 transfer while the request is in flight. A single sender
+    thread drains the queue in order: updates queued while a request is in
+    flight go out together in the next aliased mutation, and a queued update
+    is replaced by a newer one for the same sample before it is sent.
+    """
+
+    def __init__(self, api_url: str, api_key: str = '', max_batch_size: int = 10,
+                 timeout: float = 10.0, session: Optional[requests.Session] = None):
+        """
+        Initialize the publisher.
+
+        Args:
+            api_url: AppSync GraphQL endpoint
+            api_key: AppSync API key sent as x-api-key
+            max_batch_size: Maximum updates per mutation
+            timeout: HTTP request timeout in seconds
+            session: Optional preconfigured session
+        """
+        self.api_url = api_url
+        self.max_batch_size = max(1, max_batch_size)
+        self.timeout = timeout
+
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=2))
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=2))
+        session.headers.update({'Content-Type': 'application/json', 'x-api-key': api_key})
+        self.session = session
+
+        self._pending: 'OrderedDict[str, Tuple[Dict[str, Any], List[Future]]]' = OrderedDict()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._sender: Optional[threading.Thread] = None
+        self.requests_sent = 0
+
+    def publish(self, sample_id: str, status: str, error: Optional[str] = None) -> Future:
+        """
+        Queue a status update.
+
+        Args:
+            sample_id: Sample ID
+            status: ProcessingStatus value
+            error: Optional processing error message
+
+        Returns:
+            Future resolved with the updated sample, or with an exception
+        """
+        future = Future()
+        update = build_update_input(sample_id, status, error)
+
+        with self._condition:
+            if sample_id in self._pending:
+                # Not sent yet: the newer status supersedes it
+                previous, futures = self._pending.pop(sample_id)
+                logger.debug(f"Coalesced {previous['processing_status']} -> {status} for sample {sample_id}")
+                futures.append(future)
+                self._pending[sample_id] = (update, futures)
+            else:
+                self._pending[sample_id] = (update, [future])
+            self._ensure_sender()
+            self._condition.notify_all()
+
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued update has been sent.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        with self._condition:
+            drained = self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+        if not drained:
+            logger.warning(f"Status publisher flush timed out with {len(self._pending)} updates queued")
+        return drained
+
+    def _ensure_sender(self):
+        """Start the sender thread if it is not running. Caller holds the lock."""
+        if self._sender is None or not self._sender.is_alive():
+            self._sender = threading.Thread(target=self._run, name='status-publisher', daemon=True)
+            self._sender.start()
+
+    def _run(self):
+        """Sender loop: take up to max_batch_size updates and send them as one mutation."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                batch = []
+                while self._pending and len(batch) < self.max_batch_size:
+                    batch.append(self._pending.popitem(last=False)[1])
+                self._in_flight += 1
+
+            try:
+                self._send(batch)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    def _send(self, batch: List[Tuple[Dict[str, Any], List[Future]]]):
+        """Send one aliased mutation and resolve the futures of each update."""
+        variables = {f'input{i}': update for i, (update, _) in enumerate(batch)}
+        payload = {'query': build_batch_mutation(len(batch)), 'variables': variables}
+
+        try:
+            response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            body = response.json()
+            self.requests_sent += 1
+        except Exception as e:
+            logger.error(f"Failed to send {len(batch)} sample status updates: {str(e)}")
+            for _, futures in batch:
+                for future in futures:
+                    future.set_exception(e)
+            return
+
+        # Errors are reported per alias through their path
+        errors = {}
+        for error in body.get('errors') or []:
+            path = error.get('path') or []
+            errors[path[0] if path else None] = error.get('message', 'Unknown GraphQL error')
+        data = body.get('data') or {}
+
+        for i, (update, futures) in enumerate(batch):
+            alias = f'u{i}'
+            message = errors.get(alias) or (errors.get(None) if data.get(alias) is None else None)
+            for future in futures:
+                if message:
+                    future.set_exception(RuntimeError(message))
+                else:
+                    future.set_result(data.get(alias))
+            if message:
+                logger.error(f"Failed to update sample {update['id']} status: {message}")
+            else:
+                logger.info(f"Updated sample {update['id']} status to {update['processing_status']}")
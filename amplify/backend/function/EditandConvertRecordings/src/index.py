@@ -6,9 +6,18 @@ import shutil
 import re
 import uuid
 from urllib.parse import unquote_plus
+from concurrent.futures import ThreadPoolExecutor
 
 SIGNED_URL_TIMEOUT = 60
 
+# 'passthrough' copies the upload server-side without downloading it;
+# 'local' downloads, processes in /tmp and uploads the result once
+PROCESSING_MODE = os.environ.get('PROCESSING_MODE', 'passthrough').lower()
+COPY_CONCURRENCY = int(os.environ.get('COPY_CONCURRENCY', '3'))
+
+# Largest object a single CopyObject call accepts; larger copies use multipart
+MAX_COPY_OBJECT_BYTES = 5 * 1024 ** 3
+
 def handler(event, context):
     """
     Simplified audio processing function for Lambda.
@@ -43,44 +52,52 @@ def handler(event, context):
         # Initialize S3 client with error handling
         s3_client = boto3.client('s3')
         
-        # Check available disk space in /tmp
-        check_disk_space()
-        
-        # Generate secure local file paths
+        # Generate secure session ID and output keys
         secure_session_id = str(uuid.uuid4())[:8]
-        local_file_name = f'/tmp/{secure_session_id}_{s3_source_basename}.{s3_source_format}'
-        
-        # Download the audio file from S3 with retry logic
-        download_file_s3_secure(s3_client, s3_source_bucket, s3_source_key, local_file_name)
-        
-        # Generate secure debug filenames with session ID
-        debug_raw_filename = f"debug_01_raw_{secure_session_id}_{s3_source_basename}.{s3_source_format}"
-        print(f"DEBUG: Saving raw uploaded file to debug/raw/{username}/{debug_raw_filename}")
-        upload_file_s3_secure(s3_client, local_file_name, s3_source_bucket, f"debug/raw/{username}/{debug_raw_filename}")
-        
-        # MINIMAL PROCESSING: For now, simply copy the file to processed directory
-        # This establishes the pipeline structure for future ECS-based processing
+        debug_raw_key = f"debug/raw/{username}/debug_01_raw_{secure_session_id}_{s3_source_basename}.{s3_source_format}"
         processed_filename = f"{s3_source_basename}_processed_{secure_session_id}.{s3_source_format}"
-        processed_local_path = f"/tmp/{secure_session_id}_processed_{s3_source_basename}.{s3_source_format}"
-        
-        print(f"PROCESSING: Creating processed version (currently just a copy)")
-        # Copy the file (placeholder for future audio processing)
-        shutil.copy2(local_file_name, processed_local_path)
-        
-        # Upload to processed directory
         processed_s3_key = f"public/processed/{username}/{processed_filename}"
-        print(f"UPLOAD: Saving processed file to {processed_s3_key}")
-        upload_file_s3_secure(s3_client, processed_local_path, s3_source_bucket, processed_s3_key)
-        
-        # DEBUG: Save a copy to final debug directory
-        debug_final_filename = f"debug_02_final_processed_{secure_session_id}_{s3_source_basename}.{s3_source_format}"
-        print(f"DEBUG: Saving final processed file to debug/final/{username}/{debug_final_filename}")
-        upload_file_s3_secure(s3_client, processed_local_path, s3_source_bucket, f"debug/final/{username}/{debug_final_filename}")
-        
-        # Clean up local files
-        cleanup_local_files([local_file_name, processed_local_path])
+        debug_final_key = f"debug/final/{username}/debug_02_final_processed_{secure_session_id}_{s3_source_basename}.{s3_source_format}"
+        source_size = s3_record['object'].get('size')
+        
+        if PROCESSING_MODE == 'passthrough':
+            # PASS-THROUGH: the output is the upload itself, so every copy is made
+            # server-side in parallel and nothing is downloaded
+            print(f"PROCESSING: Pass-through, copying server-side to processed and debug directories")
+            copy_objects_s3_parallel(s3_client, s3_source_bucket, [
+                (s3_source_key, debug_raw_key),
+                (s3_source_key, processed_s3_key),
+                (s3_source_key, debug_final_key),
+            ], source_size)
+            processing_type = 'server_side_copy'
         
-        print("SUCCESS: Basic audio processing pipeline completed")
+        else:
+            # LOCAL PROCESSING: download, process, upload once, then fan out with server-side copies
+            check_disk_space()
+            local_file_name = f'/tmp/{secure_session_id}_{s3_source_basename}.{s3_source_format}'
+            processed_local_path = f"/tmp/{secure_session_id}_processed_{s3_source_basename}.{s3_source_format}"
+            
+            with ThreadPoolExecutor(max_workers=COPY_CONCURRENCY) as executor:
+                # The raw debug copy does not depend on processing
+                raw_copy = executor.submit(copy_object_s3_secure, s3_client, s3_source_bucket,
+                                           s3_source_key, debug_raw_key, source_size)
+                try:
+                    download_file_s3_secure(s3_client, s3_source_bucket, s3_source_key, local_file_name)
+                    
+                    print(f"PROCESSING: Creating processed version (currently just a copy)")
+                    # Copy the file (placeholder for future audio processing)
+                    shutil.copy2(local_file_name, processed_local_path)
+                    
+                    print(f"UPLOAD: Saving processed file to {processed_s3_key}")
+                    upload_file_s3_secure(s3_client, processed_local_path, s3_source_bucket, processed_s3_key)
+                finally:
+                    cleanup_local_files([local_file_name, processed_local_path])
+                
+                copy_object_s3_secure(s3_client, s3_source_bucket, processed_s3_key, debug_final_key)
+                raw_copy.result()
+            processing_type = 'basic_copy'
+        
+        print(f"SUCCESS: Basic audio processing pipeline completed ({processing_type})")
         print(f"- Original file: {s3_source_key}")
         print(f"- Processed file: {processed_s3_key}")
         print(f"- Debug files created in debug/ directories")
@@ -92,7 +109,7 @@ def handler(event, context):
                 'message': 'Audio processing completed successfully',
                 'original_file': s3_source_key,
                 'processed_file': processed_s3_key,
-                'processing_type': 'basic_copy',
+                'processing_type': processing_type,
                 'session_id': secure_session_id,
                 'note': 'Minimal processing implementation - upgrade to ECS for advanced features'
             })
@@ -301,6 +318,39 @@ def upload_file_s3_secure(client, local_path, bucket, s3_path, retries=3):
             else:
                 raise RuntimeError(f"Failed to upload to {s3_path} after {retries + 1} attempts: {str(e)}")
 
+def copy_object_s3_secure(client, bucket, source_key, dest_key, source_size=None, retries=3):
+    """Copy an object within the bucket server-side with retry logic."""
+    copy_source = {'Bucket': bucket, 'Key': source_key}
+    for attempt in range(retries + 1):
+        try:
+            print(f"Copying {source_key} to {dest_key} (attempt {attempt + 1}/{retries + 1})")
+            if source_size is not None and source_size > MAX_COPY_OBJECT_BYTES:
+                # Managed copy splits into UploadPartCopy requests
+                client.copy(copy_source, bucket, dest_key)
+            else:
+                client.copy_object(CopySource=copy_source, Bucket=bucket, Key=dest_key,
+                                   MetadataDirective='COPY')
+            print(f"Successfully copied to {dest_key}")
+            return
+            
+        except Exception as e:
+            print(f"Copy attempt {attempt + 1} failed: {str(e)}")
+            
+            if attempt < retries:
+                sleep_time = 2 ** attempt  # Exponential backoff
+                print(f"Retrying in {sleep_time} seconds...")
+                time.sleep(sleep_time)
+            else:
+                raise RuntimeError(f"Failed to copy {source_key} to {dest_key} after {retries + 1} attempts: {str(e)}")
+
+def copy_objects_s3_parallel(client, bucket, copies, source_size=None):
+    """Run server-side copies of (source_key, dest_key) pairs in parallel."""
+    with ThreadPoolExecutor(max_workers=COPY_CONCURRENCY) as executor:
+        futures = [executor.submit(copy_object_s3_secure, client, bucket, source_key, dest_key, source_size)
+                   for source_key, dest_key in copies]
+        for future in futures:
+            future.result()
+
 def cleanup_local_files(file_paths):
     """Safely clean up local temporary files."""
     for file_path in file_paths:
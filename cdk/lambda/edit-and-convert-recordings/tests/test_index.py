@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the EditandConvertRecordings handler with a stubbed S3 client.
+"""
+
+import os
+import sys
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import index
+except ImportError as e:
+    print(f"Import error in tests: {e}")
+    sys.exit(1)
+
+BUCKET = 'recordings-bucket'
+SOURCE_KEY = 'public/unprocessed/user-1/take.wav'
+
+def s3_event(key=SOURCE_KEY, size=1024):
+    """S3 ObjectCreated event for one upload."""
+    return {'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': key, 'size': size}}}]}
+
+class TestEditAndConvert(unittest.TestCase):
+    """Test the S3 calls made in pass-through and local processing modes."""
+
+    def setUp(self):
+        """Stub the S3 client the handler creates."""
+        self.s3 = Mock()
+        self.s3.download_file.side_effect = self.fake_download
+        self.s3.upload_file.side_effect = self.fake_upload
+        self.uploaded = {}
+        self.downloaded = []
+        self.client_patcher = patch('index.boto3.client', return_value=self.s3)
+        self.client_patcher.start()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.client_patcher.stop()
+
+    def fake_download(self, bucket, key, local_path):
+        """Write placeholder audio bytes where the handler expects the download."""
+        with open(local_path, 'wb') as f:
+            f.write(b'RIFF' + b'\x00' * 1020)
+        self.downloaded.append(local_path)
+
+    def fake_upload(self, local_path, bucket, key):
+        """Record the uploaded bytes by key."""
+        with open(local_path, 'rb') as f:
+            self.uploaded[key] = f.read()
+
+    def copies(self):
+        """(source key, destination key) for every copy_object call."""
+        return [(call[1]['CopySource']['Key'], call[1]['Key']) for call in self.s3.copy_object.call_args_list]
+
+    def test_passthrough_copies_without_download(self):
+        """Test pass-through makes three server-side copies of the upload and no transfers."""
+        with patch('index.PROCESSING_MODE', 'passthrough'):
+            response = index.handler(s3_event(), None)
+
+        self.assertEqual(response['statusCode'], 200)
+        body = json.loads(response['body'])
+        self.assertEqual(body['processing_type'], 'server_side_copy')
+        self.assertEqual(self.s3.copy_object.call_count, 3)
+        self.s3.download_file.assert_not_called()
+        self.s3.upload_file.assert_not_called()
+
+        copies = self.copies()
+        self.assertTrue(all(source == SOURCE_KEY for source, _ in copies))
+        self.assertEqual(sorted(dest.split('/')[0] + '/' + dest.split('/')[1] for _, dest in copies),
+                         ['debug/final', 'debug/raw', 'public/processed'])
+        self.assertIn((SOURCE_KEY, body['processed_file']), copies)
+        for call in self.s3.copy_object.call_args_list:
+            self.assertEqual(call[1]['Bucket'], BUCKET)
+            self.assertEqual(call[1]['MetadataDirective'], 'COPY')
+
+    def test_local_mode_uploads_once(self):
+        """Test local processing uploads only the processed file and copies the debug outputs."""
+        with patch('index.PROCESSING_MODE', 'local'):
+            response = index.handler(s3_event(), None)
+
+        self.assertEqual(response['statusCode'], 200)
+        processed_key = json.loads(response['body'])['processed_file']
+        self.assertTrue(processed_key.startswith('public/processed/user-1/take_processed_'))
+        self.s3.download_file.assert_called_once()
+        self.assertEqual(list(self.uploaded), [processed_key])
+        self.assertEqual(self.uploaded[processed_key], b'RIFF' + b'\x00' * 1020)
+
+        copies = dict((dest.split('/')[1], source) for source, dest in self.copies())
+        self.assertEqual(copies, {'raw': SOURCE_KEY, 'final': processed_key})
+        self.assertFalse(any(os.path.exists(path) for path in self.downloaded))
+
+    def test_large_object_uses_managed_copy(self):
+        """Test objects over the CopyObject limit go through the multipart copy."""
+        with patch('index.PROCESSING_MODE', 'passthrough'):
+            index.handler(s3_event(size=index.MAX_COPY_OBJECT_BYTES + 1), None)
+
+        self.s3.copy_object.assert_not_called()
+        self.assertEqual(self.s3.copy.call_count, 3)
+
+    def test_invalid_key_rejected(self):
+        """Test keys outside unprocessed/ are rejected before any S3 call."""
+        response = index.handler(s3_event(key='public/processed/user-1/take.wav'), None)
+
+        self.assertEqual(response['statusCode'], 400)
+        self.assertEqual(self.s3.method_calls, [])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -63,6 +63,7 @@ export class AudioProcessingLambdaStack extends cdk.Stack {
         API_URL: props.apiEndpoint,
         API_ID: props.apiId,
         QUEUE_URL: this.processingQueue.queueUrl,
+        MAX_CONCURRENT_RECORDS: '4',
         PYTHONUNBUFFERED: '1',
       },
       reservedConcurrentExecutions: 10, // Limit concurrent executions to control costs
@@ -83,8 +84,9 @@ export class AudioProcessingLambdaStack extends cdk.Stack {
 
     // Add SQS trigger to Lambda
     this.processingFunction.addEventSource(new lambdaEventSources.SqsEventSource(this.processingQueue, {
-      batchSize: 1, // Process one file at a time
+      batchSize: 4, // Records are processed concurrently, up to MAX_CONCURRENT_RECORDS
       maxBatchingWindow: cdk.Duration.seconds(20),
+      reportBatchItemFailures: true, // Only failed records are retried
     }));
 
     // Alternative: Direct S3 trigger for immediate processing
@@ -90,11 +90,25 @@ export class EcsProcessingStack extends cdk.Stack {
       actions: [
         'sqs:ReceiveMessage',
         'sqs:DeleteMessage',
+        'sqs:SendMessage',
+        'sqs:ChangeMessageVisibility',
         'sqs:GetQueueAttributes',
       ],
       resources: [queueArn],
     }));
 
+    // Allow the worker to dead-letter poison messages directly
+    taskRole.addToPolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: [
+        'sqs:GetQueueUrl',
+        'sqs:SendMessage',
+      ],
+      resources: [
+        `arn:aws:sqs:${cdk.Stack.of(this).region}:${cdk.Stack.of(this).account}:littlebit-audio-processing-dlq-*`,
+      ],
+    }));
+
     // Grant AppSync permissions to task role with specific API ID
     taskRole.addToPolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,